@@ -0,0 +1,89 @@
+"""
+Several read-only API calls in one HTTP round trip
+
+Sub-requests are dispatched through the ASGI app itself, so they get the same
+validation, caching and ETags as direct calls, and they run concurrently on
+the database executor. Their JSON bodies are spliced into the batch response
+as-is rather than being parsed and encoded a second time.
+"""
+import asyncio
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import orjson
+from fastapi import Request
+
+from models import BatchRequestItem
+
+MAX_BATCH_REQUESTS = 20
+BLOCKED_PREFIXES = ("/api/batch", "/api/admin")
+
+
+def check_path(path: str) -> str:
+    """Only read endpoints under /api/ may be batched"""
+    route = urlsplit(path).path
+    if not route.startswith("/api/") or route.startswith(BLOCKED_PREFIXES):
+        raise ValueError(f"Path '{path}' cannot be batched")
+    return path
+
+
+async def dispatch(request: Request, path: str) -> Tuple[int, Optional[bytes], bytes]:
+    """GET ``path`` from the app serving ``request``; returns status, content type and body"""
+    parts = urlsplit(path)
+    scope = {
+        key: request.scope[key]
+        for key in ("type", "asgi", "http_version", "scheme", "server", "client", "root_path")
+        if key in request.scope
+    }
+    scope.update(
+        method="GET",
+        path=parts.path,
+        raw_path=parts.path.encode(),
+        query_string=parts.query.encode(),
+        headers=[(b"host", request.headers.get("host", "").encode()), (b"accept", b"application/json")],
+    )
+    status, content_type, chunks = 500, None, []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # Streaming responses wait for a disconnect; there is none to report
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            content_type = dict(message.get("headers", [])).get(b"content-type")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # The error middleware has already sent its 500 before re-raising
+        if not chunks:
+            return 500, b"application/json", b'{"detail":"Internal Server Error"}'
+    return status, content_type, b"".join(chunks)
+
+
+def _result(item: BatchRequestItem, status: int, content_type: Optional[bytes], body: bytes) -> bytes:
+    if not body:
+        body = b"null"
+    elif not (content_type or b"").startswith(b"application/json"):
+        body = orjson.dumps(body.decode())
+    return b'{"id":' + orjson.dumps(item.id) + b',"status":' + str(status).encode() + b',"body":' + body + b"}"
+
+
+async def run_batch(request: Request, items: List[BatchRequestItem]) -> bytes:
+    """Run ``items`` concurrently and return the encoded BatchResponse"""
+    if len(items) > MAX_BATCH_REQUESTS:
+        raise ValueError(f"At most {MAX_BATCH_REQUESTS} requests can be batched")
+    for item in items:
+        check_path(item.path)
+
+    results = await asyncio.gather(*(dispatch(request, item.path) for item in items))
+    return b'{"responses":[' + b",".join(_result(item, *result) for item, result in zip(items, results)) + b"]}"
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the Tangerine Practitioners API
+
+Run from the backend directory, e.g. ``python -m benchmarks.bench_connection_pool``.
+"""
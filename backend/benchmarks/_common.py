@@ -0,0 +1,163 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Awaitable, Callable, List
+
+
+def use_scratch_database() -> str:
+    """Point the API at a throwaway database file before it is imported"""
+    if "DATABASE_PATH" not in os.environ:
+        scratch_dir = tempfile.mkdtemp(prefix="tangerine-bench-")
+        os.environ["DATABASE_PATH"] = os.path.join(scratch_dir, "bench.db")
+    return os.environ["DATABASE_PATH"]
+
+
+def make_client(app):
+    """In-process HTTP client that drives the ASGI app without a socket"""
+    import httpx
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+async def requests_per_second(call: Callable[[], Awaitable[object]], requests: int) -> float:
+    """Issue ``requests`` sequential calls and return the achieved rate"""
+    await call()  # warm up
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call()
+    return requests / (time.perf_counter() - start)
+
+
+async def concurrent_latencies(call: Callable[[], Awaitable[object]], concurrency: int, requests: int) -> List[float]:
+    """Run ``requests`` calls spread over ``concurrency`` clients; return each latency in seconds"""
+    latencies: List[float] = []
+    remaining = requests
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values``"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def bulk_insert(conn, table: str, columns, rows):
+    """Insert ``rows`` through a temp staging table in one INSERT ... SELECT.
+
+    FTS5 flushes its pending terms at every statement boundary, so a plain
+    executemany into an indexed table pays a full index merge per row.
+    """
+    column_list = ", ".join(columns)
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS stage_{table} AS SELECT {column_list} FROM {table} WHERE 0")
+    conn.execute(f"DELETE FROM temp.stage_{table}")
+    conn.executemany(f"INSERT INTO temp.stage_{table} VALUES ({', '.join('?' * len(columns))})", rows)
+    conn.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM temp.stage_{table} ORDER BY rowid")
+    conn.execute(f"DROP TABLE temp.stage_{table}")
+
+
+HERBS = ["turmeric", "ashwagandha", "brahmi", "triphala", "neem", "tulsi", "ginger", "amla",
+         "shatavari", "guggul", "moringa", "licorice", "cardamom", "fennel", "sesame", "holy basil"]
+FORMS = ["powder", "capsules", "tea", "oil", "tablets", "balm", "tincture", "blend"]
+CATEGORIES = ["Herbs & Spices", "Supplements", "Teas", "Oils", "Accessories", "Skin Care"]
+
+
+def top_up_products(count: int, seed: int = 42):
+    """Insert generated products until the catalog holds at least ``count`` rows"""
+    from database import pool
+
+    rng = random.Random(seed)
+    with pool.write() as conn:
+        existing = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        rows = []
+        for i in range(existing, count):
+            herb, form = rng.choice(HERBS), rng.choice(FORMS)
+            price = round(rng.uniform(5, 80), 2)
+            rows.append((
+                f"{herb.title()} {form.title()} #{i}",
+                f"Organic {herb} {form} with {rng.choice(HERBS)} for daily {rng.choice(['balance', 'energy', 'sleep', 'digestion'])}",
+                price,
+                round(price * 1.2, 2) if rng.random() < 0.3 else None,
+                round(rng.uniform(3.5, 5.0), 1),
+                rng.randint(0, 500),
+                "https://images.pexels.com/photos/4198015/pexels-photo-4198015.jpeg?auto=compress&cs=tinysrgb&w=400",
+                rng.choice(CATEGORIES),
+                rng.random() < 0.85,
+            ))
+        bulk_insert(conn, "products", (
+            "name", "description", "price", "original_price", "rating", "reviews", "image", "category", "in_stock"
+        ), rows)
+
+
+SPECIALTIES = ["Ayurvedic Medicine", "Panchakarma Therapy", "Herbal Medicine", "Pulse Diagnosis",
+               "Yoga Therapy", "Marma Therapy", "Ayurvedic Nutrition", "Rasayana Therapy"]
+CENTERS = ["Wellness Center", "Healing Center", "Health Hub", "Ayurveda Clinic", "Wellness Studio"]
+CITIES = ["Downtown", "Riverside", "Hillview", "Lakeside", "Old Town", "Harbor", "Midtown", "Greenfield"]
+FIRST_NAMES = ["Priya", "Rajesh", "Maya", "Anand", "Kavitha", "Arjun", "Lakshmi", "Vikram", "Meera", "Suresh"]
+# Metro areas practitioners cluster around, for a national directory
+METROS = [(40.71, -74.01), (34.05, -118.24), (41.88, -87.63), (29.76, -95.37), (33.45, -112.07),
+          (39.95, -75.17), (29.42, -98.49), (32.72, -117.16), (32.78, -96.80), (37.34, -121.89),
+          (30.27, -97.74), (30.33, -81.66), (37.77, -122.42), (39.96, -82.99), (35.23, -80.84),
+          (39.77, -86.16), (47.61, -122.33), (39.74, -104.99), (38.91, -77.04), (42.36, -71.06),
+          (36.17, -115.14), (45.52, -122.68), (35.15, -90.05), (43.04, -87.91), (25.76, -80.19),
+          (33.75, -84.39), (44.98, -93.27), (29.95, -90.07), (40.76, -111.89), (21.31, -157.86)]
+LAST_NAMES = ["Sharma", "Patel", "Joshi", "Kumar", "Nair", "Iyer", "Reddy", "Menon", "Gupta", "Rao"]
+
+
+def top_up_practitioners(count: int, seed: int = 42):
+    """Insert generated practitioners until the directory holds at least ``count`` rows"""
+    from database import pool
+
+    rng = random.Random(seed)
+    with pool.write() as conn:
+        existing = conn.execute("SELECT COUNT(*) FROM practitioners").fetchone()[0]
+        rows = []
+        for i in range(existing, count):
+            # Most practitioners sit around a metro; the rest are spread over the country
+            lat, lng = rng.choice(METROS) if rng.random() < 0.85 else (rng.uniform(30, 48), rng.uniform(-122, -72))
+            rows.append((
+                f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+                rng.choice(SPECIALTIES),
+                round(rng.uniform(3.5, 5.0), 1),
+                f"{rng.randint(1, 30)} years",
+                f"{rng.choice(CITIES)} {rng.choice(CENTERS)}",
+                "https://images.pexels.com/photos/5452293/pexels-photo-5452293.jpeg?auto=compress&cs=tinysrgb&w=400",
+                round(rng.gauss(lat, 0.3), 5),
+                round(rng.gauss(lng, 0.3), 5),
+            ))
+        bulk_insert(conn, "practitioners", (
+            "name", "specialty", "rating", "experience", "location", "image", "latitude", "longitude"
+        ), rows)
+
+
+def top_up_slots(days: int = 14, hours=(9, 10, 11, 14, 15, 16, 17)):
+    """Give every practitioner an hourly schedule for the next ``days`` days"""
+    import json
+    from datetime import datetime, timedelta
+
+    from database import SLOT_LENGTH, availability_now, pool, slot_time
+
+    today = datetime.combine(availability_now().date(), datetime.min.time())
+    starts = [today + timedelta(days=day, hours=hour) for day in range(days) for hour in hours]
+    times = [(slot_time(start), slot_time(start + SLOT_LENGTH)) for start in starts]
+    with pool.write() as conn:
+        conn.execute('''
+            INSERT OR IGNORE INTO slots (practitioner_id, starts_at, ends_at)
+            SELECT p.id, json_extract(t.value, '$[0]'), json_extract(t.value, '$[1]')
+            FROM practitioners p, json_each(?) t
+        ''', (json.dumps(times),))
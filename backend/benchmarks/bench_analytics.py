@@ -0,0 +1,124 @@
+"""
+Analytics reads from the rollup tables vs ad-hoc GROUP BY over bookings.
+
+Booking history is generated over the past year and grown step by step.
+"rollup" is AnalyticsDatabase, reading booking_rollups; "group by" answers
+the same questions from the raw bookings table, helped by an index on
+created_at so only the requested window is scanned. The write cost of the
+rollup triggers is measured by inserting a batch of bookings with and
+without them.
+
+    python -m benchmarks.bench_analytics [bookings,...] [practitioners]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks._common import top_up_practitioners, use_scratch_database
+
+use_scratch_database()
+
+from database import AnalyticsDatabase, PractitionerDatabase, pool, rollup_periods  # noqa: E402
+
+ADHOC = {
+    "bookings by specialty, 30 days": ('''
+        SELECT p.specialty, date(b.created_at), COUNT(*)
+        FROM bookings b JOIN practitioners p ON p.id = b.practitioner_id
+        WHERE b.created_at >= ?
+        GROUP BY 1, 2
+    ''', lambda: (rollup_periods("day", 30)[0],)),
+    "all bookings, 12 weeks": ('''
+        SELECT date(created_at, 'weekday 0', '-6 days'), COUNT(*)
+        FROM bookings
+        WHERE created_at >= ?
+        GROUP BY 1
+    ''', lambda: (rollup_periods("week", 12)[0],)),
+    "top practitioners, this week": ('''
+        SELECT practitioner_id, COUNT(*)
+        FROM bookings
+        WHERE created_at >= ?
+        GROUP BY 1 ORDER BY 2 DESC LIMIT 10
+    ''', lambda: (rollup_periods("week", 1)[0],)),
+}
+
+ROLLUP = {
+    "bookings by specialty, 30 days": lambda: AnalyticsDatabase.get_booking_series("day", 30, "specialty"),
+    "all bookings, 12 weeks": lambda: AnalyticsDatabase.get_booking_series("week", 12),
+    "top practitioners, this week": lambda: AnalyticsDatabase.get_top_practitioners("week"),
+}
+
+
+def booking_rows(count: int, first_slot: int, practitioners: int, rng: random.Random):
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        created = now - timedelta(seconds=rng.randrange(365 * 86400))
+        yield first_slot + i, rng.randint(1, practitioners), "Bench Patient", created.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def top_up_bookings(count: int, practitioners: int, rng: random.Random):
+    with pool.write() as conn:
+        existing = conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0]
+        first_slot = conn.execute("SELECT COALESCE(MAX(slot_id), 0) + 1 FROM bookings").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO bookings (slot_id, practitioner_id, patient_name, created_at) VALUES (?, ?, ?, ?)",
+            booking_rows(max(0, count - existing), first_slot, practitioners, rng),
+        )
+
+
+def timed(call, repeats: int) -> float:
+    call()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        call()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def trigger_cost(practitioners: int, rng: random.Random, count: int = 20_000):
+    """Insert ``count`` bookings with the rollup triggers and again without; returns µs per row for each"""
+    rows = list(booking_rows(count, 10**9, practitioners, rng))
+    insert = "INSERT INTO bookings (slot_id, practitioner_id, patient_name, created_at) VALUES (?, ?, ?, ?)"
+    results = []
+    with pool.dedicated() as conn:
+        for keep_triggers in (True, False):
+            conn.execute("BEGIN")
+            if not keep_triggers:
+                conn.execute("DROP TRIGGER bookings_rollup_insert")
+            start = time.perf_counter()
+            conn.executemany(insert, rows)
+            results.append((time.perf_counter() - start) / count * 1e6)
+            conn.execute("ROLLBACK")
+    return results
+
+
+def run(sizes, practitioners: int):
+    PractitionerDatabase.initialize_database()
+    top_up_practitioners(practitioners)
+    with pool.write() as conn:
+        conn.execute("CREATE INDEX IF NOT EXISTS bench_bookings_created ON bookings (created_at)")
+    rng = random.Random(11)
+
+    print(f"{'bookings':>10}  {'query':<32}{'rollup ms':>11}{'group by ms':>13}")
+    for size in sizes:
+        top_up_bookings(size, practitioners, rng)
+        with pool.write() as conn:
+            conn.execute("ANALYZE")
+        for name, (sql, params) in ADHOC.items():
+            rollup = timed(ROLLUP[name], 50)
+
+            def adhoc():
+                with pool.read() as conn:
+                    conn.execute(sql, params()).fetchall()
+
+            scanned = timed(adhoc, 3)
+            print(f"{size:>10,}  {name:<32}{rollup:>11.2f}{scanned:>13.1f}")
+
+    with_triggers, without = trigger_cost(practitioners, rng)
+    print(f"\nbooking insert: {with_triggers:.1f} µs/row with rollup triggers, {without:.1f} µs/row without")
+
+
+if __name__ == "__main__":
+    run(
+        [int(size) for size in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10_000, 100_000, 1_000_000],
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20_000,
+    )
@@ -0,0 +1,111 @@
+"""
+Booking contention: many clients racing for the same handful of slots.
+
+Every client (a thread in one of several worker processes, so SQLite's
+cross-process locking is exercised too) tries to book every target slot in
+its own random order. Exactly one attempt per slot may win; the rest must
+get a conflict, never a double booking or a "database is locked" error.
+
+    python -m benchmarks.bench_booking [slots] [processes] [threads]
+"""
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from benchmarks._common import percentile, top_up_practitioners, top_up_slots, use_scratch_database
+
+use_scratch_database()
+
+
+def client(slot_ids: List[int], seed: int) -> Tuple[int, int, int, List[float]]:
+    """Try every slot once; returns wins, conflicts, errors and latencies"""
+    from database import BookingDatabase, SlotUnavailableError
+
+    order = list(slot_ids)
+    random.Random(seed).shuffle(order)
+    wins = conflicts = errors = 0
+    latencies = []
+    for slot_id in order:
+        start = time.perf_counter()
+        try:
+            BookingDatabase.book_slot(slot_id, f"client {seed}")
+            wins += 1
+        except SlotUnavailableError:
+            conflicts += 1
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return wins, conflicts, errors, latencies
+
+
+def worker(slot_ids: List[int], threads: int, seed: int):
+    """One process running ``threads`` racing clients"""
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(client, [slot_ids] * threads, range(seed, seed + threads)))
+
+
+def target_slots(count: int) -> List[int]:
+    from database import BookingDatabase, pool
+
+    with pool.write() as conn:
+        conn.execute("DELETE FROM bookings")
+        conn.execute("UPDATE slots SET booked = 0 WHERE booked = 1")
+    return [slot.id for slot in BookingDatabase.find_open_slots(days=14, limit=count)]
+
+
+def check(slot_ids: List[int]) -> Tuple[int, int]:
+    """Bookings recorded for the target slots, and slots booked more than once"""
+    from database import pool
+
+    with pool.read() as conn:
+        marks = ", ".join("?" * len(slot_ids))
+        booked = conn.execute(f"SELECT COUNT(*) FROM bookings WHERE slot_id IN ({marks})", slot_ids).fetchone()[0]
+        doubled = conn.execute(f'''
+            SELECT COUNT(*) FROM (
+                SELECT slot_id FROM bookings WHERE slot_id IN ({marks}) GROUP BY slot_id HAVING COUNT(*) > 1
+            )
+        ''', slot_ids).fetchone()[0]
+    return booked, doubled
+
+
+def run(slots: int, processes: int, threads: int):
+    from database import PractitionerDatabase
+
+    PractitionerDatabase.initialize_database()
+    top_up_practitioners(200)
+    top_up_slots(days=14)
+
+    print(f"{'clients':>8}{'attempts':>10}{'won':>6}{'conflict':>10}{'errors':>8}{'attempts/s':>12}"
+          f"{'p50 ms':>8}{'p99 ms':>8}{'double':>8}")
+    context = multiprocessing.get_context("spawn")
+    for process_count in sorted({1, processes}):
+        slot_ids = target_slots(slots)
+        with context.Pool(process_count) as process_pool:
+            start = time.perf_counter()
+            results = process_pool.starmap(
+                worker, [(slot_ids, threads, index * threads) for index in range(process_count)]
+            )
+            elapsed = time.perf_counter() - start
+
+        outcomes = [outcome for per_process in results for outcome in per_process]
+        wins = sum(outcome[0] for outcome in outcomes)
+        conflicts = sum(outcome[1] for outcome in outcomes)
+        errors = sum(outcome[2] for outcome in outcomes)
+        latencies = [latency for outcome in outcomes for latency in outcome[3]]
+        booked, doubled = check(slot_ids)
+        assert wins == booked == len(slot_ids), (wins, booked, len(slot_ids))
+
+        print(f"{len(outcomes):>8}{len(latencies):>10}{wins:>6}{conflicts:>10}{errors:>8}"
+              f"{len(latencies) / elapsed:>12,.0f}{percentile(latencies, 50) * 1000:>8.2f}"
+              f"{percentile(latencies, 99) * 1000:>8.2f}{doubled:>8}")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 16,
+    )
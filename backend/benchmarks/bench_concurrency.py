@@ -0,0 +1,59 @@
+"""
+p50/p99 latency at 1, 16 and 128 concurrent clients, with database calls run
+inline on the event loop (the default, DB_EXECUTOR_WORKERS=0) versus
+offloaded to a bounded executor of EXECUTOR_WORKERS threads.
+
+In-process, an inline request runs to completion once it is scheduled, so
+its latency leaves out the time it waited behind other clients; compare the
+req/s column for throughput and the executor rows for queueing delay.
+
+    python -m benchmarks.bench_concurrency [requests] [products]
+"""
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import concurrent_latencies, make_client, percentile, top_up_products, use_scratch_database
+
+use_scratch_database()
+
+import database  # noqa: E402
+from database import PractitionerDatabase, ProductDatabase  # noqa: E402
+from main import app  # noqa: E402
+
+CONCURRENCY = [1, 16, 128]
+EXECUTOR_WORKERS = 8
+ROUTE = "/api/products?query=tea&limit=20"
+
+
+async def run(requests: int, products: int):
+    PractitionerDatabase.initialize_database()
+    ProductDatabase.initialize_database()
+    top_up_products(products)
+
+    executor = database.db_executor
+    offloaded = executor or ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="db")
+    async with make_client(app) as client:
+        async def call():
+            response = await client.get(ROUTE)
+            response.raise_for_status()
+
+        print(f"{'mode':<10}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for mode, mode_executor in (("inline", None), ("executor", offloaded)):
+            database.db_executor = mode_executor
+            for concurrency in CONCURRENCY:
+                await call()  # warm up connections
+                start = time.perf_counter()
+                latencies = await concurrent_latencies(call, concurrency, requests)
+                elapsed = time.perf_counter() - start
+                print(f"{mode:<10}{concurrency:>8}{requests / elapsed:>10.0f}"
+                      f"{percentile(latencies, 50) * 1000:>10.2f}{percentile(latencies, 99) * 1000:>10.2f}")
+    database.db_executor = executor
+
+
+if __name__ == "__main__":
+    asyncio.run(run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20000,
+    ))
@@ -0,0 +1,43 @@
+"""
+Requests/sec on /api/products and /api/practitioners/{id} with and without
+the shared connection pool.
+
+    python -m benchmarks.bench_connection_pool [requests]
+"""
+import asyncio
+import sys
+
+from benchmarks._common import make_client, requests_per_second, use_scratch_database
+
+use_scratch_database()
+
+from database import PractitionerDatabase, ProductDatabase, pool  # noqa: E402
+from main import app  # noqa: E402
+
+ROUTES = ["/api/products", "/api/practitioners/1"]
+
+
+async def run(requests: int):
+    PractitionerDatabase.initialize_database()
+    ProductDatabase.initialize_database()
+
+    results = {}
+    async with make_client(app) as client:
+        for pooled in (False, True):
+            pool.close_all()
+            pool.pooled = pooled
+            for route in ROUTES:
+                async def call(route=route):
+                    response = await client.get(route)
+                    response.raise_for_status()
+
+                results[(route, pooled)] = await requests_per_second(call, requests)
+
+    print(f"{'route':<28}{'per-call':>12}{'pooled':>12}{'speedup':>10}")
+    for route in ROUTES:
+        before, after = results[(route, False)], results[(route, True)]
+        print(f"{route:<28}{before:>10.0f}/s{after:>10.0f}/s{after / before:>9.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,84 @@
+"""
+Filtered product browse with facet counts: one facet pass vs separate queries.
+
+"separate" is what the products screen needed before facets: the page, a
+COUNT for the total, the /api/categories GROUP BY over the whole catalog,
+plus a GROUP BY per extra facet (price histogram, stock counts) with the
+filters applied. "facets" is the page plus ProductDatabase.get_facets,
+which reads the product_facets summary table, or groups the matches of a
+text query once.
+
+    python -m benchmarks.bench_facets [products] [repeats]
+"""
+import sys
+import time
+
+from benchmarks._common import top_up_products, use_scratch_database
+
+use_scratch_database()
+
+from database import ProductDatabase, fts_match_expression, like_contains, pool  # noqa: E402
+from migrations import price_bucket_sql  # noqa: E402
+
+SCENARIOS = [
+    ("browse", dict()),
+    ("category", dict(category="Teas")),
+    ("category+stock", dict(category="Teas", in_stock_only=True)),
+    ("text query", dict(query="turmeric")),
+    ("text+category", dict(query="tea", category="Teas")),
+]
+
+
+def separate(category=None, query=None, in_stock_only=False):
+    ProductDatabase.search_products(category=category, query=query, in_stock_only=in_stock_only, limit=20)
+    ProductDatabase.count_products(category=category, query=query, in_stock_only=in_stock_only)
+    from_clause, conditions, params = " FROM products p", [], []
+    if query:
+        from_clause += " JOIN products_fts ON products_fts.rowid = p.id"
+        conditions.append("products_fts MATCH ?")
+        params.append(fts_match_expression(query))
+    stock = conditions + (["p.in_stock = 1"] if in_stock_only else [])
+    both = stock + (["p.category LIKE ? ESCAPE '\\'"] if category else [])
+    where = lambda extra: " WHERE " + " AND ".join(extra) if extra else ""  # noqa: E731
+    with pool.read() as conn:
+        conn.execute("SELECT category, COUNT(*) FROM products GROUP BY category COLLATE NOCASE").fetchall()
+        conn.execute(f"SELECT p.category, COUNT(*){from_clause}{where(stock)} GROUP BY p.category COLLATE NOCASE",
+                     params).fetchall()
+        conn.execute(f"SELECT {price_bucket_sql('p.price')}, COUNT(*){from_clause}{where(both)} GROUP BY 1",
+                     params + ([like_contains(category)] if category else [])).fetchall()
+        category_only = conditions + (["p.category LIKE ? ESCAPE '\\'"] if category else [])
+        conn.execute(f"SELECT p.in_stock, COUNT(*){from_clause}{where(category_only)} GROUP BY 1",
+                     params + ([like_contains(category)] if category else [])).fetchall()
+
+
+def faceted(category=None, query=None, in_stock_only=False):
+    ProductDatabase.search_products(category=category, query=query, in_stock_only=in_stock_only, limit=20)
+    ProductDatabase.get_facets(("category", "price", "in_stock"), category, query, in_stock_only)
+
+
+def timed(call, kwargs, repeats: int) -> float:
+    call(**kwargs)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        call(**kwargs)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def run(products: int, repeats: int):
+    ProductDatabase.initialize_database()
+    top_up_products(products)
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+
+    print(f"{products:,} products\n")
+    print(f"{'scenario':>16}{'matches':>10}{'separate ms':>13}{'facets ms':>11}")
+    for label, kwargs in SCENARIOS:
+        matches = ProductDatabase.count_products(**kwargs)
+        print(f"{label:>16}{matches:>10,}{timed(separate, kwargs, repeats):>13.2f}{timed(faceted, kwargs, repeats):>11.2f}")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
@@ -0,0 +1,104 @@
+"""
+Typo-tolerant search latency over a generated catalog.
+
+"fuzzy" is a product search with fuzzy=True: misspelled words are corrected
+through the trigram index over the FTS vocabulary, then the page and total
+come from FTS5. "exact" is the same search spelled correctly, without
+fuzzy matching. "python scan" is the approach the index replaces: a trigram
+similarity check of every word of every product in Python. The generated
+catalog has a small vocabulary, so term lookup is also timed against an
+index of synthetic words the size of a large real one.
+
+    python -m benchmarks.bench_fuzzy [products] [vocabulary]
+"""
+import random
+import re
+import string
+import sys
+import time
+
+from benchmarks._common import top_up_products, use_scratch_database
+
+use_scratch_database()
+
+from database import ProductDatabase, fuzzy_matcher, pool  # noqa: E402
+from fuzzy import FuzzyMatcher, similarity  # noqa: E402
+
+QUERIES = ["ashwaganda", "turmric powdr", "tumeric", "brahmi capsuls", "shatavri tablts", "moringa", "cardamon tea"]
+
+
+def fuzzy_search(query: str):
+    page = ProductDatabase.search_products(query=query, limit=20, fuzzy=True)
+    total = ProductDatabase.count_products(query=query, fuzzy=True)
+    return page, total
+
+
+def exact_search(query: str):
+    page = ProductDatabase.search_products(query=query, limit=20)
+    total = ProductDatabase.count_products(query=query)
+    return page, total
+
+
+def python_scan(query: str):
+    words = re.findall(r"\w+", query.lower())
+    with pool.read() as conn:
+        rows = conn.execute("SELECT id, name || ' ' || description || ' ' || category FROM products").fetchall()
+    hits = []
+    for row_id, text in rows:
+        terms = set(re.findall(r"\w+", text.lower()))
+        scores = [max((similarity(word, term) for term in terms), default=0) for word in words]
+        if min(scores) >= 0.3:
+            hits.append((-sum(scores), row_id))
+    return sorted(hits)[:20], len(hits)
+
+
+def timed(call, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        call()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def synthetic_vocabulary(size: int):
+    rng = random.Random(5)
+    return {"".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12))): rng.randint(1, 1000) for _ in range(size)}
+
+
+def run(products: int, vocabulary: int):
+    ProductDatabase.initialize_database()
+    start = time.perf_counter()
+    top_up_products(products)
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+    print(f"{products:,} products ready in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    index = fuzzy_matcher.index("products")
+    print(f"vocabulary of {len(index.documents):,} terms indexed in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    print(f"{'query':<18}{'corrected':<20}{'matches':>9}{'fuzzy ms':>10}{'exact ms':>10}{'python scan ms':>16}")
+    for query in QUERIES:
+        corrected = ProductDatabase.correct_query(query) or "-"
+        _, total = fuzzy_search(query)
+        fuzzy_ms = timed(lambda: fuzzy_search(query), 20)
+        exact_ms = timed(lambda: exact_search(corrected), 20)
+        scan_ms = timed(lambda: python_scan(query), 1) if query == QUERIES[0] else float("nan")
+        print(f"{query:<18}{corrected:<20}{total:>9,}{fuzzy_ms:>10.2f}{exact_ms:>10.2f}{scan_ms:>16.0f}")
+
+    words = synthetic_vocabulary(vocabulary)
+    start = time.perf_counter()
+    large = FuzzyMatcher(lambda table: words, lambda table: 0)
+    large.index("synthetic")
+    build_ms = (time.perf_counter() - start) * 1000
+    samples = random.Random(9).sample(sorted(words), 200)
+    # Drop one letter so every lookup is a misspelling
+    typos = [word[:2] + word[3:] for word in samples]
+    lookup_ms = timed(lambda: [large.index("synthetic").similar(word, 0.3, 5) for word in typos], 1) / len(typos)
+    print(f"\n{vocabulary:,}-term vocabulary: index built in {build_ms:.0f} ms, {lookup_ms:.2f} ms per misspelled word")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200_000,
+    )
@@ -0,0 +1,104 @@
+"""
+Overhead of the metrics middleware and database call tracing.
+
+Requests are driven straight through the ASGI app (no HTTP client in the
+loop) with the response cache disabled, so every request reaches the traced
+database layer, and METRICS_ENABLED is toggled between interleaved rounds on
+the same app. The best round per setting is kept. The per-component costs
+below the table are measured in isolation, since a few microseconds per
+request are close to the run-to-run noise of the end-to-end numbers.
+
+    python -m benchmarks.bench_metrics [requests] [rounds]
+"""
+import asyncio
+import os
+import sys
+import time
+import timeit
+
+from benchmarks._common import use_scratch_database
+
+use_scratch_database()
+os.environ["CACHE_ENABLED"] = "false"
+
+import config  # noqa: E402
+from database import PractitionerDatabase, ProductDatabase, TracedProductDatabase  # noqa: E402
+from main import app  # noqa: E402
+from metrics import MetricsMiddleware  # noqa: E402
+
+ROUTES = ["/health", "/api/products/1", "/api/products?category=Teas", "/api/practitioners"]
+
+
+async def call(asgi_app, target: str):
+    path, _, query = target.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": [(b"host", b"bench")], "server": ("bench", 80), "client": ("bench", 1234), "root_path": "",
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"{target} returned {message['status']}")
+
+    await asyncio.wait_for(asgi_app(scope, receive, send), 10)
+
+
+async def rate(target: str, requests: int) -> float:
+    await call(app, target)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, target)
+    return requests / (time.perf_counter() - start)
+
+
+async def component_costs(calls: int):
+    """Microseconds per request added by the middleware and per traced database call"""
+    async def bare(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def send(message):
+        pass
+
+    timings = {}
+    for label, asgi_app in (("bare", bare), ("middleware", MetricsMiddleware(bare))):
+        start = time.perf_counter()
+        for _ in range(calls):
+            await asgi_app({"type": "http", "method": "GET"}, None, send)
+        timings[label] = (time.perf_counter() - start) / calls * 1e6
+
+    traced = timeit.timeit(lambda: TracedProductDatabase.get_product_by_id(1), number=calls) / calls * 1e6
+    raw = timeit.timeit(lambda: ProductDatabase.get_product_by_id(1), number=calls) / calls * 1e6
+    return timings["middleware"] - timings["bare"], traced - raw
+
+
+async def run(requests: int, rounds: int):
+    PractitionerDatabase.initialize_database()
+    ProductDatabase.initialize_database()
+
+    best = {}
+    for _ in range(rounds):
+        for enabled in (False, True):
+            config.METRICS_ENABLED = enabled
+            for route in ROUTES:
+                best[(route, enabled)] = max(best.get((route, enabled), 0), await rate(route, requests))
+
+    print(f"{'route':<30}{'metrics off':>13}{'metrics on':>13}{'overhead':>12}")
+    for route in ROUTES:
+        off, on = best[(route, False)], best[(route, True)]
+        print(f"{route:<30}{off:>11.0f}/s{on:>11.0f}/s{(1 / on - 1 / off) * 1e6:>9.1f} us")
+
+    config.METRICS_ENABLED = True
+    middleware, tracing = await component_costs(20_000)
+    print(f"\nmiddleware: {middleware:.1f} us per request; tracing: {tracing:.1f} us per database call")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    ))
@@ -0,0 +1,80 @@
+"""
+"Near me" latency over a generated national directory.
+
+"rtree" is PractitionerDatabase.find_nearby: an R*Tree bounding-box
+prefilter, then exact distances for the candidates only. "bbox scan" runs
+the same SQL against the plain latitude/longitude columns, so every row is
+visited, and "python scan" fetches every row's coordinates and computes
+haversine distances in Python, the approach the index replaces.
+
+    python -m benchmarks.bench_nearby [practitioners] [queries]
+"""
+import random
+import sys
+import time
+
+from benchmarks._common import METROS, top_up_practitioners, use_scratch_database
+
+use_scratch_database()
+
+from database import PractitionerDatabase, bounding_box, distance_km, pool  # noqa: E402
+
+SCAN_SQL = '''
+    SELECT id, distance_km(?, ?, latitude, longitude) AS distance, rating
+    FROM practitioners
+    WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ? AND distance <= ?
+    ORDER BY distance, rating DESC
+    LIMIT 20
+'''
+
+
+def rtree(lat, lng, radius, specialty):
+    return PractitionerDatabase.find_nearby(lat, lng, radius_km=radius, specialty=specialty)
+
+
+def bbox_scan(lat, lng, radius, specialty):
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+    with pool.read() as conn:
+        return conn.execute(SCAN_SQL, (lat, lng, min_lat, max_lat, min_lng, max_lng, radius)).fetchall()
+
+
+def python_scan(lat, lng, radius, specialty):
+    with pool.read() as conn:
+        rows = conn.execute("SELECT id, latitude, longitude, rating FROM practitioners").fetchall()
+    hits = [(distance_km(lat, lng, row[1], row[2]), -row[3], row[0]) for row in rows if row[1] is not None]
+    return sorted(hit for hit in hits if hit[0] <= radius)[:20]
+
+
+def timed(search, points, radius, specialty) -> float:
+    start = time.perf_counter()
+    for lat, lng in points:
+        search(lat, lng, radius, specialty)
+    return (time.perf_counter() - start) / len(points) * 1000
+
+
+def run(practitioners: int, queries: int):
+    PractitionerDatabase.initialize_database()
+    start = time.perf_counter()
+    top_up_practitioners(practitioners)
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+    print(f"{practitioners:,} practitioners ready in {time.perf_counter() - start:.1f}s\n")
+
+    rng = random.Random(7)
+    points = [(lat + rng.uniform(-0.2, 0.2), lng + rng.uniform(-0.2, 0.2)) for lat, lng in rng.choices(METROS, k=queries)]
+
+    print(f"{'radius km':>10}{'specialty':>12}{'matches':>10}{'rtree ms':>10}{'bbox scan ms':>14}{'python scan ms':>16}")
+    for radius in (5, 25, 100):
+        for specialty in (None, "Yoga"):
+            matches = sum(rtree(lat, lng, radius, specialty)[1] for lat, lng in points) / len(points)
+            indexed = timed(rtree, points, radius, specialty)
+            scanned = timed(bbox_scan, points[:3], radius, specialty) if specialty is None else float("nan")
+            python = timed(python_scan, points[:2], radius, specialty) if specialty is None and radius == 25 else float("nan")
+            print(f"{radius:>10}{specialty or '-':>12}{matches:>10,.0f}{indexed:>10.2f}{scanned:>14.1f}{python:>16.1f}")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+    )
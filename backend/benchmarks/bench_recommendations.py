@@ -0,0 +1,83 @@
+"""
+Related-product lookups from the precomputed lists vs computing them on demand.
+
+"build" is a full rebuild of every product's list, as after migration 10.
+"lookup" is ProductDatabase.get_related_products, one primary-key range
+read of product_neighbours. "on demand" scores one product against the whole
+catalog per request, with the vectors already in memory, which is the least
+an uncached endpoint would have to do. The incremental refresh rewords a few
+products, refreshes only the lists that made stale, and checks the result
+against a full rebuild.
+
+    python -m benchmarks.bench_recommendations [products] [reworded]
+"""
+import random
+import sys
+import time
+
+from benchmarks._common import HERBS, top_up_products, use_scratch_database
+
+use_scratch_database()
+
+from database import ProductDatabase, pool  # noqa: E402
+from recommendations import Neighbours, load_vectors, refresh  # noqa: E402
+import config  # noqa: E402
+
+
+def timed(call, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        call()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def stored_lists():
+    with pool.read() as conn:
+        rows = conn.execute("SELECT item_id, neighbour_id FROM product_neighbours ORDER BY item_id, rank").fetchall()
+    lists: dict = {}
+    for item_id, neighbour_id in rows:
+        lists.setdefault(item_id, []).append(neighbour_id)
+    return lists
+
+
+def run(products: int, reworded: int):
+    ProductDatabase.initialize_database()
+    top_up_products(products)
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+    rng = random.Random(3)
+
+    start = time.perf_counter()
+    refresh("products", full=True)
+    print(f"{products:,} products: full build in {time.perf_counter() - start:.1f}s")
+
+    ids = [rng.randint(1, products) for _ in range(200)]
+    lookup_ms = timed(lambda: [ProductDatabase.get_related_products(i) for i in ids], 1) / len(ids)
+    neighbours = Neighbours(load_vectors("products"), config.RECOMMENDATIONS_PER_ITEM)
+    sample = ids[:20]
+    on_demand_ms = timed(lambda: [list(neighbours.top(neighbours.vectors.ids.searchsorted([i]))) for i in sample], 1) / len(sample)
+    print(f"lookup {lookup_ms:.2f} ms, on demand {on_demand_ms:.1f} ms per product")
+
+    with pool.write() as conn:
+        for product_id in rng.sample(range(1, products + 1), reworded):
+            herb = rng.choice(HERBS)
+            conn.execute(
+                "UPDATE products SET name = ?, description = ? WHERE id = ?",
+                (f"{herb.title()} Elixir", f"Small-batch {herb} elixir with {rng.choice(HERBS)}", product_id),
+            )
+    start = time.perf_counter()
+    rewritten = refresh("products")
+    refresh_seconds = time.perf_counter() - start
+    incremental = stored_lists()
+    refresh("products", full=True)
+    rebuilt = stored_lists()
+    same = sum(incremental.get(item_id) == neighbour_ids for item_id, neighbour_ids in rebuilt.items())
+    print(f"{reworded} products reworded: {rewritten:,} lists refreshed in {refresh_seconds:.2f}s, "
+          f"{same / len(rebuilt):.2%} identical to a full rebuild")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    )
@@ -0,0 +1,58 @@
+"""
+Product search on a generated catalog: the old LIKE full scan versus the
+FTS5 index used by ProductDatabase.search_products. Both sides collect every
+match, as the /search endpoints do to report a total.
+
+    python -m benchmarks.bench_search [products] [repeats]
+"""
+import sys
+import time
+
+from benchmarks._common import top_up_products, use_scratch_database
+
+use_scratch_database()
+
+from database import PractitionerDatabase, ProductDatabase, fts_match_expression, pool  # noqa: E402
+
+QUERIES = ["turmeric", "ashwa", "ginger tea", "moringa balm sleep", "12345", "nonexistent"]
+
+LIKE_SQL = '''
+    SELECT id, name, description, price, original_price, rating, reviews, image, category, in_stock
+    FROM products
+    WHERE name LIKE ? OR description LIKE ?
+'''
+
+FTS_SQL = '''
+    SELECT p.id, p.name, p.description, p.price, p.original_price, p.rating, p.reviews, p.image, p.category, p.in_stock
+    FROM products p JOIN products_fts ON products_fts.rowid = p.id
+    WHERE products_fts MATCH ?
+    ORDER BY bm25(products_fts, 10.0, 1.0, 2.0)
+'''
+
+
+def time_query(sql: str, params, repeats: int) -> float:
+    with pool.read() as conn:
+        conn.execute(sql, params).fetchall()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def run(products: int, repeats: int):
+    PractitionerDatabase.initialize_database()
+    ProductDatabase.initialize_database()
+    top_up_products(products)
+
+    print(f"{'query':<22}{'LIKE ms':>10}{'FTS5 ms':>10}{'speedup':>10}")
+    for query in QUERIES:
+        like_ms = time_query(LIKE_SQL, (f"%{query}%", f"%{query}%"), repeats)
+        fts_ms = time_query(FTS_SQL, (fts_match_expression(query),), repeats)
+        print(f"{query:<22}{like_ms:>10.2f}{fts_ms:>10.2f}{like_ms / fts_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
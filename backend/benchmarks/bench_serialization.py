@@ -0,0 +1,77 @@
+"""
+Rows/sec from SQLite cursor to JSON response bytes for a product listing.
+
+"per-row" is the original path: one validated Product(...) per row, then
+FastAPI's response_model revalidation and jsonable_encoder + json.dumps.
+"batch" is the path the API uses now: rows become dicts, one TypeAdapter
+validation builds the whole page and pydantic-core serializes it.
+
+    python -m benchmarks.bench_serialization [products] [repeats]
+"""
+import json
+import sys
+import time
+
+from benchmarks._common import top_up_products, use_scratch_database
+
+use_scratch_database()
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from database import PRODUCT_COLUMNS, ProductDatabase, _products_from_rows, pool  # noqa: E402
+from http_cache import _json  # noqa: E402
+from models import Product, ProductResponse  # noqa: E402
+
+
+def fetch_rows():
+    with pool.read() as conn:
+        return conn.execute(f"SELECT {PRODUCT_COLUMNS} FROM products p").fetchall()
+
+
+def per_row() -> bytes:
+    rows = fetch_rows()
+    products = [
+        Product(
+            id=row[0],
+            name=row[1],
+            description=row[2],
+            price=row[3],
+            originalPrice=row[4],
+            rating=row[5],
+            reviews=row[6],
+            image=row[7],
+            category=row[8],
+            inStock=bool(row[9])
+        )
+        for row in rows
+    ]
+    response = ProductResponse(products=products, total=len(products))
+    validated = ProductResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def batch() -> bytes:
+    products = _products_from_rows(fetch_rows())
+    return _json.dump_json(ProductResponse(products=products, total=len(products)))
+
+
+def run(products: int, repeats: int):
+    ProductDatabase.initialize_database()
+    top_up_products(products)
+    row_count = len(fetch_rows())
+
+    print(f"{'path':<10}{'rows/s':>14}{'MB/s':>10}")
+    for label, path in (("per-row", per_row), ("batch", batch)):
+        path()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            body = path()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<10}{row_count * repeats / elapsed:>14,.0f}{len(body) * repeats / elapsed / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
@@ -0,0 +1,84 @@
+"""
+A burst of identical catalog requests right after a write, with and without
+single-flight coalescing.
+
+Every round first touches a product and a practitioner, so the table versions
+move on and every request in the burst misses the data and response caches,
+as when a push notification lands just after a catalog update. The same burst
+then hits /api/products?limit=20 and /api/practitioners?limit=10 at once.
+"builds" is how many times the page was queried and serialized.
+
+    python -m benchmarks.bench_singleflight [burst] [rounds] [products] [practitioners]
+"""
+import asyncio
+import sys
+import time
+
+from benchmarks._common import make_client, percentile, top_up_practitioners, top_up_products, use_scratch_database
+
+use_scratch_database()
+
+from database import PractitionerDatabase, ProductDatabase, pool  # noqa: E402
+from http_cache import flights, response_stats  # noqa: E402
+from main import app  # noqa: E402
+
+PATHS = ("/api/products?limit=20", "/api/practitioners?limit=10")
+
+
+def touch(round_number: int):
+    with pool.write() as conn:
+        conn.execute("UPDATE products SET reviews = reviews + 1 WHERE id = ?", (round_number + 1,))
+        conn.execute("UPDATE practitioners SET rating = rating WHERE id = ?", (round_number + 1,))
+
+
+async def bursts(client, burst: int, rounds: int):
+    """Latencies (s), wall time per round (s) and builds per round"""
+    latencies, walls = [], []
+    misses = response_stats.body_misses
+
+    async def get(path: str):
+        start = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+    for round_number in range(rounds):
+        touch(round_number)
+        start = time.perf_counter()
+        await asyncio.gather(*(get(path) for _ in range(burst) for path in PATHS))
+        walls.append(time.perf_counter() - start)
+    return latencies, sum(walls) / rounds, (response_stats.body_misses - misses) / rounds
+
+
+async def main(burst: int, rounds: int):
+    async with make_client(app) as client:
+        for path in PATHS:
+            await client.get(path)  # warm up imports and connections
+        print(f"{'mode':<12}{'round ms':>10}{'p50 ms':>9}{'p99 ms':>9}{'builds':>8}")
+        for enabled in (False, True):
+            flights.enabled = enabled
+            latencies, wall, builds = await bursts(client, burst, rounds)
+            print(f"{'coalesced' if enabled else 'separate':<12}{wall * 1000:>10.1f}"
+                  f"{percentile(latencies, 50) * 1000:>9.1f}{percentile(latencies, 99) * 1000:>9.1f}{builds:>8.0f}")
+        print(f"\n{flights.stats()}")
+
+
+def run(burst: int, rounds: int, products: int, practitioners: int):
+    PractitionerDatabase.initialize_database()
+    ProductDatabase.initialize_database()
+    top_up_products(products)
+    top_up_practitioners(practitioners)
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+    print(f"{products:,} products, {practitioners:,} practitioners, "
+          f"{burst} concurrent requests per path per round\n")
+    asyncio.run(main(burst, rounds))
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 50_000,
+        int(sys.argv[4]) if len(sys.argv) > 4 else 10_000,
+    )
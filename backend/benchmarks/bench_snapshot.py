@@ -0,0 +1,89 @@
+"""
+Catalog reads from the in-memory read snapshot vs the database file.
+
+Each database call runs on the pooled connections to the file (kept hot by
+the page cache and mmap) and then on a snapshot loaded with the backup API,
+as with SNAPSHOT_ENABLED. The catalog cache is bypassed. The rebuild that
+follows a write is timed, along with the slowest read served while it runs.
+
+    python -m benchmarks.bench_snapshot [products] [practitioners]
+"""
+import random
+import sys
+import threading
+import time
+
+from benchmarks._common import percentile, top_up_practitioners, top_up_products, top_up_slots, use_scratch_database
+
+use_scratch_database()
+
+from database import PractitionerDatabase, ProductDatabase, pool  # noqa: E402
+
+CALLS = {
+    "product by id": lambda rng: ProductDatabase.get_product_by_id(rng.randint(1, 1000)),
+    "products by category": lambda rng: ProductDatabase.search_products(category="Teas", sort="rating", limit=20),
+    "product search": lambda rng: ProductDatabase.search_products(query=rng.choice(["turmeric", "tea", "neem"]), limit=20),
+    "product facets": lambda rng: ProductDatabase.get_facets(("category", "price", "in_stock"), category="Oils"),
+    "nearby": lambda rng: PractitionerDatabase.find_nearby(40.71, -74.01, radius_km=25, limit=20),
+}
+
+
+def timed(call, repeats: int) -> float:
+    rng = random.Random(1)
+    call(rng)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        call(rng)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def reads_during_rebuild(rebuilds: int) -> float:
+    """Slowest product lookup (ms) while the snapshot is rebuilt ``rebuilds`` times"""
+    latencies, done = [], threading.Event()
+    rng = random.Random(2)
+
+    def reader():
+        while not done.is_set():
+            start = time.perf_counter()
+            ProductDatabase.get_product_by_id(rng.randint(1, 1000))
+            latencies.append(time.perf_counter() - start)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for i in range(rebuilds):
+        with pool.write() as conn:
+            conn.execute("UPDATE products SET reviews = reviews + 1 WHERE id = ?", (i + 1,))
+        pool.refresh_snapshot()
+    done.set()
+    thread.join()
+    return percentile(latencies, 100) * 1000
+
+
+def run(products: int, practitioners: int):
+    PractitionerDatabase.initialize_database()
+    ProductDatabase.initialize_database()
+    top_up_products(products)
+    top_up_practitioners(practitioners)
+    top_up_slots(days=3)
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+        size_mb = conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0] / 1e6
+
+    file_ms = {name: timed(call, 50) for name, call in CALLS.items()}
+    pool.refresh_snapshot()
+    print(f"{products:,} products, {practitioners:,} practitioners: {size_mb:.0f} MB copied into memory "
+          f"in {pool.snapshot_stats()['build_seconds'] * 1000:.0f} ms\n")
+    print(f"{'call':<24}{'file ms':>9}{'snapshot ms':>13}")
+    for name, call in CALLS.items():
+        print(f"{name:<24}{file_ms[name]:>9.3f}{timed(call, 50):>13.3f}")
+
+    slowest = reads_during_rebuild(5)
+    print(f"\nrebuild after a write: {pool.snapshot_stats()['build_seconds'] * 1000:.0f} ms; "
+          f"slowest read meanwhile {slowest:.2f} ms")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20_000,
+    )
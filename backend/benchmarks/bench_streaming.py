@@ -0,0 +1,109 @@
+"""
+Peak RSS and time to first byte for a full product listing, JSON vs NDJSON.
+
+Each measurement runs in a fresh interpreter so ru_maxrss reflects that one
+request. "json" builds and encodes the whole listing as one ProductResponse,
+as a JSON endpoint would before sending anything; JSON pages are capped at
+MAX_PAGE_SIZE, so it runs in-process rather than through the API. "ndjson"
+streams fetchmany batches, so its peak should stay flat as the catalog
+grows. The response cache is disabled in the children so cached
+bodies do not count against either mode, and so is mmap: mapped database
+pages are file-backed and reclaimable but still show up in RSS, which would
+hide the heap difference behind the size of the file.
+
+    python -m benchmarks.bench_streaming [sizes...]
+"""
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks._common import top_up_products, use_scratch_database
+
+use_scratch_database()
+
+
+async def fetch(app, query: str):
+    """Drive the ASGI app directly; httpx's ASGITransport would buffer the whole body"""
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/products", "raw_path": b"/api/products",
+        "query_string": query.encode(), "headers": [(b"host", b"bench")],
+        "server": ("bench", 80), "client": ("bench", 1234), "root_path": "",
+    }
+
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # StreamingResponse listens for a disconnect that never comes
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal first_byte, size
+        if message["type"] == "http.response.body" and message.get("body"):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(message["body"])
+
+    await app(scope, receive, send)
+    return first_byte, time.perf_counter() - start, size
+
+
+def whole_body():
+    """The full listing built and encoded as a single JSON body"""
+    from database import ProductDatabase
+    from http_cache import _json
+    from models import ProductResponse
+
+    start = time.perf_counter()
+    products = ProductDatabase.search_products(limit=None).items
+    body = _json.dump_json(ProductResponse(products=products, total=len(products)))
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, len(body)
+
+
+def child(mode: str):
+    from main import app
+
+    asyncio.run(fetch(app, "format=ndjson&limit=1"))  # warm up imports and connections
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    first_byte, total, size = whole_body() if mode == "json" else asyncio.run(fetch(app, "format=ndjson"))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{first_byte} {total} {size} {(peak - baseline) / 1024}")
+
+
+def measure(mode: str):
+    env = {**os.environ, "CACHE_ENABLED": "false", "DB_MMAP_SIZE": "0"}
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_streaming", "--child", mode],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return [float(value) for value in output.split()]
+
+
+def run(sizes):
+    from database import ProductDatabase
+
+    ProductDatabase.initialize_database()
+    print(f"{'rows':>10}{'mode':>8}{'first byte ms':>15}{'total ms':>10}{'MB sent':>9}{'peak RSS +MB':>14}")
+    for size in sizes:
+        top_up_products(size)
+        for mode in ("json", "ndjson"):
+            first_byte, total, sent, rss = measure(mode)
+            print(f"{size:>10,}{mode:>8}{first_byte * 1000:>15.1f}{total * 1000:>10.1f}{sent / 1e6:>9.1f}{rss:>14.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        run([int(arg) for arg in sys.argv[1:]] or [10_000, 50_000, 100_000])
@@ -0,0 +1,160 @@
+"""
+EXPLAIN QUERY PLAN regression check for the queries behind each endpoint.
+
+Every case calls a database method the way its route does, captures the SQL
+it runs and checks the plan for the expected index and against full scans
+or temporary sort b-trees. Exits non-zero if any plan regresses.
+
+    python -m benchmarks.check_query_plans
+"""
+import sys
+from typing import Callable, List, NamedTuple
+
+from benchmarks._common import top_up_practitioners, top_up_products, top_up_slots, use_scratch_database
+
+use_scratch_database()
+
+from database import AnalyticsDatabase, BookingDatabase, PractitionerDatabase, ProductDatabase, pool  # noqa: E402
+
+
+class PlanCase(NamedTuple):
+    label: str
+    call: Callable[[], object]
+    expected: List[str]
+    forbidden: List[str]
+
+
+FULL_SCAN = ["SCAN p\n", "TEMP B-TREE"]
+
+CASES = [
+    PlanCase("GET /api/products", lambda: ProductDatabase.search_products(limit=20),
+             ["SCAN p"], ["TEMP B-TREE"]),
+    PlanCase("GET /api/products?sort=rating", lambda: ProductDatabase.search_products(sort="rating", limit=20),
+             ["idx_products_rating"], FULL_SCAN),
+    PlanCase("GET /api/products?sort=price", lambda: ProductDatabase.search_products(sort="price", limit=20),
+             ["idx_products_price"], FULL_SCAN),
+    PlanCase("GET /api/products?sort=reviews", lambda: ProductDatabase.search_products(sort="reviews", limit=20),
+             ["idx_products_reviews"], FULL_SCAN),
+    # Category pages walk the sort order and stop at the limit, checking each
+    # row against the category names that contain the filter
+    PlanCase("GET /api/products?category=", lambda: ProductDatabase.search_products(category="Teas", limit=20),
+             ["SCAN product_facets"], ["TEMP B-TREE"]),
+    PlanCase("GET /api/products?category=&sort=rating",
+             lambda: ProductDatabase.search_products(category="Teas", sort="rating", limit=20),
+             ["idx_products_rating", "SCAN product_facets"], FULL_SCAN),
+    PlanCase("GET /api/products?category=&in_stock_only=true&sort=rating",
+             lambda: ProductDatabase.search_products(category="Teas", in_stock_only=True, sort="rating", limit=20),
+             ["USING INDEX idx_products_", "SCAN product_facets"], FULL_SCAN),
+    PlanCase("GET /api/products?in_stock_only=true&sort=rating",
+             lambda: ProductDatabase.search_products(in_stock_only=True, sort="rating", limit=20),
+             ["idx_products_in_stock_rating"], FULL_SCAN),
+    PlanCase("GET /api/products?category=&sort=price",
+             lambda: ProductDatabase.search_products(category="Teas", sort="price", limit=20),
+             ["idx_products_price", "SCAN product_facets"], FULL_SCAN),
+    PlanCase("GET /api/products total", lambda: ProductDatabase.count_products(category="Teas"),
+             ["idx_products_category"], FULL_SCAN),
+    PlanCase("GET /api/products/search", lambda: ProductDatabase.search_products(query="tea", limit=20),
+             ["products_fts VIRTUAL TABLE", "SEARCH p USING INTEGER PRIMARY KEY"], ["SCAN p\n"]),
+    PlanCase("GET /api/products/search?fuzzy=true",
+             lambda: ProductDatabase.search_products(query="tumeric powdr", fuzzy=True, limit=20),
+             ["products_fts VIRTUAL TABLE", "SEARCH p USING INTEGER PRIMARY KEY"], ["SCAN p\n"]),
+    PlanCase("GET /api/practitioners/search?fuzzy=true",
+             lambda: PractitionerDatabase.search_practitioners(query="panchakrma", fuzzy=True, limit=10),
+             ["practitioners_fts VIRTUAL TABLE", "SEARCH p USING INTEGER PRIMARY KEY"], ["SCAN p\n"]),
+    PlanCase("GET /api/products/{id}", lambda: ProductDatabase.get_product_by_id(1),
+             ["SEARCH products USING INTEGER PRIMARY KEY"], []),
+    PlanCase("GET /api/products/{id}/related", lambda: ProductDatabase.get_related_products(1),
+             ["SEARCH n USING PRIMARY KEY (item_id=?)", "SEARCH p USING INTEGER PRIMARY KEY"], FULL_SCAN),
+    PlanCase("GET /api/products?ids=", lambda: ProductDatabase.get_products_by_ids((3, 1, 2)),
+             ["SEARCH p USING INTEGER PRIMARY KEY (rowid=?)"], ["SCAN p\n"]),
+    PlanCase("GET /api/categories", ProductDatabase.get_categories,
+             ["SCAN product_facets"], ["SCAN p\n", "TEMP B-TREE"]),
+    PlanCase("GET /api/products?facets=", lambda: ProductDatabase.get_facets(("category", "price"), category="Teas"),
+             ["SCAN product_facets"], ["SCAN p\n"]),
+    PlanCase("GET /api/products/search?facets=",
+             lambda: ProductDatabase.get_facets(("category", "price"), query="tea"),
+             ["products_fts VIRTUAL TABLE", "SEARCH p USING INTEGER PRIMARY KEY"], ["SCAN p\n"]),
+    PlanCase("GET /api/practitioners?sort=rating",
+             lambda: PractitionerDatabase.search_practitioners(sort="rating", limit=10),
+             ["idx_practitioners_rating"], FULL_SCAN),
+    PlanCase("GET /api/practitioners?specialty=",
+             lambda: PractitionerDatabase.search_practitioners(specialty="Yoga", limit=10),
+             ["SEARCH practitioner_filter_values USING PRIMARY KEY (field=?)"], ["TEMP B-TREE"]),
+    PlanCase("GET /api/practitioners?location=",
+             lambda: PractitionerDatabase.search_practitioners(location="Downtown", limit=10),
+             ["SEARCH practitioner_filter_values USING PRIMARY KEY (field=?)"], ["TEMP B-TREE"]),
+    PlanCase("GET /api/practitioners total", lambda: PractitionerDatabase.count_practitioners(specialty="Yoga"),
+             ["idx_practitioners_specialty", "practitioner_filter_values"], FULL_SCAN),
+    PlanCase("GET /api/practitioners/search", lambda: PractitionerDatabase.search_practitioners(query="yoga", limit=10),
+             ["practitioners_fts VIRTUAL TABLE", "SEARCH p USING INTEGER PRIMARY KEY"], ["SCAN p\n"]),
+    PlanCase("GET /api/practitioners/{id}", lambda: PractitionerDatabase.get_practitioner_by_id(1),
+             ["SEARCH practitioners USING INTEGER PRIMARY KEY", "idx_slots_practitioner_open"], ["SCAN s\n"]),
+    PlanCase("GET /api/availability", BookingDatabase.find_open_slots,
+             ["idx_slots_open"], ["SCAN s\n", "TEMP B-TREE"]),
+    PlanCase("GET /api/availability?specialty=", lambda: BookingDatabase.find_open_slots(specialty="Yoga"),
+             ["idx_slots_open"], ["SCAN s\n"]),
+    PlanCase("GET /api/availability?practitioner_id=", lambda: BookingDatabase.find_open_slots(practitioner_id=3),
+             ["idx_slots_practitioner_open"], ["SCAN s\n", "TEMP B-TREE"]),
+    PlanCase("GET /api/practitioners/{id}/similar", lambda: PractitionerDatabase.get_similar_practitioners(1),
+             ["SEARCH n USING PRIMARY KEY (item_id=?)", "SEARCH p USING INTEGER PRIMARY KEY"], FULL_SCAN),
+    PlanCase("GET /api/practitioners?ids=", lambda: PractitionerDatabase.get_practitioners_by_ids((3, 1, 2)),
+             ["SEARCH p USING INTEGER PRIMARY KEY (rowid=?)"], ["SCAN p\n"]),
+    PlanCase("GET /api/practitioners/nearby",
+             lambda: PractitionerDatabase.find_nearby(37.77, -122.42, radius_km=25),
+             ["SCAN g VIRTUAL TABLE", "SEARCH p USING INTEGER PRIMARY KEY"], ["SCAN p\n"]),
+    PlanCase("GET /api/practitioners/nearby?specialty=",
+             lambda: PractitionerDatabase.find_nearby(37.77, -122.42, radius_km=25, specialty="Yoga"),
+             ["SCAN g VIRTUAL TABLE", "SEARCH p USING INTEGER PRIMARY KEY"], ["idx_practitioners_specialty"]),
+    PlanCase("GET /api/analytics/bookings?by=specialty",
+             lambda: AnalyticsDatabase.get_booking_series("day", 30, "specialty"),
+             ["SEARCH booking_rollups USING PRIMARY KEY (grain=? AND dimension=? AND period>? AND period<?)"], ["SCAN"]),
+    PlanCase("GET /api/analytics/practitioners/top", AnalyticsDatabase.get_top_practitioners,
+             ["SEARCH r USING PRIMARY KEY (grain=? AND dimension=? AND period=?)",
+              "SEARCH p USING INTEGER PRIMARY KEY"], ["SCAN p\n"]),
+    PlanCase("GET /api/analytics/categories", AnalyticsDatabase.get_category_series,
+             ["SEARCH category_rollups USING PRIMARY KEY (grain=? AND period>? AND period<?)"], ["SCAN category_rollups"]),
+]
+
+
+def explain(conn, sql: str) -> str:
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return "".join(f"{row[3]}\n" for row in rows)
+
+
+def check() -> int:
+    PractitionerDatabase.initialize_database()
+    ProductDatabase.initialize_database()
+    top_up_products(20_000)
+    top_up_practitioners(5_000)
+    top_up_slots()
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+
+    failures = 0
+    with pool.read() as conn:
+        for case in CASES:
+            statements: List[str] = []
+            conn.set_trace_callback(statements.append)
+            try:
+                case.call()
+            finally:
+                conn.set_trace_callback(None)
+
+            plans = [explain(conn, sql) for sql in statements if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+            plan = "".join(plans)
+            missing = [fragment for fragment in case.expected if fragment not in plan]
+            present = [fragment for fragment in case.forbidden if fragment in plan]
+            status = "ok" if not (missing or present) else "FAIL"
+            print(f"{status:<5}{case.label}")
+            if missing or present:
+                failures += 1
+                for fragment in missing:
+                    print(f"      missing {fragment.strip()!r}")
+                for fragment in present:
+                    print(f"      unexpected {fragment.strip()!r}")
+                print("      " + plan.replace("\n", "\n      ").rstrip())
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if check() else 0)
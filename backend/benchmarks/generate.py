@@ -0,0 +1,85 @@
+"""
+Generate a synthetic catalog at a chosen scale.
+
+Products, practitioners (with coordinates around US metros) and two weeks
+of appointment slots are generated from a fixed seed, so the same scale
+always yields the same data, and the recommendation lists of new rows are
+built. Existing rows are kept and topped up, which makes re-running cheap.
+
+    python -m benchmarks.generate --scale medium --database /tmp/catalog.db
+    python -m benchmarks.generate --products 250000 --practitioners 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+SCALES = {
+    "small": (10_000, 2_000),
+    "medium": (100_000, 20_000),
+    "large": (1_000_000, 200_000),
+}
+
+
+def generate(products: int, practitioners: int, slot_days: int = 14) -> dict:
+    """Top the current database up to the given sizes; returns row counts and timings"""
+    from benchmarks._common import top_up_practitioners, top_up_products, top_up_slots
+    from database import PractitionerDatabase, ProductDatabase, pool
+    from recommendations import NEIGHBOUR_TABLES, refresh
+
+    timings = {}
+    start = time.perf_counter()
+    PractitionerDatabase.initialize_database()
+    ProductDatabase.initialize_database()
+    for name, step in (
+        ("products", lambda: top_up_products(products)),
+        ("practitioners", lambda: top_up_practitioners(practitioners)),
+        ("slots", lambda: top_up_slots(days=slot_days)),
+        ("recommendations", lambda: [refresh(kind) for kind in NEIGHBOUR_TABLES]),
+    ):
+        step_start = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - step_start
+    with pool.write() as conn:
+        conn.execute("ANALYZE")
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("products", "practitioners", "slots")
+        }
+    timings["total"] = time.perf_counter() - start
+    return {"counts": counts, "seconds": timings}
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Preset catalog size")
+    parser.add_argument("--products", type=int, help="Products to generate (overrides --scale)")
+    parser.add_argument("--practitioners", type=int, help="Practitioners to generate (overrides --scale)")
+    parser.add_argument("--slot-days", type=int, default=14, help="Days of hourly slots per practitioner")
+    parser.add_argument("--database", help="SQLite file to fill (default: a scratch file)")
+
+
+def sizes(args: argparse.Namespace):
+    products, practitioners = SCALES[args.scale]
+    return args.products or products, args.practitioners or practitioners
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.database:
+        os.environ["DATABASE_PATH"] = os.path.abspath(args.database)
+    from benchmarks._common import use_scratch_database
+
+    path = use_scratch_database()
+    products, practitioners = sizes(args)
+    report = generate(products, practitioners, args.slot_days)
+    counts, seconds = report["counts"], report["seconds"]
+    print(f"{path}: {counts['products']:,} products, {counts['practitioners']:,} practitioners, "
+          f"{counts['slots']:,} slots in {seconds['total']:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
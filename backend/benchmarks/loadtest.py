@@ -0,0 +1,364 @@
+"""
+In-process load test across every API route.
+
+A synthetic catalog is generated at the chosen scale (or an existing database
+is reused), then each scenario below is driven through the ASGI app by an
+async load generator: ``--concurrency`` clients share ``--requests`` calls
+per scenario, with no sockets or network involved, so runs are repeatable on
+a single machine. Throughput and p50/p95/p99 latency are printed and can be
+saved as JSON; ``--baseline`` compares the run with a saved result and exits
+non-zero when a scenario regressed.
+
+    python -m benchmarks.loadtest run --scale small --output baseline.json
+    python -m benchmarks.loadtest run --database /tmp/catalog.db --baseline baseline.json
+    python -m benchmarks.loadtest compare baseline.json results.json
+
+Every route declared in main.py needs a scenario; a run stops before it
+starts if one is missing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import secrets
+import sqlite3
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from benchmarks._common import CATEGORIES, HERBS, METROS, SPECIALTIES, concurrent_latencies, make_client, percentile
+from benchmarks.generate import add_arguments, generate, sizes
+
+# Path and keyword arguments for httpx's client.request
+Request = Tuple[str, Dict[str, Any]]
+
+
+class Context:
+    """IDs and state the scenarios draw requests from"""
+
+    def __init__(self, products: int, practitioners: int, open_slots: List[int], import_body: bytes, admin_token: str):
+        self.products = products
+        self.practitioners = practitioners
+        self.open_slots = open_slots
+        self.bookings: List[int] = []
+        self.import_body = import_body
+        self.admin_token = admin_token
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    route: str
+    build: Callable[[Context, random.Random], Request]
+    # Fraction of --requests, so slow scenarios such as a full export do not dominate the run
+    share: float = 1.0
+    expected: Set[int] = {200}
+    # Writes consume state, so they are not warmed up
+    warm_up: bool = True
+
+
+def _get(path: str, **params) -> Request:
+    return path, {"params": {key: value for key, value in params.items() if value is not None}}
+
+
+def _book(ctx: Context, rng: random.Random) -> Request:
+    return "/api/bookings", {"json": {"slotId": ctx.open_slots.pop(), "patientName": "Load Test"}}
+
+
+def _cancel(ctx: Context, rng: random.Random) -> Request:
+    return f"/api/bookings/{ctx.bookings.pop()}", {}
+
+
+def _batch(ctx: Context, rng: random.Random) -> Request:
+    paths = [f"/api/products/{rng.randint(1, ctx.products)}" for _ in range(3)]
+    paths += ["/api/categories", f"/api/practitioners/{rng.randint(1, ctx.practitioners)}"]
+    return "/api/batch", {"json": {"requests": [{"id": str(index), "path": path} for index, path in enumerate(paths)]}}
+
+
+def _import(ctx: Context, rng: random.Random) -> Request:
+    return "/api/admin/import/products", {
+        "params": {"format": "ndjson"},
+        "content": ctx.import_body,
+        "headers": {"X-Admin-Token": ctx.admin_token},
+    }
+
+
+def _misspell(word: str, rng: random.Random) -> str:
+    """Drop one letter after the first, so fuzzy search has to correct it"""
+    position = rng.randrange(1, len(word))
+    return word[:position] + word[position + 1:]
+
+
+def _nearby(ctx: Context, rng: random.Random) -> Request:
+    lat, lng = rng.choice(METROS)
+    return _get("/api/practitioners/nearby", lat=lat + rng.uniform(-0.2, 0.2), lng=lng + rng.uniform(-0.2, 0.2),
+                radius=rng.choice([5, 25]), specialty=rng.choice([None, "Yoga"]))
+
+
+SCENARIOS = [
+    Scenario("root", "GET", "/", lambda ctx, rng: _get("/")),
+    Scenario("health", "GET", "/health", lambda ctx, rng: _get("/health")),
+    Scenario("metrics", "GET", "/metrics", lambda ctx, rng: _get("/metrics"), share=0.2),
+    Scenario("cache stats", "GET", "/api/cache/stats", lambda ctx, rng: _get("/api/cache/stats"), share=0.2),
+    Scenario("practitioners", "GET", "/api/practitioners",
+             lambda ctx, rng: _get("/api/practitioners", sort="rating", specialty=rng.choice([None] + SPECIALTIES))),
+    Scenario("practitioners by ids", "GET", "/api/practitioners",
+             lambda ctx, rng: _get("/api/practitioners", ids=",".join(
+                 str(rng.randint(1, ctx.practitioners)) for _ in range(10)))),
+    Scenario("practitioner search", "GET", "/api/practitioners/search",
+             lambda ctx, rng: _get("/api/practitioners/search", q=rng.choice(SPECIALTIES).split()[0])),
+    Scenario("nearby", "GET", "/api/practitioners/nearby", _nearby),
+    Scenario("practitioner", "GET", "/api/practitioners/{practitioner_id}",
+             lambda ctx, rng: _get(f"/api/practitioners/{rng.randint(1, ctx.practitioners)}")),
+    Scenario("similar practitioners", "GET", "/api/practitioners/{practitioner_id}/similar",
+             lambda ctx, rng: _get(f"/api/practitioners/{rng.randint(1, ctx.practitioners)}/similar")),
+    Scenario("products", "GET", "/api/products",
+             lambda ctx, rng: _get("/api/products", category=rng.choice(CATEGORIES), sort="rating")),
+    Scenario("products faceted", "GET", "/api/products",
+             lambda ctx, rng: _get("/api/products", category=rng.choice([None] + CATEGORIES),
+                                   facets="category,price,in_stock")),
+    Scenario("product search", "GET", "/api/products/search",
+             lambda ctx, rng: _get("/api/products/search", q=rng.choice(HERBS))),
+    Scenario("product search typo", "GET", "/api/products/search",
+             lambda ctx, rng: _get("/api/products/search", q=_misspell(rng.choice(HERBS), rng))),
+    Scenario("product", "GET", "/api/products/{product_id}",
+             lambda ctx, rng: _get(f"/api/products/{rng.randint(1, ctx.products)}")),
+    Scenario("related products", "GET", "/api/products/{product_id}/related",
+             lambda ctx, rng: _get(f"/api/products/{rng.randint(1, ctx.products)}/related")),
+    Scenario("categories", "GET", "/api/categories", lambda ctx, rng: _get("/api/categories")),
+    Scenario("availability", "GET", "/api/availability",
+             lambda ctx, rng: _get("/api/availability", specialty=rng.choice([None] + SPECIALTIES))),
+    Scenario("book", "POST", "/api/bookings", _book, expected={201}, warm_up=False),
+    Scenario("cancel", "DELETE", "/api/bookings/{booking_id}", _cancel, expected={204}, warm_up=False),
+    Scenario("booking analytics", "GET", "/api/analytics/bookings",
+             lambda ctx, rng: _get("/api/analytics/bookings", grain=rng.choice(["day", "week"]),
+                                   by=rng.choice(["all", "specialty"]))),
+    Scenario("top practitioners", "GET", "/api/analytics/practitioners/top",
+             lambda ctx, rng: _get("/api/analytics/practitioners/top")),
+    Scenario("category analytics", "GET", "/api/analytics/categories",
+             lambda ctx, rng: _get("/api/analytics/categories", grain=rng.choice(["day", "week"]))),
+    Scenario("batch", "POST", "/api/batch", _batch),
+    Scenario("admin import", "POST", "/api/admin/import/{table}", _import, share=0.05),
+    Scenario("admin export", "GET", "/api/admin/export/{table}",
+             lambda ctx, rng: ("/api/admin/export/products",
+                               {"params": {"format": "csv"}, "headers": {"X-Admin-Token": ctx.admin_token}}),
+             share=0.01),
+    Scenario("admin schedule", "POST", "/api/admin/schedule",
+             lambda ctx, rng: ("/api/admin/schedule", {"headers": {"X-Admin-Token": ctx.admin_token}}), share=0.01),
+]
+
+
+def missing_scenarios(app) -> List[str]:
+    """Routes declared on ``app`` that no scenario exercises"""
+    from fastapi.routing import APIRoute
+
+    covered = {(scenario.method, scenario.route) for scenario in SCENARIOS}
+    return [
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in sorted(route.methods) if (method, route.path) not in covered
+    ]
+
+
+def load_context(requests: int) -> Context:
+    from database import ProductDatabase, pool
+
+    with pool.read() as conn:
+        products = conn.execute("SELECT MAX(id) FROM products").fetchone()[0] or 1
+        practitioners = conn.execute("SELECT MAX(id) FROM practitioners").fetchone()[0] or 1
+        # The latest slots are furthest from "now", so none start during the run
+        open_slots = [row[0] for row in conn.execute(
+            "SELECT id FROM slots WHERE booked = 0 ORDER BY starts_at DESC, id LIMIT ?", (requests,)
+        )]
+    # Imports re-upsert existing products unchanged, so the catalog stays the same across runs
+    existing = ProductDatabase.search_products(limit=200).items
+    import_body = b"".join(product.model_dump_json().encode() + b"\n" for product in existing)
+    return Context(products, practitioners, open_slots, import_body, os.environ["ADMIN_TOKEN"])
+
+
+async def drive(client, scenario: Scenario, ctx: Context, requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    """Run one scenario and summarize its latencies"""
+    rng = random.Random(seed)
+    errors = 0
+
+    async def call():
+        nonlocal errors
+        path, kwargs = scenario.build(ctx, rng)
+        response = await client.request(scenario.method, path, **kwargs)
+        if response.status_code not in scenario.expected:
+            errors += 1
+        elif scenario.name == "book":
+            ctx.bookings.append(response.json()["id"])
+
+    if scenario.warm_up:
+        await call()
+        errors = 0
+    start = time.perf_counter()
+    latencies = await concurrent_latencies(call, concurrency, requests)
+    elapsed = time.perf_counter() - start
+    return {
+        "method": scenario.method,
+        "route": scenario.route,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenarios(requests: int, concurrency: int, only: Optional[List[str]], seed: int) -> Dict[str, Any]:
+    from main import app
+
+    missing = missing_scenarios(app)
+    if missing:
+        raise SystemExit(f"No load test scenario for: {', '.join(missing)}")
+
+    ctx = load_context(requests)
+    results = {}
+    # Startup and shutdown events do not run under ASGITransport
+    async with make_client(app) as client:
+        for index, scenario in enumerate(SCENARIOS):
+            if only and scenario.name not in only:
+                continue
+            count = max(1, int(requests * scenario.share))
+            if scenario.name == "cancel":
+                count = len(ctx.bookings)
+            if count:
+                results[scenario.name] = await drive(client, scenario, ctx, count, concurrency, seed + index)
+            print(f"{scenario.name:<22}" + _format_row(results.get(scenario.name)), file=sys.stderr)
+    return results
+
+
+def _format_row(result: Optional[Dict[str, Any]]) -> str:
+    if not result:
+        return "skipped"
+    return (f"{result['requests']:>7}{result['errors']:>7}{result['rps']:>10,.0f}"
+            f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}")
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, min_ms: float) -> List[str]:
+    """Print a comparison table; returns the scenarios that regressed.
+
+    A scenario regresses when its throughput falls, or its p95 latency rises,
+    by more than ``threshold`` (a fraction); latency changes smaller than
+    ``min_ms`` are ignored as noise. New errors always count.
+    """
+    regressions = []
+    print(f"{'scenario':<22}{'base rps':>10}{'rps':>10}{'change':>9}{'base p95':>10}{'p95':>9}{'change':>9}")
+    for name, result in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"{name:<22}{'-':>10}{result['rps']:>10,.0f}{'new':>9}")
+            continue
+        rps_change = result["rps"] / base["rps"] - 1 if base["rps"] else 0.0
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        slower = p95_change > threshold and result["p95_ms"] - base["p95_ms"] > min_ms
+        regressed = rps_change < -threshold or slower or result["errors"] > base["errors"]
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<22}{base['rps']:>10,.0f}{result['rps']:>10,.0f}{rps_change:>+9.0%}"
+              f"{base['p95_ms']:>10.2f}{result['p95_ms']:>9.2f}{p95_change:>+9.0%}"
+              + ("  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def _prepare_environment(args: argparse.Namespace):
+    """Settings the API reads at import time"""
+    if args.database:
+        os.environ["DATABASE_PATH"] = os.path.abspath(args.database)
+    if args.no_cache:
+        os.environ["CACHE_ENABLED"] = "false"
+    os.environ.setdefault("ADMIN_TOKEN", secrets.token_hex(16))
+    from benchmarks._common import use_scratch_database
+
+    use_scratch_database()
+
+
+def command_run(args: argparse.Namespace) -> int:
+    _prepare_environment(args)
+    products, practitioners = sizes(args)
+    dataset = generate(products, practitioners, args.slot_days)
+    print(f"{dataset['counts']['products']:,} products, {dataset['counts']['practitioners']:,} practitioners, "
+          f"{dataset['counts']['slots']:,} slots ready in {dataset['seconds']['total']:.1f}s\n", file=sys.stderr)
+
+    print(f"{'scenario':<22}{'reqs':>7}{'errors':>7}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}",
+          file=sys.stderr)
+    scenarios = asyncio.run(run_scenarios(args.requests, args.concurrency, args.only, args.seed))
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "dataset": dataset["counts"],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cache": not args.no_cache,
+            "seed": args.seed,
+        },
+        "scenarios": scenarios,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(result, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(json.load(baseline), result, args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 1 if any(scenario["errors"] for scenario in scenarios.values()) else 0
+
+
+def command_compare(args: argparse.Namespace) -> int:
+    with open(args.baseline) as baseline, open(args.results) as results:
+        regressions = compare(json.load(baseline), json.load(results), args.threshold, args.min_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Generate data if needed and load every route")
+    add_arguments(run)
+    run.add_argument("--requests", type=int, default=1000, help="Requests per scenario")
+    run.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    run.add_argument("--only", nargs="+", help="Scenario names to run (default: all)")
+    run.add_argument("--seed", type=int, default=1, help="Seed for request parameters")
+    run.add_argument("--no-cache", action="store_true", help="Disable the read-through and response caches")
+    run.add_argument("--output", help="Write results to this JSON file")
+    run.add_argument("--baseline", help="Compare against this results file; exit 1 on regressions")
+
+    diff = commands.add_parser("compare", help="Compare two saved results files")
+    diff.add_argument("baseline")
+    diff.add_argument("results")
+
+    for command in (run, diff):
+        command.add_argument("--threshold", type=float, default=0.15,
+                             help="Relative throughput drop or p95 rise counted as a regression")
+        command.add_argument("--min-ms", type=float, default=0.5, help="Ignore p95 changes smaller than this")
+
+    args = parser.parse_args(argv)
+    return command_run(args) if args.command == "run" else command_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Read-through cache for catalog queries
+
+Entries are grouped into namespaces (one per table). Invalidating a namespace
+bumps its version, which orphans every key built from the old version; the
+orphans age out through LRU eviction. Two backends are available:
+
+- ``MemoryBackend``: per-process LRU dictionary
+- ``FileBackend``: SQLite file shared by every uvicorn worker on the host
+"""
+import functools
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import config
+
+_MISSING = object()
+
+
+class CacheStats:
+    """Counters reported by every backend"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class MemoryBackend:
+    """Size-bounded LRU with per-entry expiry, private to this process"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._namespaces: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return _MISSING
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def namespace_version(self, namespace: str) -> int:
+        return self._namespaces.get(namespace, 0)
+
+    def bump_namespace(self, namespace: str):
+        with self._lock:
+            self._namespaces[namespace] = self._namespaces.get(namespace, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self):
+        """Nothing to release: entries live in this process's memory"""
+
+
+class FileBackend:
+    """LRU store in a SQLite file so several worker processes share entries.
+
+    Access times are only refreshed once per second per key to keep reads from
+    turning into a stream of writes.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries (accessed)")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_namespaces (
+                    name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )
+            ''')
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=config.DB_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Close every thread's connection; later calls open new ones"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def get(self, key: str) -> Any:
+        conn = self._connection()
+        row = conn.execute("SELECT value, expires, accessed FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None:
+            self.stats.misses += 1
+            return _MISSING
+        value, expires, accessed = row
+        if expires < now:
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires < ?", (key, now))
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return _MISSING
+        if now - accessed > 1:
+            conn.execute("UPDATE cache_entries SET accessed = ? WHERE key = ?", (now, key))
+        self.stats.hits += 1
+        return pickle.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float):
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + ttl, now),
+        )
+        excess = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute('''
+                DELETE FROM cache_entries WHERE key IN (
+                    SELECT key FROM cache_entries ORDER BY accessed LIMIT ?
+                )
+            ''', (excess,))
+            self.stats.evictions += excess
+
+    def namespace_version(self, namespace: str) -> int:
+        row = self._connection().execute(
+            "SELECT version FROM cache_namespaces WHERE name = ?", (namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump_namespace(self, namespace: str):
+        self._connection().execute('''
+            INSERT INTO cache_namespaces (name, version) VALUES (?, 1)
+            ON CONFLICT (name) DO UPDATE SET version = version + 1
+        ''', (namespace,))
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+class ReadThroughCache:
+    """Namespaced read-through cache over a pluggable backend"""
+
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    def _full_key(self, namespace: str, key: str) -> str:
+        return f"{namespace}:{self.backend.namespace_version(namespace)}:{key}"
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Return the cached value for ``key`` or ``default``"""
+        if not self.enabled:
+            return default
+        value = self.backend.get(self._full_key(namespace, key))
+        return default if value is _MISSING else value
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float):
+        """Store ``value`` under ``key`` for ``ttl`` seconds"""
+        if self.enabled and ttl > 0:
+            self.backend.set(self._full_key(namespace, key), value, ttl)
+
+    def get_or_load(self, namespace: str, key: str, ttl: float, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key``, calling ``loader`` on a miss"""
+        if not self.enabled or ttl <= 0:
+            return loader()
+        full_key = self._full_key(namespace, key)
+        value = self.backend.get(full_key)
+        if value is _MISSING:
+            value = loader()
+            self.backend.set(full_key, value, ttl)
+        return value
+
+    def invalidate(self, *namespaces: str):
+        """Drop every cached entry in the given namespaces"""
+        for namespace in namespaces:
+            self.backend.bump_namespace(namespace)
+
+    def close(self):
+        """Release the backend's connections, e.g. before forking workers"""
+        self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backend": self.backend.name,
+            "entries": len(self.backend),
+            **self.backend.stats.as_dict(),
+        }
+
+
+class CachedDatabase:
+    """Wrap a database class so the listed methods read through the cache.
+
+    ``ttls`` maps method names to their time-to-live in seconds; any other
+    attribute is passed straight through to the wrapped class. When given,
+    ``version`` is called on every lookup and folded into the key, so writes
+    that bump it are seen even if nobody calls ``invalidate``.
+    """
+
+    def __init__(
+        self,
+        target,
+        namespace: str,
+        ttls: Dict[str, float],
+        cache: ReadThroughCache,
+        version: Optional[Callable[[], Any]] = None,
+    ):
+        self._target = target
+        self._namespace = namespace
+        self._ttls = ttls
+        self._cache = cache
+        self._version = version
+
+    def __getattr__(self, name):
+        method = getattr(self._target, name)
+        if name not in self._ttls:
+            return method
+        ttl = self._ttls[name]
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            key = f"{name}:{args!r}:{sorted(kwargs.items())!r}"
+            if self._version is not None:
+                key = f"{self._version()}:{key}"
+            return self._cache.get_or_load(self._namespace, key, ttl, lambda: method(*args, **kwargs))
+
+        setattr(self, name, call)
+        return call
+
+
+def create_backend():
+    """Build the backend selected by CACHE_BACKEND"""
+    if config.CACHE_BACKEND == "memory":
+        return MemoryBackend(config.CACHE_MAX_ENTRIES)
+    if config.CACHE_BACKEND == "file":
+        return FileBackend(config.CACHE_PATH, config.CACHE_MAX_ENTRIES)
+    raise ValueError(f"Unknown CACHE_BACKEND '{config.CACHE_BACKEND}'")
+
+
+catalog_cache = ReadThroughCache(create_backend(), enabled=config.CACHE_ENABLED)
@@ -0,0 +1,239 @@
+"""
+Bulk catalog import and export
+
+Imports stream CSV or NDJSON records from a binary file object, validate them
+a batch at a time and upsert each batch in its own transaction, so memory
+stays flat no matter how large the partner catalog is. Records carry the same
+field names as the API (``originalPrice``, ``inStock``); a record with an
+``id`` updates that row, one without is inserted. An update only touches
+the fields the record provides: a field left out of an NDJSON line, or an
+empty CSV cell, keeps its current value, while an explicit ``null`` clears it.
+New rows get the model defaults for whatever they leave out. Practitioners'
+``nextAvailable`` is derived from their slots and is not imported; new
+practitioners get the published schedule once their import finishes.
+
+Exports walk a cursor with ``fetchmany`` and yield encoded chunks, ready for
+a ``StreamingResponse`` or a file.
+"""
+import csv
+import io
+import itertools
+import time
+from typing import IO, Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+import orjson
+from pydantic import TypeAdapter, ValidationError
+
+import config
+from cache import catalog_cache
+from database import BookingDatabase, pool
+from models import ImportReport, PractitionerImport, ProductImport
+
+FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 20
+
+
+class TableSpec(NamedTuple):
+    table: str
+    fields: Tuple[str, ...]
+    columns: Tuple[str, ...]
+    adapter: TypeAdapter
+    booleans: Tuple[str, ...] = ()
+
+
+TABLES: Dict[str, TableSpec] = {
+    "products": TableSpec(
+        "products",
+        ("id", "name", "description", "price", "originalPrice", "rating", "reviews", "image", "category", "inStock"),
+        ("id", "name", "description", "price", "original_price", "rating", "reviews", "image", "category", "in_stock"),
+        TypeAdapter(List[ProductImport]),
+        booleans=("inStock",),
+    ),
+    "practitioners": TableSpec(
+        "practitioners",
+        ("id", "name", "specialty", "rating", "experience", "location", "image", "latitude", "longitude"),
+        ("id", "name", "specialty", "rating", "experience", "location", "image", "latitude", "longitude"),
+        TypeAdapter(List[PractitionerImport]),
+    ),
+}
+
+
+def get_spec(table: str) -> TableSpec:
+    if table not in TABLES:
+        raise ValueError(f"Unknown table '{table}'. Valid tables: {', '.join(TABLES)}")
+    return TABLES[table]
+
+
+def check_format(fmt: str) -> str:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Valid formats: {', '.join(FORMATS)}")
+    return fmt
+
+
+def read_records(stream: IO[bytes], fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per CSV row or NDJSON line without reading the whole stream"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if check_format(fmt) == "csv":
+        for record in csv.DictReader(text):
+            # Empty cells mean "not provided"
+            yield {key: value for key, value in record.items() if value != ""}
+    else:
+        for line in text:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+def _batches(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _validate(
+    spec: TableSpec, batch: List[Dict[str, Any]], first_line: int, errors: List[str]
+) -> List[Tuple[Tuple[str, ...], tuple]]:
+    """Validate a batch in one pass, falling back to row by row to isolate bad records
+
+    Each record comes back as the columns it provides, which are the ones an
+    update may overwrite, and its values for every column.
+    """
+    try:
+        models = spec.adapter.validate_python(batch)
+    except ValidationError:
+        models = []
+        for offset, record in enumerate(batch):
+            try:
+                models.extend(spec.adapter.validate_python([record]))
+            except ValidationError as e:
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    detail = e.errors()[0]
+                    errors.append(f"record {first_line + offset}: {'.'.join(map(str, detail['loc'][1:]))} {detail['msg']}")
+    return [
+        (
+            tuple(column for field, column in zip(spec.fields, spec.columns)
+                  if field != "id" and field in model.model_fields_set),
+            tuple(getattr(model, field) for field in spec.fields),
+        )
+        for model in models
+    ]
+
+
+def _stage_sql(spec: TableSpec) -> Tuple[str, str, str]:
+    """SQL to create, clear and fill the temp table a batch is staged in"""
+    staging = f"temp.import_{spec.table}"
+    columns = ", ".join(spec.columns)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {staging} AS SELECT {columns} FROM {spec.table} WHERE 0",
+        f"DELETE FROM {staging}",
+        f"INSERT INTO {staging} ({columns}) VALUES ({', '.join('?' * len(spec.columns))})",
+    )
+
+
+def _upsert_sql(spec: TableSpec, updated: Tuple[str, ...]) -> str:
+    """Upsert of the staged rows; rows that exist only get their ``updated`` columns rewritten"""
+    columns = ", ".join(spec.columns)
+    updates = ", ".join(f"{column} = excluded.{column}" for column in updated)
+    conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    # WHERE true keeps the parser from reading ON CONFLICT as a join constraint
+    return f'''
+        INSERT INTO {spec.table} ({columns})
+        SELECT {columns} FROM temp.import_{spec.table} WHERE true ORDER BY rowid
+        ON CONFLICT (id) {conflict}
+    '''
+
+
+def rebuild_indexes(table: str):
+    """Merge the full-text index segments and refresh planner statistics after a bulk load"""
+    spec = get_spec(table)
+    with pool.write() as conn:
+        conn.execute(f"INSERT INTO {spec.table}_fts ({spec.table}_fts) VALUES ('optimize')")
+        conn.execute(f"ANALYZE {spec.table}")
+
+
+def import_catalog(table: str, stream: IO[bytes], fmt: str, batch_size: int = config.IMPORT_BATCH_SIZE) -> ImportReport:
+    """Stream records from ``stream`` into ``table`` in batched upsert transactions"""
+    spec = get_spec(table)
+    create, clear, stage = _stage_sql(spec)
+    rows = skipped = batches = 0
+    errors: List[str] = []
+    start = time.perf_counter()
+
+    for batch in _batches(read_records(stream, fmt), batch_size):
+        records = _validate(spec, batch, rows + skipped + 1, errors)
+        with pool.write() as conn:
+            # Stage the batch and upsert it in one statement. FTS5 flushes its
+            # pending terms at every statement boundary, so row-at-a-time
+            # inserts would pay a full index merge per row. Records that
+            # provide different columns need different updates, so each run of
+            # records providing the same ones gets its own statement; a file
+            # with a fixed set of fields is still one statement per batch.
+            conn.execute(create)
+            for updated, run in itertools.groupby(records, key=lambda record: record[0]):
+                conn.execute(clear)
+                conn.executemany(stage, [values for _, values in run])
+                conn.execute(_upsert_sql(spec, updated))
+        rows += len(records)
+        skipped += len(batch) - len(records)
+        batches += 1
+
+    if rows:
+        rebuild_indexes(table)
+        if table == "practitioners":
+            # Imported practitioners are bookable straight away
+            BookingDatabase.publish_schedule()
+        catalog_cache.invalidate(table)
+
+    seconds = time.perf_counter() - start
+    return ImportReport(
+        table=table,
+        rows=rows,
+        skipped=skipped,
+        batches=batches,
+        seconds=round(seconds, 3),
+        rowsPerSecond=round(rows / seconds, 1) if seconds else 0.0,
+        errors=errors,
+    )
+
+
+def _json_record(spec: TableSpec, row: tuple) -> Dict[str, Any]:
+    record = dict(zip(spec.fields, row))
+    for field in spec.booleans:
+        record[field] = bool(record[field])
+    return record
+
+
+def export_catalog(table: str, fmt: str, chunk_size: int = config.EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield ``table`` as CSV or NDJSON, ``chunk_size`` rows per chunk"""
+    spec = get_spec(table)
+    check_format(fmt)
+
+    # Exports can outlive a request thread, so they get their own connection
+    with pool.dedicated() as conn:
+        cursor = conn.execute(f"SELECT {', '.join(spec.columns)} FROM {spec.table} ORDER BY id")
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if fmt == "csv":
+            writer.writerow(spec.fields)
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if fmt == "csv":
+                writer.writerows(rows)
+                chunk = buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                chunk = b"".join(
+                    orjson.dumps(_json_record(spec, row), option=orjson.OPT_APPEND_NEWLINE) for row in rows
+                )
+            yield chunk
+
+        if fmt == "csv" and buffer.tell():
+            yield buffer.getvalue().encode()
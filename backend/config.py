@@ -0,0 +1,108 @@
+"""
+Runtime configuration for the Tangerine Practitioners API
+
+Every setting can be overridden from the environment (or the .env file that
+start.py and main.py load).
+"""
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# SQLite database
+DATABASE_PATH = os.getenv("DATABASE_PATH", os.path.join(os.path.dirname(__file__), "practitioners.db"))
+
+# Connection pool and pragmas
+DB_POOL_ENABLED = _env_bool("DB_POOL_ENABLED", True)
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "-16000"))  # negative values are KiB
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Serve reads from an in-memory copy of the whole database, rebuilt in the
+# background and swapped in when the file changes (checked every
+# SNAPSHOT_CHECK_SECONDS), so reads can trail writes by about that long
+SNAPSHOT_ENABLED = _env_bool("SNAPSHOT_ENABLED", False)
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("SNAPSHOT_CHECK_SECONDS", "1"))
+
+# Threads that run blocking database calls for the async handlers. 0 (the
+# default) runs them inline on the event loop: benchmarks.bench_concurrency
+# shows the short catalog queries finishing sooner that way than after the
+# hand-off to a thread. Raise it if slow queries start holding up others.
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "0"))
+
+# Read-through cache for catalog queries
+CACHE_ENABLED = _env_bool("CACHE_ENABLED", True)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # "memory" or "file" (shared by all workers)
+CACHE_PATH = os.getenv("CACHE_PATH", os.path.join(os.path.dirname(DATABASE_PATH), "cache.db"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL_CATEGORIES = float(os.getenv("CACHE_TTL_CATEGORIES", "300"))
+CACHE_TTL_LISTS = float(os.getenv("CACHE_TTL_LISTS", "60"))
+CACHE_TTL_ITEMS = float(os.getenv("CACHE_TTL_ITEMS", "300"))
+CACHE_TTL_RESPONSES = float(os.getenv("CACHE_TTL_RESPONSES", "300"))
+
+# Identical catalog requests that miss the cache at the same time share one
+# build; a request waits at most this long for it before building its own
+SINGLE_FLIGHT_ENABLED = _env_bool("SINGLE_FLIGHT_ENABLED", True)
+SINGLE_FLIGHT_TIMEOUT_SECONDS = float(os.getenv("SINGLE_FLIGHT_TIMEOUT_SECONDS", "5"))
+
+# Bulk catalog import/export
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+# Rows fetched per round trip when a list endpoint streams NDJSON
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "500"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # admin endpoints are disabled when empty
+
+# Availability is computed as of the start of each window of this many
+# seconds, so cached answers and ETags roll over when the window does
+AVAILABILITY_RESOLUTION_SECONDS = int(os.getenv("AVAILABILITY_RESOLUTION_SECONDS", "60"))
+
+# Bookable slots are published this many days ahead at startup, after
+# practitioner imports and every SCHEDULE_REFRESH_SECONDS (0 disables the
+# background refresh; POST /api/admin/schedule publishes on demand)
+SCHEDULE_DAYS = int(os.getenv("SCHEDULE_DAYS", "14"))
+SCHEDULE_REFRESH_SECONDS = int(os.getenv("SCHEDULE_REFRESH_SECONDS", "3600"))
+
+# Prometheus metrics at /metrics, and the threshold for logging slow database calls
+METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))
+
+# Typo-tolerant search: query words are replaced by indexed terms at least this
+# trigram-similar (0-1). By default a search only falls back to it when nothing
+# matches exactly.
+FUZZY_SEARCH_ENABLED = _env_bool("FUZZY_SEARCH_ENABLED", True)
+FUZZY_SEARCH_THRESHOLD = float(os.getenv("FUZZY_SEARCH_THRESHOLD", "0.3"))
+FUZZY_MAX_EXPANSIONS = int(os.getenv("FUZZY_MAX_EXPANSIONS", "5"))  # replacements considered per word
+FUZZY_MAX_COMBINATIONS = int(os.getenv("FUZZY_MAX_COMBINATIONS", "20"))  # replacement combinations searched
+FUZZY_INDEX_REFRESH_SECONDS = float(os.getenv("FUZZY_INDEX_REFRESH_SECONDS", "60"))  # how often to check for new terms
+
+# Seconds between copies of the live per-category figures into the analytics rollups (0 disables)
+ANALYTICS_SNAPSHOT_SECONDS = int(os.getenv("ANALYTICS_SNAPSHOT_SECONDS", "900"))
+
+# Related products and similar practitioners: lists stored per item, and seconds
+# between background refreshes of the lists catalog changes made stale
+# (0 disables them; run recommendations.py from cron instead)
+RECOMMENDATIONS_PER_ITEM = int(os.getenv("RECOMMENDATIONS_PER_ITEM", "10"))
+RECOMMENDATIONS_REFRESH_SECONDS = int(os.getenv("RECOMMENDATIONS_REFRESH_SECONDS", "300"))
+
+# Server (start.py); "production" runs gunicorn over uvicorn workers instead of the reloader
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))  # worker processes
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", "10000"))  # recycle a worker after this many (0 never does)
+MAX_REQUESTS_JITTER = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))  # so workers do not all restart at once
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))  # seconds to drain in-flight requests on SIGTERM
+BACKLOG = int(os.getenv("BACKLOG", "2048"))
+KEEPALIVE_SECONDS = int(os.getenv("KEEPALIVE_SECONDS", "5"))
+# start.py turns this off in production after migrating once in the supervisor
+DB_MIGRATE_ON_STARTUP = _env_bool("DB_MIGRATE_ON_STARTUP", True)
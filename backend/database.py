@@ -1,326 +1,1503 @@
+import asyncio
+import functools
+import json
+import math
+import re
 import sqlite3
-import os
-from typing import List, Optional
-from models import Practitioner, Product, ProductCategory
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from pydantic import TypeAdapter
+from models import (
+    Booking, BookingAnalytics, BookingPoint, BookingSeries, CategoryAnalytics, CategoryPoint, CategorySeries,
+    NearbyPractitioner, PriceBucket, Practitioner, PractitionerRanking, Product, ProductCategory, ProductFacets,
+    RelatedProduct, ScheduleReport, SimilarPractitioner, Slot, StockCounts, TopPractitioners
+)
+from cache import CachedDatabase, catalog_cache
+from fuzzy import FuzzyMatcher, FuzzyQuery
+from metrics import TracedDatabase, build_models
+from migrations import PRICE_BUCKET_EDGES, ROLLUP_GRAINS, migrate, price_bucket_sql, rollup_period_sql
+from pagination import Page, SortOption, decode_cursor, encode_cursor, keyset_condition, order_by_clause, resolve_sort
+import config
+
+DATABASE_PATH = config.DATABASE_PATH
+
+
+class Snapshot(NamedTuple):
+    uri: str
+    keeper: sqlite3.Connection  # keeps the in-memory database alive
+    data_version: int  # of the file when the copy started
+    built_at: float
+    build_seconds: float
+
+
+class ConnectionPool:
+    """Long-lived SQLite connections shared by every database class.
+
+    Each thread keeps its own read connection open for the life of the
+    process, and writes go through a single connection guarded by a lock.
+    With pooling disabled every checkout opens and closes a fresh connection.
+
+    Once ``refresh_snapshot`` has run, reads go to an in-memory copy of the
+    whole database instead of the file (see SNAPSHOT_ENABLED).
+    """
+
+    def __init__(self, path: str = DATABASE_PATH, pooled: bool = config.DB_POOL_ENABLED):
+        self.path = path
+        self.pooled = pooled
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+        self._snapshot: Optional[Snapshot] = None
+        self._snapshot_lock = threading.Lock()
+        self._watcher: Optional[sqlite3.Connection] = None
+        self._snapshots_built = 0
+
+    def _connect(self, path: Optional[str] = None) -> sqlite3.Connection:
+        """Open a connection and apply the configured pragmas"""
+        snapshot = path is not None
+        conn = sqlite3.connect(
+            path or self.path,
+            timeout=config.DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            uri=snapshot,
+        )
+        if snapshot:
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            conn.execute(f"PRAGMA journal_mode={config.DB_JOURNAL_MODE}")
+            conn.execute(f"PRAGMA synchronous={config.DB_SYNCHRONOUS}")
+            conn.execute(f"PRAGMA cache_size={config.DB_CACHE_SIZE}")
+            conn.execute(f"PRAGMA mmap_size={config.DB_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.create_function("distance_km", 4, distance_km, deterministic=True)
+        return conn
+
+    def _track(self, conn: sqlite3.Connection) -> sqlite3.Connection:
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def _untrack(self, conn: sqlite3.Connection):
+        with self._connections_lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Check out this thread's read connection, to the current snapshot if there is one"""
+        snapshot = self._snapshot
+        uri = snapshot.uri if snapshot is not None else None
+        if not self.pooled:
+            conn = self._connect(uri)
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.uri != uri:
+            # The snapshot was swapped; the old one is freed once its last
+            # connection closes
+            if conn is not None:
+                self._untrack(conn)
+            conn = self._local.conn = self._track(self._connect(uri))
+            self._local.uri = uri
+        yield conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """Check out the writer connection inside an immediate transaction"""
+        with self._write_lock:
+            if not self.pooled:
+                conn = self._connect()
+            else:
+                if self._writer is None:
+                    self._writer = self._track(self._connect())
+                conn = self._writer
+            try:
+                # Take the write lock up front so check-then-insert sequences
+                # are atomic across worker processes
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                if not self.pooled:
+                    conn.close()
+
+    @contextmanager
+    def dedicated(self) -> Iterator[sqlite3.Connection]:
+        """A private connection for long-running reads such as streamed exports"""
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def refresh_snapshot(self) -> bool:
+        """Copy the database into a new in-memory snapshot if it changed since the last one; returns whether it did.
+
+        The copy is made with the backup API while readers keep using the
+        previous snapshot, then swapped in with one assignment.
+        """
+        with self._snapshot_lock:
+            if self._watcher is None:
+                self._watcher = self._track(self._connect())
+            # data_version moves whenever another connection, in any
+            # process, commits to the file
+            version = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+            previous = self._snapshot
+            if previous is not None and previous.data_version == version:
+                return False
+
+            start = time.perf_counter()
+            self._snapshots_built += 1
+            uri = f"file:tangerine-snapshot-{self._snapshots_built}?mode=memory&cache=shared"
+            keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._watcher.backup(keeper)
+            self._snapshot = Snapshot(uri, keeper, version, time.time(), time.perf_counter() - start)
+        if previous is not None:
+            previous.keeper.close()
+        return True
+
+    @property
+    def reads_from_snapshot(self) -> bool:
+        """Whether read() currently hands out snapshot connections, which can trail the file"""
+        return self._snapshot is not None
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        """Age and build time of the current snapshot, and how many have been built"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "built": self._snapshots_built,
+            "age_seconds": round(time.time() - snapshot.built_at, 3),
+            "build_seconds": round(snapshot.build_seconds, 6),
+        }
+
+    def close_all(self):
+        """Close every pooled connection and drop the snapshot"""
+        snapshot, self._snapshot = self._snapshot, None
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        if snapshot is not None:
+            snapshot.keeper.close()
+        self._writer = None
+        self._watcher = None
+        self._local = threading.local()
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> Optional[float]:
+    """Great-circle (haversine) distance; registered as an SQL function on every connection"""
+    if lat2 is None or lng2 is None:
+        return None
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lng, max_lng) enclosing every point within ``radius_km``.
+
+    Longitude degrees shrink towards the poles, so the box widens with
+    latitude; it is clamped to valid coordinates rather than wrapped across
+    the antimeridian.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    cos_lat = math.cos(math.radians(min(89.9, abs(lat) + dlat)))
+    dlng = min(180.0, radius_km / (KM_PER_DEGREE * cos_lat))
+    return max(-90.0, lat - dlat), min(90.0, lat + dlat), max(-180.0, lng - dlng), min(180.0, lng + dlng)
+
+
+pool = ConnectionPool()
+
+
+def fts_match_expression(text: str) -> Optional[str]:
+    """Turn free-text input into an FTS5 MATCH expression with prefix terms.
+
+    Every word must match, each one as a prefix so partially typed queries
+    still find results.
+    """
+    terms = re.findall(r"\w+", text.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def like_contains(text: str) -> str:
+    """LIKE pattern matching values that contain ``text`` (use with ESCAPE '\\')"""
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def migrate_database() -> List[int]:
+    """Bring the schema up to date; safe to call from every worker at startup"""
+    with pool.write() as conn:
+        applied = migrate(conn)
+    if applied:
+        catalog_cache.invalidate("practitioners", "products")
+    return applied
+
+
+def ping_database():
+    """Run a trivial query; raises if the database cannot be read"""
+    with pool.read() as conn:
+        conn.execute("SELECT 1").fetchone()
+
+
+def get_table_versions(*tables: str) -> Tuple[int, ...]:
+    """Current change counter of each table, in the order given"""
+    with pool.read() as conn:
+        rows = dict(conn.execute(
+            f"SELECT name, version FROM table_versions WHERE name IN ({', '.join('?' * len(tables))})",
+            tables,
+        ).fetchall())
+    return tuple(rows.get(table, 0) for table in tables)
+
+
+def load_vocabulary(table: str) -> Dict[str, int]:
+    """Terms in ``table``'s full-text index and how many rows contain each; numbers are left out"""
+    with pool.read() as conn:
+        return dict(conn.execute(f"SELECT term, doc FROM {table}_fts_vocab WHERE term GLOB '*[^0-9]*'"))
+
+
+fuzzy_matcher = FuzzyMatcher(load_vocabulary, lambda table: get_table_versions(table)[0])
+
+
+# Default for the ``expansion`` arguments below: expand the query in the call
+UNEXPANDED: Any = object()
+
+
+def fuzzy_expansion(
+    table: str, query: Optional[str], fuzzy: bool, expansion: Optional[FuzzyQuery] = UNEXPANDED
+) -> Optional[FuzzyQuery]:
+    """``expansion``, or ``query`` expanded against ``table``'s vocabulary; None unless a fuzzy query resembles something.
+
+    A request that searches, counts and facets the same fuzzy query expands
+    it once and passes the result (None included) to each call, so all of
+    them match the same terms even if the vocabulary reloads in between.
+    """
+    if not fuzzy or not query:
+        return None
+    return fuzzy_matcher.expand(table, query) if expansion is UNEXPANDED else expansion
+
+
+def match_expression(query: str, fuzzy: bool, expansion: Optional[FuzzyQuery]) -> Optional[str]:
+    """FTS5 MATCH expression for ``query``, from ``expansion`` if ``fuzzy``; None when nothing can match"""
+    if not fuzzy:
+        return fts_match_expression(query)
+    return expansion.match if expansion else None
+
+
+# API field names in the same order as the selected columns
+PRACTITIONER_FIELDS = ("id", "name", "specialty", "rating", "experience", "location", "image", "latitude", "longitude")
+PRODUCT_FIELDS = ("id", "name", "description", "price", "originalPrice", "rating", "reviews", "image", "category", "inStock")
+
+_practitioner_list = TypeAdapter(List[Practitioner])
+_nearby_practitioner_list = TypeAdapter(List[NearbyPractitioner])
+_similar_practitioner_list = TypeAdapter(List[SimilarPractitioner])
+_product_list = TypeAdapter(List[Product])
+_related_product_list = TypeAdapter(List[RelatedProduct])
+
+
+def availability_epoch() -> int:
+    """Index of the current AVAILABILITY_RESOLUTION_SECONDS window.
+
+    Availability is computed as of the start of the window, so answers stay
+    identical (and cacheable) within one and move on when it ends.
+    """
+    return int(time.time() // config.AVAILABILITY_RESOLUTION_SECONDS)
+
+
+def availability_now() -> datetime:
+    """Start of the current availability window, in local time"""
+    return datetime.fromtimestamp(availability_epoch() * config.AVAILABILITY_RESOLUTION_SECONDS)
+
+
+def slot_time(moment: datetime) -> str:
+    """The text form slot times are stored and compared in"""
+    return moment.isoformat(timespec="minutes")
+
+
+def describe_slot(starts_at: Optional[str], now: datetime) -> str:
+    """Human label for a slot start, such as Today 2:00 PM or Mon 10:00 AM"""
+    if starts_at is None:
+        return "No availability"
+    start = datetime.fromisoformat(starts_at)
+    clock = start.strftime("%I:%M %p").lstrip("0")
+    days = (start.date() - now.date()).days
+    if days == 0:
+        return f"Today {clock}"
+    if days == 1:
+        return f"Tomorrow {clock}"
+    if days < 7:
+        return f"{start:%a} {clock}"
+    return f"{start:%b} {start.day} {clock}"
+
+
+def _next_open_slots(practitioner_ids: List[int], now: datetime) -> dict:
+    """Earliest open slot start per practitioner, one index seek each"""
+    if not practitioner_ids:
+        return {}
+    with pool.read() as conn:
+        return dict(conn.execute('''
+            SELECT s.practitioner_id, MIN(s.starts_at)
+            FROM slots s
+            WHERE s.booked = 0 AND s.starts_at >= ?
+              AND s.practitioner_id IN (SELECT value FROM json_each(?))
+            GROUP BY s.practitioner_id
+        ''', (slot_time(now), json.dumps(practitioner_ids))).fetchall())
+
+
+def _practitioners_from_rows(
+    rows, adapter: TypeAdapter = _practitioner_list, extras: Optional[List[Dict[str, Any]]] = None
+) -> List[Practitioner]:
+    """Build models for a whole batch of rows in a single validation pass.
+
+    Extra trailing columns (such as a sort key) are ignored, as are fields
+    the ``adapter``'s model does not declare; ``extras`` adds per-row fields
+    for subclasses. nextAvailable comes from one open-slot lookup for the
+    whole batch.
+    """
+    now = availability_now()
+    next_slots = _next_open_slots([row[0] for row in rows], now)
+    return build_models(adapter, [
+        {
+            **dict(zip(PRACTITIONER_FIELDS, row)),
+            "nextAvailable": describe_slot(next_slots.get(row[0]), now),
+            **(extras[i] if extras else {}),
+        }
+        for i, row in enumerate(rows)
+    ])
+
+
+def _products_from_rows(
+    rows, adapter: TypeAdapter = _product_list, extras: Optional[List[Dict[str, Any]]] = None
+) -> List[Product]:
+    """Product counterpart of _practitioners_from_rows; in_stock integers become booleans"""
+    return build_models(adapter, [
+        {**dict(zip(PRODUCT_FIELDS, row)), **(extras[i] if extras else {})} for i, row in enumerate(rows)
+    ])
+
+
+MAX_BATCH_IDS = 100
+
+# Nearby results are ranked by exact distance, with rating breaking ties,
+# or by rating within the radius
+NEARBY_ORDERS = {
+    "distance": "distance ASC, rating DESC, id ASC",
+    "rating": "rating DESC, distance ASC, id ASC",
+}
+
+PRACTITIONER_COLUMNS = "p.id, p.name, p.specialty, p.rating, p.experience, p.location, p.image, p.latitude, p.longitude"
+PRACTITIONER_SORTS = {
+    "id": SortOption("p.id", False),
+    "rating": SortOption("p.rating", True),
+    "name": SortOption("p.name", False),
+    # Name hits outrank specialty hits
+    "relevance": SortOption("bm25(practitioners_fts, 10.0, 4.0)", False),
+}
+
+PRODUCT_COLUMNS = "p.id, p.name, p.description, p.price, p.original_price, p.rating, p.reviews, p.image, p.category, p.in_stock"
+PRODUCT_SORTS = {
+    "id": SortOption("p.id", False),
+    "rating": SortOption("p.rating", True),
+    "price": SortOption("p.price", False),
+    "price_desc": SortOption("p.price", True),
+    "reviews": SortOption("p.reviews", True),
+    "relevance": SortOption("bm25(products_fts, 10.0, 1.0, 2.0)", False),
+}
+PRODUCT_FACETS = ("category", "price", "in_stock")
+
+
+def _page_query(
+    columns: str,
+    from_clause: str,
+    conditions: List[str],
+    params: List[Any],
+    sort_name: str,
+    sort: SortOption,
+    limit: Optional[int],
+    offset: int,
+    after: Optional[str],
+) -> Tuple[str, List[Any]]:
+    """SQL and parameters for a filtered, sorted, keyset- or offset-paged query.
+
+    The sort key is selected as the last column so a cursor can be built
+    from any row.
+    """
+    conditions, params = list(conditions), list(params)
+    if after:
+        value, last_id = decode_cursor(after, sort_name)
+        condition, condition_params = keyset_condition(sort, value, last_id, "p.id")
+        conditions.append(condition)
+        params.extend(condition_params)
+
+    sql_query = f"SELECT {columns}, {sort.expression} AS sort_key{from_clause}"
+    if conditions:
+        sql_query += " WHERE " + " AND ".join(conditions)
+    sql_query += order_by_clause(sort, "p.id")
+    if limit:
+        sql_query += " LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+    elif offset:
+        sql_query += " LIMIT -1 OFFSET ?"
+        params.append(offset)
+    return sql_query, params
+
+
+def _fetch_page(
+    columns: str,
+    from_clause: str,
+    conditions: List[str],
+    params: List[Any],
+    sort_name: str,
+    sort: SortOption,
+    limit: Optional[int],
+    offset: int,
+    after: Optional[str],
+) -> Tuple[List[tuple], Optional[str]]:
+    """Run a filtered query for one page only.
+
+    One extra row is fetched to tell whether a next page exists.
+    """
+    sql_query, params = _page_query(
+        columns, from_clause, conditions, params, sort_name, sort, limit + 1 if limit else limit, offset, after
+    )
+    with pool.read() as conn:
+        rows = conn.execute(sql_query, params).fetchall()
+
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort_name, rows[-1][-1], rows[-1][0])
+    return rows, next_cursor
+
+
+def _fetch_fuzzy_page(
+    columns: str,
+    from_clause: str,
+    conditions: List[str],
+    params: List[Any],
+    sort_name: str,
+    sort: SortOption,
+    tiers: List[str],
+    limit: Optional[int],
+    offset: int,
+) -> List[tuple]:
+    """One page of a fuzzy search, ranked by how closely rows match the query.
+
+    Each tier is one combination of corrected terms, most similar first.
+    Rows are taken tier by tier, in ``sort`` order within a tier, so every
+    row ranks by the closest spelling it contains. ``params[0]`` must be the
+    MATCH parameter, which the _filters methods put first.
+    """
+    wanted = offset + limit if limit else None
+    rows: Dict[int, tuple] = {}
+    with pool.read() as conn:
+        for tier in tiers:
+            sql_query, tier_params = _page_query(
+                columns, from_clause, conditions, [tier] + params[1:], sort_name, sort, wanted, 0, None
+            )
+            for row in conn.execute(sql_query, tier_params):
+                rows.setdefault(row[0], row)
+            if wanted and len(rows) >= wanted:
+                break
+    return list(rows.values())[offset:wanted]
+
+
+def _stream_rows(sql_query: str, params: List[Any], chunk_size: int) -> Iterator[List[tuple]]:
+    """Yield the rows of a query ``chunk_size`` at a time.
+
+    Streams can outlive the thread that started them, so the cursor runs on a
+    dedicated connection that is closed when the generator finishes.
+    """
+    with pool.dedicated() as conn:
+        cursor = conn.execute(sql_query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+def _fetch_by_ids(columns: str, table: str, ids: Tuple[int, ...]) -> List[tuple]:
+    """Rows for ``ids`` in one IN query, in the order requested; unknown ids are skipped"""
+    ids = tuple(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f"At most {MAX_BATCH_IDS} ids can be fetched at once")
+    if not ids:
+        return []
+    with pool.read() as conn:
+        rows = conn.execute(
+            f"SELECT {columns} FROM {table} p WHERE p.id IN ({', '.join('?' * len(ids))})", ids
+        ).fetchall()
+    position = {row_id: index for index, row_id in enumerate(ids)}
+    return sorted(rows, key=lambda row: position[row[0]])
+
+
+def _neighbour_rows(columns: str, table: str, neighbours: str, item_id: int, limit: int) -> Optional[List[tuple]]:
+    """Rows for the first ``limit`` entries of an item's neighbour list, each ending with its score.
+
+    The lists are precomputed by recommendations.py (migration 10), so this is
+    one primary-key range scan. None if the item does not exist.
+    """
+    with pool.read() as conn:
+        rows = conn.execute(f'''
+            SELECT {columns}, n.score
+            FROM {neighbours} n
+            JOIN {table} p ON p.id = n.neighbour_id
+            WHERE n.item_id = ?
+            ORDER BY n.rank
+            LIMIT ?
+        ''', (item_id, limit)).fetchall()
+        if not rows and conn.execute(f"SELECT 1 FROM {table} WHERE id = ?", (item_id,)).fetchone() is None:
+            return None
+    return rows
+
+
+def _count(from_clause: str, conditions: List[str], params: List[Any]) -> int:
+    """COUNT(*) over the same filters as a page query"""
+    sql_query = f"SELECT COUNT(*){from_clause}"
+    if conditions:
+        sql_query += " WHERE " + " AND ".join(conditions)
+    with pool.read() as conn:
+        return conn.execute(sql_query, params).fetchone()[0]
 
-DATABASE_PATH = os.path.join(os.path.dirname(__file__), "practitioners.db")
 
 class PractitionerDatabase:
-    @staticmethod
-    def _get_connection():
-        """Get database connection"""
-        return sqlite3.connect(DATABASE_PATH)
-    
     @staticmethod
     def initialize_database():
-        """Initialize the database with tables and sample data"""
-        conn = PractitionerDatabase._get_connection()
-        cursor = conn.cursor()
-        
-        # Create practitioners table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS practitioners (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                specialty TEXT NOT NULL,
-                rating REAL NOT NULL,
-                experience TEXT NOT NULL,
-                location TEXT NOT NULL,
-                next_available TEXT NOT NULL,
-                image TEXT NOT NULL
-            )
-        ''')
-        
-        # Check if data already exists
-        cursor.execute("SELECT COUNT(*) FROM practitioners")
-        if cursor.fetchone()[0] == 0:
-            # Insert sample data
-            sample_data = [
-                ("Dr. Priya Sharma", "Ayurvedic Medicine", 4.9, "15 years", "Downtown Wellness Center", "Today 2:00 PM", "https://images.pexels.com/photos/5452293/pexels-photo-5452293.jpeg?auto=compress&cs=tinysrgb&w=400"),
-                ("Dr. Rajesh Patel", "Panchakarma Therapy", 4.8, "12 years", "Holistic Health Hub", "Tomorrow 10:00 AM", "https://images.pexels.com/photos/5452201/pexels-photo-5452201.jpeg?auto=compress&cs=tinysrgb&w=400"),
-                ("Dr. Maya Joshi", "Herbal Medicine", 4.7, "18 years", "Natural Healing Center", "Today 4:30 PM", "https://images.pexels.com/photos/5452274/pexels-photo-5452274.jpeg?auto=compress&cs=tinysrgb&w=400"),
-                ("Dr. Anand Kumar", "Pulse Diagnosis", 4.6, "20 years", "Traditional Healing Center", "Tomorrow 3:00 PM", "https://images.pexels.com/photos/5452268/pexels-photo-5452268.jpeg?auto=compress&cs=tinysrgb&w=400"),
-                ("Dr. Kavitha Nair", "Yoga Therapy", 4.8, "10 years", "Mind-Body Wellness Studio", "Today 6:00 PM", "https://images.pexels.com/photos/5452275/pexels-photo-5452275.jpeg?auto=compress&cs=tinysrgb&w=400")
-            ]
-            
-            cursor.executemany('''
-                INSERT INTO practitioners (name, specialty, rating, experience, location, next_available, image)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', sample_data)
-        
-        conn.commit()
-        conn.close()
-    
+        """Apply schema migrations and insert sample data"""
+        migrate_database()
+
+        with pool.write() as conn:
+            cursor = conn.cursor()
+
+            # Check if data already exists
+            cursor.execute("SELECT COUNT(*) FROM practitioners")
+            if cursor.fetchone()[0] == 0:
+                # Insert sample data
+                sample_data = [
+                    ("Dr. Priya Sharma", "Ayurvedic Medicine", 4.9, "15 years", "Downtown Wellness Center", "https://images.pexels.com/photos/5452293/pexels-photo-5452293.jpeg?auto=compress&cs=tinysrgb&w=400", 37.7793, -122.4193),
+                    ("Dr. Rajesh Patel", "Panchakarma Therapy", 4.8, "12 years", "Holistic Health Hub", "https://images.pexels.com/photos/5452201/pexels-photo-5452201.jpeg?auto=compress&cs=tinysrgb&w=400", 37.8044, -122.2712),
+                    ("Dr. Maya Joshi", "Herbal Medicine", 4.7, "18 years", "Natural Healing Center", "https://images.pexels.com/photos/5452274/pexels-photo-5452274.jpeg?auto=compress&cs=tinysrgb&w=400", 37.4419, -122.1430),
+                    ("Dr. Anand Kumar", "Pulse Diagnosis", 4.6, "20 years", "Traditional Healing Center", "https://images.pexels.com/photos/5452268/pexels-photo-5452268.jpeg?auto=compress&cs=tinysrgb&w=400", 37.3382, -121.8863),
+                    ("Dr. Kavitha Nair", "Yoga Therapy", 4.8, "10 years", "Mind-Body Wellness Studio", "https://images.pexels.com/photos/5452275/pexels-photo-5452275.jpeg?auto=compress&cs=tinysrgb&w=400", 37.7599, -122.4148)
+                ]
+
+                cursor.executemany('''
+                    INSERT INTO practitioners (name, specialty, rating, experience, location, image, latitude, longitude)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', sample_data)
+
+        BookingDatabase.initialize_database()
+        catalog_cache.invalidate("practitioners")
+
     @staticmethod
     def get_all_practitioners() -> List[Practitioner]:
         """Get all practitioners from database"""
-        conn = PractitionerDatabase._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, specialty, rating, experience, location, next_available, image
-            FROM practitioners
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [
-            Practitioner(
-                id=row[0],
-                name=row[1],
-                specialty=row[2],
-                rating=row[3],
-                experience=row[4],
-                location=row[5],
-                nextAvailable=row[6],
-                image=row[7]
-            )
-            for row in rows
-        ]
-    
+        with pool.read() as conn:
+            rows = conn.execute('''
+                SELECT id, name, specialty, rating, experience, location, image, latitude, longitude
+                FROM practitioners
+            ''').fetchall()
+
+        return _practitioners_from_rows(rows)
+
     @staticmethod
     def get_practitioner_by_id(practitioner_id: int) -> Optional[Practitioner]:
         """Get a specific practitioner by ID"""
-        conn = PractitionerDatabase._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, specialty, rating, experience, location, next_available, image
-            FROM practitioners
-            WHERE id = ?
-        ''', (practitioner_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
+        with pool.read() as conn:
+            row = conn.execute('''
+                SELECT id, name, specialty, rating, experience, location, image, latitude, longitude
+                FROM practitioners
+                WHERE id = ?
+            ''', (practitioner_id,)).fetchone()
+
         if row:
-            return Practitioner(
-                id=row[0],
-                name=row[1],
-                specialty=row[2],
-                rating=row[3],
-                experience=row[4],
-                location=row[5],
-                nextAvailable=row[6],
-                image=row[7]
-            )
+            return _practitioners_from_rows([row])[0]
         return None
-    
-    @staticmethod
-    def search_practitioners(specialty: Optional[str] = None, location: Optional[str] = None) -> List[Practitioner]:
-        """Search practitioners by specialty and/or location"""
-        conn = PractitionerDatabase._get_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT id, name, specialty, rating, experience, location, next_available, image
-            FROM practitioners
-            WHERE 1=1
-        '''
-        params = []
-        
-        if specialty:
-            query += " AND specialty LIKE ?"
-            params.append(f"%{specialty}%")
-        
-        if location:
-            query += " AND location LIKE ?"
-            params.append(f"%{location}%")
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [
-            Practitioner(
-                id=row[0],
-                name=row[1],
-                specialty=row[2],
-                rating=row[3],
-                experience=row[4],
-                location=row[5],
-                nextAvailable=row[6],
-                image=row[7]
+
+    @staticmethod
+    def get_practitioners_by_ids(ids: Tuple[int, ...]) -> List[Practitioner]:
+        """Get several practitioners by ID with a single query"""
+        return _practitioners_from_rows(_fetch_by_ids(PRACTITIONER_COLUMNS, "practitioners", ids))
+
+    @staticmethod
+    def get_similar_practitioners(practitioner_id: int, limit: int = 10) -> Optional[List[SimilarPractitioner]]:
+        """Practitioners most like ``practitioner_id``, with their similarity; None if it does not exist"""
+        rows = _neighbour_rows(PRACTITIONER_COLUMNS, "practitioners", "practitioner_neighbours", practitioner_id, limit)
+        if rows is None:
+            return None
+        return _practitioners_from_rows(
+            rows, _similar_practitioner_list, [{"similarity": round(row[-1], 4)} for row in rows]
+        )
+
+    @staticmethod
+    def _filters(
+        specialty: Optional[str], location: Optional[str], query: Optional[str], fuzzy: bool = False,
+        expansion: Optional[FuzzyQuery] = None,
+    ) -> Optional[Tuple[str, List[str], List[Any]]]:
+        """FROM clause, conditions and parameters shared by search and count; None when nothing can match.
+
+        A fuzzy ``query`` matches the terms of ``expansion`` (see fuzzy_expansion).
+        """
+        from_clause = " FROM practitioners p"
+        conditions, params = [], []
+
+        if query:
+            match = match_expression(query, fuzzy, expansion)
+            if match is None:
+                return None
+            from_clause += " JOIN practitioners_fts ON practitioners_fts.rowid = p.id"
+            conditions.append("practitioners_fts MATCH ?")
+            params.append(match)
+
+        for field, text in (("specialty", specialty), ("location", location)):
+            if text:
+                # Substring match over the few distinct values, then an
+                # indexed lookup of the practitioners that have them
+                conditions.append(f'''p.{field} COLLATE NOCASE IN (
+                    SELECT value FROM practitioner_filter_values
+                    WHERE field = '{field}' AND value LIKE ? ESCAPE '\\' AND count > 0
+                )''')
+                params.append(like_contains(text))
+
+        return from_clause, conditions, params
+
+    @staticmethod
+    def search_practitioners(
+        specialty: Optional[str] = None,
+        location: Optional[str] = None,
+        query: Optional[str] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[str] = None,
+        fuzzy: bool = False,
+        expansion: Optional[FuzzyQuery] = UNEXPANDED,
+    ) -> Page:
+        """Search practitioners by specialty, location and/or a full-text query over name and specialty, one page at a time.
+
+        With ``fuzzy`` the query tolerates typos, matching ``expansion`` when
+        given; sorted by relevance, those results rank by spelling similarity
+        and are paged by offset only.
+        """
+        sort_name, sort_option = resolve_sort(sort, PRACTITIONER_SORTS, "relevance" if query else "id")
+        if sort_name == "relevance" and not query:
+            raise ValueError("Sorting by relevance requires a search query")
+
+        expansion = fuzzy_expansion("practitioners", query, fuzzy, expansion)
+        filters = PractitionerDatabase._filters(specialty, location, query, fuzzy, expansion)
+        if filters is None:
+            return Page([], None)
+
+        if fuzzy and sort_name == "relevance":
+            if after:
+                raise ValueError("Fuzzy search results are paged with offset, not cursors")
+            rows = _fetch_fuzzy_page(
+                PRACTITIONER_COLUMNS, *filters, sort_name, sort_option, expansion.tiers, limit, offset
             )
-            for row in rows
-        ]
+            return Page(_practitioners_from_rows(rows), None)
 
+        rows, next_cursor = _fetch_page(PRACTITIONER_COLUMNS, *filters, sort_name, sort_option, limit, offset, after)
+        return Page(
+            _practitioners_from_rows(rows),
+            next_cursor,
+        )
+
+    @staticmethod
+    def stream_practitioners(
+        specialty: Optional[str] = None,
+        location: Optional[str] = None,
+        query: Optional[str] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[str] = None,
+        chunk_size: int = config.STREAM_CHUNK_SIZE,
+    ) -> Iterator[List[Practitioner]]:
+        """Same results as search_practitioners, as an iterator of ``chunk_size`` batches.
+
+        Arguments are checked up front so bad sorts and cursors raise before
+        a response starts streaming.
+        """
+        sort_name, sort_option = resolve_sort(sort, PRACTITIONER_SORTS, "relevance" if query else "id")
+        if sort_name == "relevance" and not query:
+            raise ValueError("Sorting by relevance requires a search query")
+
+        filters = PractitionerDatabase._filters(specialty, location, query)
+        if filters is None:
+            return iter(())
+
+        sql_query, params = _page_query(PRACTITIONER_COLUMNS, *filters, sort_name, sort_option, limit, offset, after)
+        return map(_practitioners_from_rows, _stream_rows(sql_query, params, chunk_size))
+
+    @staticmethod
+    def correct_query(query: str) -> Optional[str]:
+        """The query as fuzzy search reads it, each word replaced by its closest indexed spelling"""
+        expanded = fuzzy_matcher.expand("practitioners", query)
+        return expanded.corrected if expanded else None
 
-class ProductDatabase:
     @staticmethod
-    def _get_connection():
-        """Get database connection"""
-        return sqlite3.connect(DATABASE_PATH)
-    
+    def expand_query(query: str) -> Optional[FuzzyQuery]:
+        """The typo-tolerant expansion of ``query`` to pass to searches and counts; None if some word resembles nothing"""
+        return fuzzy_matcher.expand("practitioners", query)
+
+    @staticmethod
+    def count_practitioners(
+        specialty: Optional[str] = None,
+        location: Optional[str] = None,
+        query: Optional[str] = None,
+        fuzzy: bool = False,
+        expansion: Optional[FuzzyQuery] = UNEXPANDED,
+    ) -> int:
+        """Count practitioners matching the same filters as search_practitioners"""
+        expansion = fuzzy_expansion("practitioners", query, fuzzy, expansion)
+        filters = PractitionerDatabase._filters(specialty, location, query, fuzzy, expansion)
+        if filters is None:
+            return 0
+        return _count(*filters)
+
+    @staticmethod
+    def find_nearby(
+        latitude: float,
+        longitude: float,
+        radius_km: float = 25.0,
+        specialty: Optional[str] = None,
+        sort: Optional[str] = None,
+        limit: int = 20,
+    ) -> Tuple[List[NearbyPractitioner], int]:
+        """Practitioners within ``radius_km`` of a point, with their distance, and how many there are in all.
+
+        The R*Tree narrows the search to the radius's bounding box, and exact
+        distances are computed only for the practitioners inside it.
+        """
+        sort = sort or "distance"
+        if sort not in NEARBY_ORDERS:
+            raise ValueError(f"Unknown sort '{sort}'. Valid options: {', '.join(sorted(NEARBY_ORDERS))}")
+        order = NEARBY_ORDERS[sort]
+
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+        conditions = ["g.min_lat <= ?", "g.max_lat >= ?", "g.min_lng <= ?", "g.max_lng >= ?", "distance <= ?"]
+        params: List[Any] = [latitude, longitude, max_lat, min_lat, max_lng, min_lng, radius_km]
+        if specialty:
+            conditions.append("+p.specialty LIKE ? ESCAPE '\\'")
+            params.append(like_contains(specialty))
+        params.append(limit)
+
+        # Each candidate's distance is computed once (MATERIALIZED) and the
+        # count reuses the same rows; the page's id is renamed so ``order``
+        # resolves to the same columns in the outer query
+        with pool.read() as conn:
+            rows = conn.execute(f'''
+                WITH candidates AS MATERIALIZED (
+                    SELECT p.id, p.rating, distance_km(?, ?, p.latitude, p.longitude) AS distance
+                    FROM practitioners_geo g
+                    JOIN practitioners p ON p.id = g.id
+                    WHERE {" AND ".join(conditions)}
+                ),
+                page AS (
+                    SELECT id AS practitioner_id, distance FROM candidates ORDER BY {order} LIMIT ?
+                )
+                SELECT {PRACTITIONER_COLUMNS}, distance, (SELECT COUNT(*) FROM candidates)
+                FROM page
+                JOIN practitioners p ON p.id = page.practitioner_id
+                ORDER BY {order}
+            ''', params).fetchall()
+
+        practitioners = _practitioners_from_rows(
+            rows, _nearby_practitioner_list, [{"distanceKm": round(row[-2], 2)} for row in rows]
+        )
+        return practitioners, rows[0][-1] if rows else 0
+
+
+class ProductDatabase:
     @staticmethod
     def initialize_database():
-        """Initialize the products database with tables and sample data"""
-        conn = ProductDatabase._get_connection()
-        cursor = conn.cursor()
-        
-        # Create products table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT NOT NULL,
-                price REAL NOT NULL,
-                original_price REAL,
-                rating REAL NOT NULL,
-                reviews INTEGER NOT NULL,
-                image TEXT NOT NULL,
-                category TEXT NOT NULL,
-                in_stock BOOLEAN NOT NULL DEFAULT 1
-            )
-        ''')
-        
-        # Check if data already exists
-        cursor.execute("SELECT COUNT(*) FROM products")
-        if cursor.fetchone()[0] == 0:
-            # Insert sample data
-            sample_data = [
-                ("Organic Turmeric Powder", "Premium quality organic turmeric powder with high curcumin content", 24.99, 29.99, 4.8, 156, "https://images.pexels.com/photos/4198015/pexels-photo-4198015.jpeg?auto=compress&cs=tinysrgb&w=400", "Herbs & Spices", True),
-                ("Ashwagandha Capsules", "Natural stress relief and energy support supplement", 39.99, None, 4.9, 203, "https://images.pexels.com/photos/3683074/pexels-photo-3683074.jpeg?auto=compress&cs=tinysrgb&w=400", "Supplements", True),
-                ("Herbal Tea Blend", "Calming blend of chamomile, lavender, and holy basil", 18.99, 22.99, 4.7, 89, "https://images.pexels.com/photos/1417945/pexels-photo-1417945.jpeg?auto=compress&cs=tinysrgb&w=400", "Teas", True),
-                ("Neem Oil", "Pure cold-pressed neem oil for skin and hair care", 16.99, None, 4.6, 124, "https://images.pexels.com/photos/4041392/pexels-photo-4041392.jpeg?auto=compress&cs=tinysrgb&w=400", "Oils", False),
-                ("Triphala Powder", "Traditional Ayurvedic digestive support formula", 21.99, 26.99, 4.8, 167, "https://images.pexels.com/photos/4198015/pexels-photo-4198015.jpeg?auto=compress&cs=tinysrgb&w=400", "Herbs & Spices", True),
-                ("Meditation Cushion", "Comfortable organic cotton meditation cushion", 45.99, None, 4.9, 78, "https://images.pexels.com/photos/3822622/pexels-photo-3822622.jpeg?auto=compress&cs=tinysrgb&w=400", "Accessories", True),
-                ("Brahmi Capsules", "Memory and cognitive support supplement", 32.99, 37.99, 4.7, 142, "https://images.pexels.com/photos/3683074/pexels-photo-3683074.jpeg?auto=compress&cs=tinysrgb&w=400", "Supplements", True),
-                ("Ginger Tea", "Warming digestive tea blend with organic ginger", 14.99, None, 4.5, 95, "https://images.pexels.com/photos/1417945/pexels-photo-1417945.jpeg?auto=compress&cs=tinysrgb&w=400", "Teas", True),
-                ("Sesame Oil", "Cold-pressed sesame oil for massage and cooking", 19.99, 24.99, 4.6, 88, "https://images.pexels.com/photos/4041392/pexels-photo-4041392.jpeg?auto=compress&cs=tinysrgb&w=400", "Oils", True),
-                ("Yoga Mat", "Non-slip eco-friendly yoga mat", 59.99, None, 4.8, 234, "https://images.pexels.com/photos/3822622/pexels-photo-3822622.jpeg?auto=compress&cs=tinysrgb&w=400", "Accessories", True)
-            ]
-            
-            cursor.executemany('''
-                INSERT INTO products (name, description, price, original_price, rating, reviews, image, category, in_stock)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', sample_data)
-        
-        conn.commit()
-        conn.close()
-    
+        """Apply schema migrations and insert sample products"""
+        migrate_database()
+
+        with pool.write() as conn:
+            cursor = conn.cursor()
+
+            # Check if data already exists
+            cursor.execute("SELECT COUNT(*) FROM products")
+            if cursor.fetchone()[0] == 0:
+                # Insert sample data
+                sample_data = [
+                    ("Organic Turmeric Powder", "Premium quality organic turmeric powder with high curcumin content", 24.99, 29.99, 4.8, 156, "https://images.pexels.com/photos/4198015/pexels-photo-4198015.jpeg?auto=compress&cs=tinysrgb&w=400", "Herbs & Spices", True),
+                    ("Ashwagandha Capsules", "Natural stress relief and energy support supplement", 39.99, None, 4.9, 203, "https://images.pexels.com/photos/3683074/pexels-photo-3683074.jpeg?auto=compress&cs=tinysrgb&w=400", "Supplements", True),
+                    ("Herbal Tea Blend", "Calming blend of chamomile, lavender, and holy basil", 18.99, 22.99, 4.7, 89, "https://images.pexels.com/photos/1417945/pexels-photo-1417945.jpeg?auto=compress&cs=tinysrgb&w=400", "Teas", True),
+                    ("Neem Oil", "Pure cold-pressed neem oil for skin and hair care", 16.99, None, 4.6, 124, "https://images.pexels.com/photos/4041392/pexels-photo-4041392.jpeg?auto=compress&cs=tinysrgb&w=400", "Oils", False),
+                    ("Triphala Powder", "Traditional Ayurvedic digestive support formula", 21.99, 26.99, 4.8, 167, "https://images.pexels.com/photos/4198015/pexels-photo-4198015.jpeg?auto=compress&cs=tinysrgb&w=400", "Herbs & Spices", True),
+                    ("Meditation Cushion", "Comfortable organic cotton meditation cushion", 45.99, None, 4.9, 78, "https://images.pexels.com/photos/3822622/pexels-photo-3822622.jpeg?auto=compress&cs=tinysrgb&w=400", "Accessories", True),
+                    ("Brahmi Capsules", "Memory and cognitive support supplement", 32.99, 37.99, 4.7, 142, "https://images.pexels.com/photos/3683074/pexels-photo-3683074.jpeg?auto=compress&cs=tinysrgb&w=400", "Supplements", True),
+                    ("Ginger Tea", "Warming digestive tea blend with organic ginger", 14.99, None, 4.5, 95, "https://images.pexels.com/photos/1417945/pexels-photo-1417945.jpeg?auto=compress&cs=tinysrgb&w=400", "Teas", True),
+                    ("Sesame Oil", "Cold-pressed sesame oil for massage and cooking", 19.99, 24.99, 4.6, 88, "https://images.pexels.com/photos/4041392/pexels-photo-4041392.jpeg?auto=compress&cs=tinysrgb&w=400", "Oils", True),
+                    ("Yoga Mat", "Non-slip eco-friendly yoga mat", 59.99, None, 4.8, 234, "https://images.pexels.com/photos/3822622/pexels-photo-3822622.jpeg?auto=compress&cs=tinysrgb&w=400", "Accessories", True)
+                ]
+
+                cursor.executemany('''
+                    INSERT INTO products (name, description, price, original_price, rating, reviews, image, category, in_stock)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', sample_data)
+
+        catalog_cache.invalidate("products")
+
     @staticmethod
     def get_all_products() -> List[Product]:
         """Get all products from database"""
-        conn = ProductDatabase._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, description, price, original_price, rating, reviews, image, category, in_stock
-            FROM products
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [
-            Product(
-                id=row[0],
-                name=row[1],
-                description=row[2],
-                price=row[3],
-                originalPrice=row[4],
-                rating=row[5],
-                reviews=row[6],
-                image=row[7],
-                category=row[8],
-                inStock=bool(row[9])
-            )
-            for row in rows
-        ]
-    
+        with pool.read() as conn:
+            rows = conn.execute('''
+                SELECT id, name, description, price, original_price, rating, reviews, image, category, in_stock
+                FROM products
+            ''').fetchall()
+
+        return _products_from_rows(rows)
+
     @staticmethod
     def get_product_by_id(product_id: int) -> Optional[Product]:
         """Get a specific product by ID"""
-        conn = ProductDatabase._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, description, price, original_price, rating, reviews, image, category, in_stock
-            FROM products
-            WHERE id = ?
-        ''', (product_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
+        with pool.read() as conn:
+            row = conn.execute('''
+                SELECT id, name, description, price, original_price, rating, reviews, image, category, in_stock
+                FROM products
+                WHERE id = ?
+            ''', (product_id,)).fetchone()
+
         if row:
-            return Product(
-                id=row[0],
-                name=row[1],
-                description=row[2],
-                price=row[3],
-                originalPrice=row[4],
-                rating=row[5],
-                reviews=row[6],
-                image=row[7],
-                category=row[8],
-                inStock=bool(row[9])
-            )
+            return _products_from_rows([row])[0]
         return None
-    
-    @staticmethod
-    def search_products(category: Optional[str] = None, query: Optional[str] = None, in_stock_only: bool = False) -> List[Product]:
-        """Search products by category, name, or description"""
-        conn = ProductDatabase._get_connection()
-        cursor = conn.cursor()
-        
-        sql_query = '''
-            SELECT id, name, description, price, original_price, rating, reviews, image, category, in_stock
-            FROM products
-            WHERE 1=1
-        '''
-        params = []
-        
-        if category:
-            sql_query += " AND category LIKE ?"
-            params.append(f"%{category}%")
-        
+
+    @staticmethod
+    def get_products_by_ids(ids: Tuple[int, ...]) -> List[Product]:
+        """Get several products by ID with a single query"""
+        return _products_from_rows(_fetch_by_ids(PRODUCT_COLUMNS, "products", ids))
+
+    @staticmethod
+    def get_related_products(product_id: int, limit: int = 10) -> Optional[List[RelatedProduct]]:
+        """Products most like ``product_id``, with their similarity; None if it does not exist"""
+        rows = _neighbour_rows(PRODUCT_COLUMNS, "products", "product_neighbours", product_id, limit)
+        if rows is None:
+            return None
+        return _products_from_rows(rows, _related_product_list, [{"similarity": round(row[-1], 4)} for row in rows])
+
+    @staticmethod
+    def _filters(
+        category: Optional[str], query: Optional[str], in_stock_only: bool, fuzzy: bool = False,
+        expansion: Optional[FuzzyQuery] = None,
+    ) -> Optional[Tuple[str, List[str], List[Any]]]:
+        """FROM clause, conditions and parameters shared by search and count; None when nothing can match.
+
+        A fuzzy ``query`` matches the terms of ``expansion`` (see fuzzy_expansion).
+        """
+        from_clause = " FROM products p"
+        conditions, params = [], []
+
         if query:
-            sql_query += " AND (name LIKE ? OR description LIKE ?)"
-            params.extend([f"%{query}%", f"%{query}%"])
-        
-        if in_stock_only:
-            sql_query += " AND in_stock = 1"
-        
-        cursor.execute(sql_query, params)
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [
-            Product(
-                id=row[0],
-                name=row[1],
-                description=row[2],
-                price=row[3],
-                originalPrice=row[4],
-                rating=row[5],
-                reviews=row[6],
-                image=row[7],
-                category=row[8],
-                inStock=bool(row[9])
+            match = match_expression(query, fuzzy, expansion)
+            if match is None:
+                return None
+            from_clause += " JOIN products_fts ON products_fts.rowid = p.id"
+            conditions.append("products_fts MATCH ?")
+            params.append(match)
+
+        if category:
+            # Substring match over the category names, then an indexed lookup
+            conditions.append(
+                "p.category COLLATE NOCASE IN"
+                " (SELECT category FROM product_facets WHERE category LIKE ? ESCAPE '\\' AND count > 0)"
             )
-            for row in rows
-        ]
-    
+            params.append(like_contains(category))
+
+        if in_stock_only:
+            conditions.append("p.in_stock = 1")
+
+        return from_clause, conditions, params
+
+    @staticmethod
+    def search_products(
+        category: Optional[str] = None,
+        query: Optional[str] = None,
+        in_stock_only: bool = False,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[str] = None,
+        fuzzy: bool = False,
+        expansion: Optional[FuzzyQuery] = UNEXPANDED,
+    ) -> Page:
+        """Search products by category, stock and/or a full-text query over name, description and category, one page at a time.
+
+        With ``fuzzy`` the query tolerates typos, matching ``expansion`` when
+        given; sorted by relevance, those results rank by spelling similarity
+        and are paged by offset only.
+        """
+        sort_name, sort_option = resolve_sort(sort, PRODUCT_SORTS, "relevance" if query else "id")
+        if sort_name == "relevance" and not query:
+            raise ValueError("Sorting by relevance requires a search query")
+
+        expansion = fuzzy_expansion("products", query, fuzzy, expansion)
+        filters = ProductDatabase._filters(category, query, in_stock_only, fuzzy, expansion)
+        if filters is None:
+            return Page([], None)
+
+        if fuzzy and sort_name == "relevance":
+            if after:
+                raise ValueError("Fuzzy search results are paged with offset, not cursors")
+            rows = _fetch_fuzzy_page(PRODUCT_COLUMNS, *filters, sort_name, sort_option, expansion.tiers, limit, offset)
+            return Page(_products_from_rows(rows), None)
+
+        rows, next_cursor = _fetch_page(PRODUCT_COLUMNS, *filters, sort_name, sort_option, limit, offset, after)
+        return Page(
+            _products_from_rows(rows),
+            next_cursor,
+        )
+
+    @staticmethod
+    def stream_products(
+        category: Optional[str] = None,
+        query: Optional[str] = None,
+        in_stock_only: bool = False,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[str] = None,
+        chunk_size: int = config.STREAM_CHUNK_SIZE,
+    ) -> Iterator[List[Product]]:
+        """Same results as search_products, as an iterator of ``chunk_size`` batches"""
+        sort_name, sort_option = resolve_sort(sort, PRODUCT_SORTS, "relevance" if query else "id")
+        if sort_name == "relevance" and not query:
+            raise ValueError("Sorting by relevance requires a search query")
+
+        filters = ProductDatabase._filters(category, query, in_stock_only)
+        if filters is None:
+            return iter(())
+
+        sql_query, params = _page_query(PRODUCT_COLUMNS, *filters, sort_name, sort_option, limit, offset, after)
+        return map(_products_from_rows, _stream_rows(sql_query, params, chunk_size))
+
+    @staticmethod
+    def correct_query(query: str) -> Optional[str]:
+        """The query as fuzzy search reads it, each word replaced by its closest indexed spelling"""
+        expanded = fuzzy_matcher.expand("products", query)
+        return expanded.corrected if expanded else None
+
+    @staticmethod
+    def expand_query(query: str) -> Optional[FuzzyQuery]:
+        """The typo-tolerant expansion of ``query`` to pass to searches and counts; None if some word resembles nothing"""
+        return fuzzy_matcher.expand("products", query)
+
+    @staticmethod
+    def count_products(
+        category: Optional[str] = None,
+        query: Optional[str] = None,
+        in_stock_only: bool = False,
+        fuzzy: bool = False,
+        expansion: Optional[FuzzyQuery] = UNEXPANDED,
+    ) -> int:
+        """Count products matching the same filters as search_products"""
+        expansion = fuzzy_expansion("products", query, fuzzy, expansion)
+        filters = ProductDatabase._filters(category, query, in_stock_only, fuzzy, expansion)
+        if filters is None:
+            return 0
+        return _count(*filters)
+
+    @staticmethod
+    def get_facets(
+        facets: Tuple[str, ...],
+        category: Optional[str] = None,
+        query: Optional[str] = None,
+        in_stock_only: bool = False,
+        fuzzy: bool = False,
+        expansion: Optional[FuzzyQuery] = UNEXPANDED,
+    ) -> Tuple[ProductFacets, int]:
+        """Facet counts for a product search, and the search's total.
+
+        Each facet applies every filter except its own, so the category
+        counts show what picking another category would return. All of them
+        come from one set of (category, in_stock, price bucket) counts: the
+        product_facets summary table, or one grouped pass over the matches
+        of a text query.
+        """
+        unknown = [name for name in facets if name not in PRODUCT_FACETS]
+        if unknown:
+            raise ValueError(f"Unknown facet '{unknown[0]}'. Valid facets: {', '.join(PRODUCT_FACETS)}")
+
+        expansion = fuzzy_expansion("products", query, fuzzy, expansion)
+        filters = ProductDatabase._filters(None, query, False, fuzzy, expansion)
+        groups = []
+        if filters is not None and query:
+            from_clause, conditions, params = filters
+            with pool.read() as conn:
+                groups = conn.execute(f'''
+                    SELECT p.category, p.in_stock, {price_bucket_sql("p.price")}, COUNT(*){from_clause}
+                    WHERE {" AND ".join(conditions)}
+                    GROUP BY p.category COLLATE NOCASE, p.in_stock, 3
+                ''', params).fetchall()
+        elif filters is not None:
+            with pool.read() as conn:
+                groups = conn.execute(
+                    "SELECT category, in_stock, price_bucket, count FROM product_facets WHERE count > 0"
+                ).fetchall()
+
+        total = 0
+        categories = {}
+        prices = [0] * (len(PRICE_BUCKET_EDGES) + 1)
+        stock = [0, 0]
+        for name, in_stock, bucket, count in groups:
+            # SQLite's NOCASE folds ASCII letters only
+            key = name.encode().lower()
+            in_category = not category or category.encode().lower() in key
+            stocked = bool(in_stock) or not in_stock_only
+            if in_category and stocked:
+                total += count
+                prices[bucket] += count
+            if stocked:
+                categories.setdefault(key, [name, 0])[1] += count
+            if in_category:
+                stock[bool(in_stock)] += count
+
+        result = ProductFacets()
+        if "category" in facets:
+            result.category = [
+                ProductCategory(name=name, count=count)
+                for _, (name, count) in sorted(categories.items()) if count
+            ]
+        if "price" in facets:
+            bounds = (0,) + PRICE_BUCKET_EDGES
+            result.price = [
+                PriceBucket(min=low, max=high, count=count)
+                for low, high, count in zip(bounds, PRICE_BUCKET_EDGES + (None,), prices)
+            ]
+        if "in_stock" in facets:
+            result.inStock = StockCounts(inStock=stock[1], outOfStock=stock[0])
+        return result, total
+
     @staticmethod
     def get_categories() -> List[ProductCategory]:
         """Get all product categories with counts"""
-        conn = ProductDatabase._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT category, COUNT(*) as count
-            FROM products
-            GROUP BY category
-            ORDER BY category
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
+        with pool.read() as conn:
+            rows = conn.execute('''
+                SELECT category, SUM(count) as count
+                FROM product_facets
+                GROUP BY category
+                HAVING SUM(count) > 0
+                ORDER BY category
+            ''').fetchall()
+
         return [
             ProductCategory(name=row[0], count=row[1])
             for row in rows
-        ]
\ No newline at end of file
+        ]
+
+
+SLOT_FIELDS = ("id", "practitionerId", "startsAt", "endsAt")
+_slot_list = TypeAdapter(List[Slot])
+
+SCHEDULE_SLOT_HOURS = (9, 10, 11, 14, 15, 16, 17)
+SLOT_LENGTH = timedelta(hours=1)
+
+
+class SlotUnavailableError(Exception):
+    """The slot exists but is already booked or has started"""
+
+
+class BookingDatabase:
+    @staticmethod
+    def initialize_database():
+        """Publish the schedule, which gives a new database its first slots"""
+        BookingDatabase.publish_schedule()
+
+    @staticmethod
+    def publish_schedule(days: int = config.SCHEDULE_DAYS) -> ScheduleReport:
+        """Publish every practitioner's slots for the next ``days`` days and drop open slots that have started.
+
+        Each practitioner gets the clinic hours that come after their latest
+        slot, so a practitioner without slots (new or imported) gets the whole
+        window and a repeat run only adds the days that came into range. A
+        rule on the practitioner and the slot's date and hour leaves some
+        hours out, so schedules differ but do not change between runs.
+        """
+        now = availability_now()
+        today = datetime.combine(now.date(), datetime.min.time())
+        times = []
+        for day in range(days):
+            date = today + timedelta(days=day)
+            for index, hour in enumerate(SCHEDULE_SLOT_HOURS):
+                start = date + timedelta(hours=hour)
+                if start >= now:
+                    serial = date.toordinal() * len(SCHEDULE_SLOT_HOURS) + index
+                    times.append((slot_time(start), slot_time(start + SLOT_LENGTH), serial))
+
+        with pool.write() as conn:
+            added = conn.execute('''
+                INSERT INTO slots (practitioner_id, starts_at, ends_at)
+                WITH times AS MATERIALIZED (
+                    SELECT json_extract(value, '$[0]') AS starts_at, json_extract(value, '$[1]') AS ends_at,
+                        json_extract(value, '$[2]') AS serial
+                    FROM json_each(?)
+                ), latest AS MATERIALIZED (
+                    SELECT p.id, (SELECT MAX(s.starts_at) FROM slots s WHERE s.practitioner_id = p.id) AS starts_at
+                    FROM practitioners p
+                )
+                SELECT l.id, t.starts_at, t.ends_at
+                FROM latest l, times t
+                WHERE t.starts_at > COALESCE(l.starts_at, '')
+                    AND (l.id * 5 + t.serial) % 4 != 0  -- leave gaps so schedules differ
+                ON CONFLICT DO NOTHING
+            ''', (json.dumps(times),)).rowcount
+            # Nobody can book these any more; booked slots stay with their bookings
+            removed = conn.execute(
+                "DELETE FROM slots WHERE booked = 0 AND starts_at < ?", (slot_time(now),)
+            ).rowcount
+
+        return ScheduleReport(days=days, added=added, removed=removed)
+
+    @staticmethod
+    def find_open_slots(
+        specialty: Optional[str] = None,
+        practitioner_id: Optional[int] = None,
+        days: int = 7,
+        limit: int = 10,
+    ) -> List[Slot]:
+        """Earliest open slots starting within the next ``days`` days, optionally for one practitioner or specialty.
+
+        Ties on start time are broken by practitioner, which is unique per
+        start time, so idx_slots_open returns rows already in order.
+        """
+        now = availability_now()
+        from_clause = " FROM slots s"
+        conditions = ["s.booked = 0", "s.starts_at >= ?", "s.starts_at < ?"]
+        params: List[Any] = [slot_time(now), slot_time(now + timedelta(days=days))]
+
+        if practitioner_id is not None:
+            conditions.append("s.practitioner_id = ?")
+            params.append(practitioner_id)
+
+        if specialty:
+            # The unary + keeps the planner walking open slots in time order
+            # and stopping at the limit, instead of sorting every open slot
+            # of every matching practitioner
+            from_clause += " JOIN practitioners p ON p.id = s.practitioner_id"
+            conditions.append("+p.specialty LIKE ? ESCAPE '\\'")
+            params.append(like_contains(specialty))
+
+        params.append(limit)
+        with pool.read() as conn:
+            rows = conn.execute(
+                f"SELECT s.id, s.practitioner_id, s.starts_at, s.ends_at{from_clause}"
+                f" WHERE {' AND '.join(conditions)} ORDER BY s.starts_at, s.practitioner_id LIMIT ?",
+                params,
+            ).fetchall()
+
+        return build_models(_slot_list, [dict(zip(SLOT_FIELDS, row)) for row in rows])
+
+    @staticmethod
+    def book_slot(slot_id: int, patient_name: str) -> Optional[Booking]:
+        """Reserve an open slot; None if it does not exist.
+
+        The claim is a single conditional UPDATE inside a short immediate
+        transaction, so racing clients serialize on SQLite's write lock and
+        exactly one of them sees the slot open. Attempts on slots that are
+        already gone are turned away by a plain read without queueing for
+        that lock, except while reads come from a snapshot: a slot cancelled
+        since it was taken would still look booked there.
+        """
+        now = slot_time(datetime.now())
+        if not pool.reads_from_snapshot:
+            with pool.read() as conn:
+                slot = conn.execute("SELECT booked, starts_at FROM slots WHERE id = ?", (slot_id,)).fetchone()
+            if slot is None:
+                return None
+            if slot[0] or slot[1] < now:
+                raise SlotUnavailableError(f"Slot {slot_id} is no longer available")
+
+        with pool.write() as conn:
+            claimed = conn.execute('''
+                UPDATE slots SET booked = 1
+                WHERE id = ? AND booked = 0 AND starts_at >= ?
+                RETURNING practitioner_id, starts_at, ends_at
+            ''', (slot_id, now)).fetchall()
+            if not claimed:
+                if conn.execute("SELECT 1 FROM slots WHERE id = ?", (slot_id,)).fetchone() is None:
+                    return None
+                raise SlotUnavailableError(f"Slot {slot_id} is no longer available")
+
+            practitioner_id, starts_at, ends_at = claimed[0]
+            booking_id = conn.execute(
+                "INSERT INTO bookings (slot_id, practitioner_id, patient_name) VALUES (?, ?, ?)",
+                (slot_id, practitioner_id, patient_name),
+            ).lastrowid
+
+        return Booking(
+            id=booking_id,
+            slotId=slot_id,
+            practitionerId=practitioner_id,
+            startsAt=starts_at,
+            endsAt=ends_at,
+            patientName=patient_name,
+        )
+
+    @staticmethod
+    def cancel_booking(booking_id: int) -> bool:
+        """Cancel a booking and reopen its slot; False if there is no such booking"""
+        with pool.write() as conn:
+            deleted = conn.execute("DELETE FROM bookings WHERE id = ? RETURNING slot_id", (booking_id,)).fetchall()
+            if not deleted:
+                return False
+            conn.execute("UPDATE slots SET booked = 0 WHERE id = ?", (deleted[0][0],))
+        return True
+
+
+ANALYTICS_DIMENSIONS = ("all", "specialty", "practitioner")
+MAX_ANALYTICS_PERIODS = 366
+
+
+def rollup_periods(grain: str, count: int, end: Optional[date] = None) -> List[str]:
+    """The ``count`` periods up to and including the one containing ``end`` (default today, UTC), oldest first"""
+    if grain not in ROLLUP_GRAINS:
+        raise ValueError(f"Invalid grain '{grain}'. Valid grains: {', '.join(ROLLUP_GRAINS)}")
+    if not 1 <= count <= MAX_ANALYTICS_PERIODS:
+        raise ValueError(f"periods must be between 1 and {MAX_ANALYTICS_PERIODS}")
+    end = end or datetime.now(timezone.utc).date()
+    if grain == "week":
+        end -= timedelta(days=end.weekday())
+    step = timedelta(days=7 if grain == "week" else 1)
+    return [(end - step * i).isoformat() for i in range(count - 1, -1, -1)]
+
+
+def _category_point(period: str, row: tuple) -> CategoryPoint:
+    products, in_stock, price_sum, rating_sum, reviews = row
+    return CategoryPoint(
+        period=period,
+        products=products,
+        inStock=in_stock,
+        averagePrice=round(price_sum / products, 2) if products else None,
+        averageRating=round(rating_sum / products, 2) if products else None,
+        reviews=reviews,
+    )
+
+
+class AnalyticsDatabase:
+    """Dashboard figures read from the rollup tables of migration 8.
+
+    Every query reads one primary-key range of at most MAX_ANALYTICS_PERIODS
+    periods, so response time depends on the window asked for, not on how
+    much history has accumulated.
+    """
+
+    @staticmethod
+    def get_booking_series(grain: str = "day", periods: int = 14, by: str = "all", key: Optional[str] = None) -> BookingAnalytics:
+        """Bookings and cancellations per period, overall or per specialty or practitioner.
+
+        Each series has a point for every period, zero where nothing happened.
+        ``key`` picks one specialty or practitioner id; it is required when
+        ``by`` is "practitioner".
+        """
+        if by not in ANALYTICS_DIMENSIONS:
+            raise ValueError(f"Invalid dimension '{by}'. Valid dimensions: {', '.join(ANALYTICS_DIMENSIONS)}")
+        if by == "practitioner" and not key:
+            raise ValueError("practitioner_id is required for practitioner series")
+        labels = rollup_periods(grain, periods)
+
+        conditions = ["grain = ?", "dimension = ?", "period BETWEEN ? AND ?"]
+        params: List[Any] = [grain, by, labels[0], labels[-1]]
+        if key is not None and by != "all":
+            conditions.append("key = ?")
+            params.append(key)
+        with pool.read() as conn:
+            rows = conn.execute(
+                f"SELECT key, period, booked, cancelled FROM booking_rollups WHERE {' AND '.join(conditions)}",
+                params,
+            ).fetchall()
+
+        counts: dict = {}
+        for row_key, period, booked, cancelled in rows:
+            counts.setdefault(row_key, {})[period] = (booked, cancelled)
+        if not counts and (by == "all" or key):
+            counts["" if by == "all" else key] = {}
+        series = []
+        for row_key, values in sorted(counts.items()):
+            points = []
+            for period in labels:
+                booked, cancelled = values.get(period, (0, 0))
+                points.append(BookingPoint(period=period, booked=booked, cancelled=cancelled))
+            series.append(BookingSeries(key=row_key, points=points))
+        return BookingAnalytics(grain=grain, by=by, periods=labels, series=series)
+
+    @staticmethod
+    def get_top_practitioners(grain: str = "week", period: Optional[str] = None, limit: int = 10) -> TopPractitioners:
+        """Practitioners with the most bookings in one period (default the current one)"""
+        if period is not None:
+            try:
+                day = date.fromisoformat(period)
+            except ValueError:
+                raise ValueError("period must be a date in YYYY-MM-DD format")
+        else:
+            day = None
+        label = rollup_periods(grain, 1, day)[0]
+
+        with pool.read() as conn:
+            rows = conn.execute('''
+                SELECT CAST(r.key AS INTEGER), p.name, p.specialty, r.booked, r.cancelled
+                FROM booking_rollups r
+                LEFT JOIN practitioners p ON p.id = CAST(r.key AS INTEGER)
+                WHERE r.grain = ? AND r.dimension = 'practitioner' AND r.period = ? AND r.booked > 0
+                ORDER BY r.booked DESC, r.cancelled, 1
+                LIMIT ?
+            ''', (grain, label, limit)).fetchall()
+
+        return TopPractitioners(grain=grain, period=label, practitioners=[
+            PractitionerRanking(practitionerId=row[0], name=row[1], specialty=row[2], booked=row[3], cancelled=row[4])
+            for row in rows
+        ])
+
+    @staticmethod
+    def get_category_series(grain: str = "day", periods: int = 14, category: Optional[str] = None) -> CategoryAnalytics:
+        """Product count, stock, average price and rating and review total per category and period.
+
+        Past periods come from the snapshots in category_rollups, carried
+        forward over periods that have none; the current period is read live
+        from category_stats.
+        """
+        labels = rollup_periods(grain, periods)
+        filter_sql, filter_params = (" AND category = ?", [category]) if category else ("", [])
+        with pool.read() as conn:
+            snapshots = conn.execute(
+                "SELECT period, category, products, in_stock, price_sum, rating_sum, reviews FROM category_rollups"
+                f" WHERE grain = ? AND period >= ? AND period < ?{filter_sql}",
+                [grain, labels[0], labels[-1]] + filter_params,
+            ).fetchall()
+            live = conn.execute(
+                "SELECT category, products, in_stock, price_sum, rating_sum, reviews FROM category_stats"
+                f" WHERE 1{filter_sql}",
+                filter_params,
+            ).fetchall()
+
+        by_category: dict = {}
+        for period, name, *values in snapshots:
+            by_category.setdefault(name, {})[period] = tuple(values)
+        for name, *values in live:
+            by_category.setdefault(name, {})[labels[-1]] = tuple(values)
+
+        series = []
+        for name, values in sorted(by_category.items(), key=lambda item: item[0].lower()):
+            points, last = [], None
+            for period in labels:
+                last = values.get(period, last)
+                if last is not None:
+                    points.append(_category_point(period, last))
+            if any(point.products for point in points):
+                series.append(CategorySeries(category=name, points=points))
+        return CategoryAnalytics(grain=grain, periods=labels, series=series)
+
+    @staticmethod
+    def snapshot_categories() -> int:
+        """Copy the live per-category figures into the current day and week; returns the categories written"""
+        with pool.write() as conn:
+            written = 0
+            for grain in ROLLUP_GRAINS:
+                written = conn.execute(f'''
+                    INSERT INTO category_rollups (grain, period, category, products, in_stock, price_sum, rating_sum, reviews)
+                    SELECT ?, {rollup_period_sql(grain, "'now'")}, category, products, in_stock, price_sum, rating_sum, reviews
+                    FROM category_stats
+                    WHERE true
+                    ON CONFLICT DO UPDATE SET
+                        products = excluded.products, in_stock = excluded.in_stock, price_sum = excluded.price_sum,
+                        rating_sum = excluded.rating_sum, reviews = excluded.reviews
+                ''', (grain,)).rowcount
+        return written
+
+
+db_executor = (
+    ThreadPoolExecutor(max_workers=config.DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+    if config.DB_EXECUTOR_WORKERS > 0
+    else None
+)
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database call inline, or on ``db_executor`` when DB_EXECUTOR_WORKERS sets one up"""
+    if db_executor is None:
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(func, *args, **kwargs))
+
+
+class AsyncDatabase:
+    """Awaitable facade over a database class.
+
+    Every method of the wrapped class becomes a coroutine that runs through
+    ``run_db``, on the bounded ``db_executor`` when one is configured.
+    """
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        method = getattr(self._target, name)
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await run_db(method, *args, **kwargs)
+
+        setattr(self, name, call)
+        return call
+
+
+# Tracing sits under the cache, so it times the calls that reach SQLite
+TracedPractitionerDatabase = TracedDatabase(PractitionerDatabase, "practitioners")
+TracedProductDatabase = TracedDatabase(ProductDatabase, "products")
+TracedBookingDatabase = TracedDatabase(BookingDatabase, "bookings")
+TracedAnalyticsDatabase = TracedDatabase(AnalyticsDatabase, "analytics")
+
+CachedPractitionerDatabase = CachedDatabase(TracedPractitionerDatabase, "practitioners", {
+    "get_practitioner_by_id": config.CACHE_TTL_ITEMS,
+    "get_practitioners_by_ids": config.CACHE_TTL_ITEMS,
+    "get_similar_practitioners": config.CACHE_TTL_LISTS,
+    "search_practitioners": config.CACHE_TTL_LISTS,
+    "count_practitioners": config.CACHE_TTL_LISTS,
+    "find_nearby": config.CACHE_TTL_LISTS,
+}, catalog_cache, version=lambda: (
+    get_table_versions("practitioners", "slots", "practitioner_neighbours"), availability_epoch()
+))
+
+CachedProductDatabase = CachedDatabase(TracedProductDatabase, "products", {
+    "get_product_by_id": config.CACHE_TTL_ITEMS,
+    "get_products_by_ids": config.CACHE_TTL_ITEMS,
+    "get_related_products": config.CACHE_TTL_LISTS,
+    "search_products": config.CACHE_TTL_LISTS,
+    "count_products": config.CACHE_TTL_LISTS,
+    "get_facets": config.CACHE_TTL_LISTS,
+    "get_categories": config.CACHE_TTL_CATEGORIES,
+}, catalog_cache, version=lambda: get_table_versions("products", "product_neighbours"))
+
+CachedBookingDatabase = CachedDatabase(TracedBookingDatabase, "slots", {
+    "find_open_slots": config.CACHE_TTL_LISTS,
+}, catalog_cache, version=lambda: (get_table_versions("practitioners", "slots"), availability_epoch()))
+
+AsyncPractitionerDatabase = AsyncDatabase(CachedPractitionerDatabase)
+AsyncProductDatabase = AsyncDatabase(CachedProductDatabase)
+AsyncBookingDatabase = AsyncDatabase(CachedBookingDatabase)
+# Rollup reads are a few rows each, so they skip the catalog cache
+AsyncAnalyticsDatabase = AsyncDatabase(TracedAnalyticsDatabase)
@@ -0,0 +1,195 @@
+"""
+Typo-tolerant search terms
+
+Every full-text index gets an in-memory trigram index over its vocabulary,
+the distinct terms FTS5 has stored (read through the fts5vocab tables of
+migration 9). A query word is compared with the vocabulary through that
+index, and the known terms whose trigram similarity reaches
+FUZZY_SEARCH_THRESHOLD replace it. The search itself still runs on FTS5, as
+an OR of the best-scoring combinations of replacements, so filters, counts,
+facets and sorts work unchanged.
+
+Similarity is the pg_trgm measure: shared trigrams over all trigrams of the
+two words, each padded with two spaces in front and one behind.
+
+The vocabulary is reloaded when the table's change counter has moved, at
+most every FUZZY_INDEX_REFRESH_SECONDS, so corrections can briefly miss
+brand-new words but never return rows that do not match.
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+import config
+
+MAX_MEMOIZED_QUERIES = 4096
+
+_MISSING = object()
+
+
+def trigrams(word: str) -> FrozenSet[str]:
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: str, b: str) -> float:
+    """Trigram similarity of two words, from 0 (nothing shared) to 1 (same trigrams)"""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    shared = len(grams_a & grams_b)
+    return shared / (len(grams_a) + len(grams_b) - shared)
+
+
+class Expansion(NamedTuple):
+    phrase: str  # FTS5 phrase: a quoted term, or a quoted prefix followed by *
+    word: str  # what the phrase stands for in a corrected query
+    score: float
+
+
+class FuzzyQuery(NamedTuple):
+    match: str  # FTS5 expression matching every combination in ``tiers``
+    tiers: List[str]  # one expression per combination of replacements, most similar first
+    corrected: str  # the query rewritten with the most similar replacements
+
+
+class TrigramIndex:
+    """Inverted index from trigram to the vocabulary terms containing it"""
+
+    def __init__(self, terms: Dict[str, int]):
+        self.documents = terms  # term -> number of rows containing it
+        self.expansions: Dict[str, Optional[FuzzyQuery]] = {}  # memo for FuzzyMatcher.expand
+        self.sorted_terms = sorted(terms)
+        self.sizes: Dict[str, int] = {}
+        self.postings: Dict[str, List[str]] = defaultdict(list)
+        for term in terms:
+            grams = trigrams(term)
+            self.sizes[term] = len(grams)
+            for gram in grams:
+                self.postings[gram].append(term)
+
+    def has_prefix(self, word: str) -> bool:
+        index = bisect.bisect_left(self.sorted_terms, word)
+        return index < len(self.sorted_terms) and self.sorted_terms[index].startswith(word)
+
+    def similar(self, word: str, threshold: float, limit: int) -> List[Tuple[str, float]]:
+        """Up to ``limit`` terms at least ``threshold`` similar to ``word``, most similar (then most common) first"""
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        scored = []
+        for term, count in shared.items():
+            score = count / (len(grams) + self.sizes[term] - count)
+            if score >= threshold:
+                scored.append((-score, -self.documents[term], term))
+        return [(term, -score) for score, _, term in heapq.nsmallest(limit, scored)]
+
+
+def _best_combinations(choices: List[List[Expansion]], limit: int) -> List[Tuple[Expansion, ...]]:
+    """The ``limit`` highest-scoring picks of one expansion per word, best first.
+
+    Each list is sorted best first, so a heap over index vectors yields the
+    combinations in order without enumerating all of them.
+    """
+    def total(indexes):
+        return sum(options[i].score for options, i in zip(choices, indexes))
+
+    start = (0,) * len(choices)
+    heap = [(-total(start), start)]
+    seen = {start}
+    result = []
+    while heap and len(result) < limit:
+        _, indexes = heapq.heappop(heap)
+        result.append(tuple(options[i] for options, i in zip(choices, indexes)))
+        for position in range(len(choices)):
+            if indexes[position] + 1 < len(choices[position]):
+                following = indexes[:position] + (indexes[position] + 1,) + indexes[position + 1:]
+                if following not in seen:
+                    seen.add(following)
+                    heapq.heappush(heap, (-total(following), following))
+    return result
+
+
+class _Loaded(NamedTuple):
+    index: TrigramIndex
+    version: int
+    checked: float
+
+
+class FuzzyMatcher:
+    """Vocabulary indexes per table, loaded on first use.
+
+    ``load(table)`` returns the table's full-text vocabulary as term -> row
+    count and ``version(table)`` its change counter.
+    """
+
+    def __init__(self, load: Callable[[str], Dict[str, int]], version: Callable[[str], int]):
+        self._load = load
+        self._version = version
+        self._indexes: Dict[str, _Loaded] = {}
+        self._lock = threading.Lock()
+
+    def index(self, table: str) -> TrigramIndex:
+        loaded = self._indexes.get(table)
+        if loaded is not None and time.monotonic() - loaded.checked < config.FUZZY_INDEX_REFRESH_SECONDS:
+            return loaded.index
+        with self._lock:
+            loaded = self._indexes.get(table)
+            now = time.monotonic()
+            if loaded is None or now - loaded.checked >= config.FUZZY_INDEX_REFRESH_SECONDS:
+                version = self._version(table)
+                if loaded is None or loaded.version != version:
+                    loaded = _Loaded(TrigramIndex(self._load(table)), version, now)
+                else:
+                    loaded = loaded._replace(checked=now)
+                self._indexes[table] = loaded
+            return loaded.index
+
+    def expand(self, table: str, text: str) -> Optional[FuzzyQuery]:
+        """Typo-tolerant replacement for ``fts_match_expression(text)``; None if some word resembles nothing"""
+        index = self.index(table)
+        # The memo is shared by every executor thread and may be cleared
+        # between any two of these lines, so never read back what was stored
+        expansion = index.expansions.get(text, _MISSING)
+        if expansion is _MISSING:
+            expansion = self._expand(index, text)
+            if len(index.expansions) >= MAX_MEMOIZED_QUERIES:
+                index.expansions.clear()
+            index.expansions[text] = expansion
+        return expansion
+
+    @staticmethod
+    def _expand(index: TrigramIndex, text: str) -> Optional[FuzzyQuery]:
+        words = re.findall(r"\w+", text.lower())
+        if not words:
+            return None
+
+        choices = []
+        for word in words:
+            if word.isdigit():
+                # Numbers are left out of the vocabulary and are matched as typed
+                choices.append([Expansion(f'"{word}"*', word, 1.0)])
+                continue
+            options = [
+                Expansion(f'"{term}"', term, score)
+                for term, score in index.similar(word, config.FUZZY_SEARCH_THRESHOLD, config.FUZZY_MAX_EXPANSIONS)
+                if term != word
+            ]
+            # Words that are already known, or start known terms, keep
+            # matching as prefixes, as they do in an exact search
+            if index.has_prefix(word):
+                options.insert(0, Expansion(f'"{word}"*', word, 1.0))
+            if not options:
+                return None
+            choices.append(options)
+
+        combinations = _best_combinations(choices, config.FUZZY_MAX_COMBINATIONS)
+        tiers = [" ".join(expansion.phrase for expansion in combination) for combination in combinations]
+        return FuzzyQuery(
+            match=" OR ".join(f"({tier})" for tier in tiers),
+            tiers=tiers,
+            corrected=" ".join(expansion.word for expansion in combinations[0]),
+        )
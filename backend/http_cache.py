@@ -0,0 +1,112 @@
+"""
+Conditional GETs and pre-serialized response bodies for catalog endpoints
+
+A response's ETag is derived from the request path, its normalized query
+string and the change counters of the tables it reads, so it changes exactly
+when the underlying rows do. Serialized bodies are cached under their ETag;
+a hit skips the database, Pydantic validation and JSON encoding entirely.
+Identical requests that miss at the same time share one build and one
+serialized body (see singleflight), so a burst of clients landing on the same
+page right after a write runs its queries once.
+"""
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+import config
+from cache import catalog_cache
+from database import get_table_versions, run_db
+from singleflight import SingleFlight
+
+_json = TypeAdapter(Any)
+
+
+class ResponseCacheStats:
+    """Counters for conditional and pre-serialized responses"""
+
+    def __init__(self):
+        self.not_modified = 0
+        self.bytes_saved = 0
+        self.body_hits = 0
+        self.body_misses = 0
+        self.serialization_seconds = 0.0
+        self.serialization_seconds_saved = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "not_modified": self.not_modified,
+            "bytes_saved": self.bytes_saved,
+            "body_hits": self.body_hits,
+            "body_misses": self.body_misses,
+            "serialization_seconds": round(self.serialization_seconds, 6),
+            "serialization_seconds_saved": round(self.serialization_seconds_saved, 6),
+        }
+
+
+response_stats = ResponseCacheStats()
+flights = SingleFlight(config.SINGLE_FLIGHT_TIMEOUT_SECONDS, enabled=config.SINGLE_FLIGHT_ENABLED)
+
+
+def make_etag(request: Request, versions: Tuple[int, ...]) -> str:
+    """Strong ETag for this request against the given table versions"""
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.blake2b(f"{request.url.path}?{query}|{versions}".encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value covers ``etag``"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+async def conditional_response(
+    request: Request,
+    tables: Tuple[str, ...],
+    build: Callable[[], Awaitable[Any]],
+    extra: Tuple[Any, ...] = (),
+) -> Response:
+    """Serve ``build()`` as JSON with an ETag, answering 304 or a cached body when possible.
+
+    ``extra`` is folded into the ETag next to the table versions, for
+    responses that also depend on something other than table contents.
+    """
+    versions = await run_db(get_table_versions, *tables)
+    etag = make_etag(request, versions + tuple(extra))
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    cached = await run_db(catalog_cache.get, "responses", etag)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        response_stats.not_modified += 1
+        if cached is not None:
+            response_stats.bytes_saved += len(cached[0])
+            response_stats.serialization_seconds_saved += cached[1]
+        return Response(status_code=304, headers=headers)
+
+    if cached is not None:
+        body, serialization_seconds = cached
+        response_stats.body_hits += 1
+        response_stats.serialization_seconds_saved += serialization_seconds
+    else:
+        # The ETag covers the path, normalized query and table versions, so
+        # requests sharing it would build the same body
+        body, serialization_seconds = await flights.run(etag, lambda: _build_body(etag, build))
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _build_body(etag: str, build: Callable[[], Awaitable[Any]]) -> Tuple[bytes, float]:
+    """Serialized ``build()`` and the seconds spent encoding it, cached under ``etag``"""
+    result = await build()
+    start = time.perf_counter()
+    body = _json.dump_json(result)
+    serialization_seconds = time.perf_counter() - start
+    response_stats.body_misses += 1
+    response_stats.serialization_seconds += serialization_seconds
+    await run_db(catalog_cache.set, "responses", etag, (body, serialization_seconds), config.CACHE_TTL_RESPONSES)
+    return body, serialization_seconds
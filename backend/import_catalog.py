@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Bulk import/export for the Tangerine catalog
+
+    python import_catalog.py import products partner_catalog.csv
+    python import_catalog.py import practitioners directory.ndjson --batch-size 10000
+    python import_catalog.py export products products.ndjson
+
+The format follows the file extension unless --format is given; use "-" for
+stdin/stdout.
+"""
+import argparse
+import os
+import sys
+
+import config
+from catalog_io import FORMATS, TABLES, export_catalog, import_catalog
+from database import migrate_database
+
+
+def _format(path: str, explicit: str) -> str:
+    if explicit:
+        return explicit
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension in FORMATS:
+        return extension
+    sys.exit(f"Cannot tell the format of '{path}'; pass --format {'/'.join(FORMATS)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export for the Tangerine catalog")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("path", help="file to read or write, or - for stdin/stdout")
+    parser.add_argument("--format", choices=FORMATS, default="")
+    parser.add_argument("--batch-size", type=int, default=config.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = _format(args.path, args.format) if args.path != "-" else (args.format or "ndjson")
+    migrate_database()
+
+    if args.action == "import":
+        stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        with stream:
+            report = import_catalog(args.table, stream, fmt, batch_size=args.batch_size)
+        print(f"🍊 Imported {report.rows} {report.table} in {report.seconds}s "
+              f"({report.rowsPerSecond:,.0f} rows/sec, {report.batches} batches, {report.skipped} skipped)",
+              file=sys.stderr)
+        for error in report.errors:
+            print(f"   {error}", file=sys.stderr)
+    else:
+        output = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+        with output:
+            for chunk in export_catalog(args.table, fmt):
+                output.write(chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,32 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from typing import Optional, List, Tuple
+from datetime import datetime, timezone
+import asyncio
+import hmac
+import logging
 import os
+import tempfile
 from dotenv import load_dotenv
 
-from models import Practitioner, PractitionerResponse, Product, ProductResponse, ProductCategory
-from database import PractitionerDatabase, ProductDatabase
+import config
+from models import (
+    AvailabilityResponse, BatchRequest, BatchResponse, Booking, BookingAnalytics, BookingRequest, CategoryAnalytics,
+    ImportReport, NearbyPractitionerResponse, Practitioner, PractitionerResponse, Product, ProductResponse,
+    ProductCategory, RelatedProductResponse, ScheduleReport, SimilarPractitionerResponse, TopPractitioners
+)
+from batch import run_batch
+from cache import catalog_cache
+from catalog_io import check_format, export_catalog, get_spec, import_catalog
+from database import (
+    AsyncAnalyticsDatabase, AsyncBookingDatabase, AsyncPractitionerDatabase, AsyncProductDatabase, BookingDatabase,
+    PractitionerDatabase, ProductDatabase, SlotUnavailableError, availability_epoch, ping_database, pool, run_db
+)
+from http_cache import conditional_response, flights, response_stats
+from metrics import MetricsMiddleware, registry
+from recommendations import NEIGHBOUR_TABLES, refresh as refresh_neighbours
+from streaming import ndjson_response, wants_ndjson
 
 # Load environment variables
 load_dotenv()
@@ -13,14 +34,83 @@ load_dotenv()
 app = FastAPI(
     title="Tangerine Practitioners API",
     description="API for Ayurvedic practitioners in the Tangerine app",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+analytics_log = logging.getLogger("tangerine.analytics")
+
+async def snapshot_analytics():
+    """Copy the live category figures into the rollups every ANALYTICS_SNAPSHOT_SECONDS"""
+    while True:
+        try:
+            await AsyncAnalyticsDatabase.snapshot_categories()
+        except Exception:
+            analytics_log.exception("analytics snapshot failed")
+        await asyncio.sleep(config.ANALYTICS_SNAPSHOT_SECONDS)
+
+snapshot_log = logging.getLogger("tangerine.snapshot")
+
+async def watch_snapshot():
+    """Swap in a fresh read snapshot whenever the database file changes"""
+    while True:
+        await asyncio.sleep(config.SNAPSHOT_CHECK_SECONDS)
+        try:
+            await asyncio.to_thread(pool.refresh_snapshot)
+        except Exception:
+            snapshot_log.exception("read snapshot refresh failed")
+
+recommendations_log = logging.getLogger("tangerine.recommendations")
+
+async def refresh_recommendations():
+    """Recompute the neighbour lists catalog changes made stale every RECOMMENDATIONS_REFRESH_SECONDS"""
+    while True:
+        for kind in NEIGHBOUR_TABLES:
+            try:
+                # A full build can take a while, so it gets its own thread
+                # rather than one of the request executor's
+                await asyncio.to_thread(refresh_neighbours, kind)
+            except Exception:
+                recommendations_log.exception("%s recommendation refresh failed", kind)
+        await asyncio.sleep(config.RECOMMENDATIONS_REFRESH_SECONDS)
+
+schedule_log = logging.getLogger("tangerine.schedule")
+
+async def refresh_schedule():
+    """Keep SCHEDULE_DAYS of slots published, checking every SCHEDULE_REFRESH_SECONDS"""
+    while True:
+        await asyncio.sleep(config.SCHEDULE_REFRESH_SECONDS)
+        try:
+            # Walks every practitioner, so it gets its own thread rather than
+            # holding up the event loop or the request executor
+            await asyncio.to_thread(BookingDatabase.publish_schedule)
+        except Exception:
+            schedule_log.exception("schedule publishing failed")
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup"""
-    PractitionerDatabase.initialize_database()
-    ProductDatabase.initialize_database()
+    """Initialize database on startup, unless the process supervisor already has"""
+    if config.DB_MIGRATE_ON_STARTUP:
+        PractitionerDatabase.initialize_database()
+        ProductDatabase.initialize_database()
+    if config.SNAPSHOT_ENABLED:
+        pool.refresh_snapshot()
+        app.state.snapshot_task = asyncio.create_task(watch_snapshot())
+    if config.ANALYTICS_SNAPSHOT_SECONDS > 0:
+        app.state.analytics_task = asyncio.create_task(snapshot_analytics())
+    if config.RECOMMENDATIONS_REFRESH_SECONDS > 0:
+        app.state.recommendations_task = asyncio.create_task(refresh_recommendations())
+    if config.SCHEDULE_REFRESH_SECONDS > 0:
+        app.state.schedule_task = asyncio.create_task(refresh_schedule())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background jobs and close pooled database connections"""
+    for name in ("snapshot_task", "analytics_task", "recommendations_task", "schedule_task"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    pool.close_all()
 
 # Configure CORS for React Native app
 app.add_middleware(
@@ -31,143 +121,568 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency covers CORS handling and the whole streamed body
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/")
 async def root():
     return {"message": "Tangerine Practitioners API", "version": "1.0.0"}
 
 @app.get("/health")
 async def health_check():
+    """Healthy only if the database answers a trivial query"""
+    try:
+        await run_db(ping_database)
+    except Exception as e:
+        return ORJSONResponse(
+            {"status": "unhealthy", "service": "practitioners-api", "detail": str(e)}, status_code=503
+        )
     return {"status": "healthy", "service": "practitioners-api"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request, database and cache metrics in the Prometheus text format"""
+    cache = await run_db(catalog_cache.stats)
+    body = registry.render({
+        "catalog_cache": cache,
+        "response_cache": response_stats.as_dict(),
+        "single_flight": flights.stats(),
+        "read_snapshot": pool.snapshot_stats(),
+    })
+    return Response(body, media_type="text/plain; version=0.0.4")
+
+# Practitioner responses include nextAvailable, which depends on open slots
+# and on the current availability window
+PRACTITIONER_TABLES = ("practitioners", "slots")
+
+# Largest limit the list and search endpoints accept, NDJSON included; a
+# stream sent without a limit returns every match
+MAX_PAGE_SIZE = 100
+
+def parse_ids(ids: str) -> Tuple[int, ...]:
+    """Parse a comma-separated id list such as 1,2,3"""
+    try:
+        return tuple(int(value) for value in ids.split(",") if value.strip())
+    except ValueError:
+        raise ValueError("ids must be a comma-separated list of integers")
+
+FUZZY_DESCRIPTION = (
+    "true also matches misspellings (ranked by similarity, paged by offset), false never does;"
+    " by default only when nothing matches exactly"
+)
+
+def parse_facets(facets: Optional[str]) -> Tuple[str, ...]:
+    """Parse a comma-separated facet list such as category,price"""
+    return tuple(name.strip() for name in (facets or "").split(",") if name.strip())
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit, miss and eviction counters for the catalog cache, conditional and coalesced responses, and the read snapshot's age"""
+    stats = await run_db(catalog_cache.stats)
+    return {
+        **stats,
+        "responses": response_stats.as_dict(),
+        "single_flight": flights.stats(),
+        "snapshot": pool.snapshot_stats(),
+    }
+
 @app.get("/api/practitioners", response_model=PractitionerResponse)
 async def get_practitioners(
-    specialty: Optional[str] = Query(None, description="Filter by specialty"),
-    location: Optional[str] = Query(None, description="Filter by location"),
-    limit: Optional[int] = Query(10, description="Limit number of results")
+    request: Request,
+    specialty: Optional[str] = Query(None, description="Only practitioners whose specialty contains this"),
+    location: Optional[str] = Query(None, description="Only practitioners whose location contains this"),
+    sort: Optional[str] = Query(None, description="Sort order: id, rating or name"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Limit number of results (default 10; NDJSON streams every match unless set)"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's nextCursor"),
+    include_total: bool = Query(True, description="Count all matching results"),
+    format: Optional[str] = Query(None, description="json or ndjson (also chosen by Accept: application/x-ndjson)"),
+    ids: Optional[str] = Query(None, description="Comma-separated IDs to fetch in one query; other filters are ignored")
 ):
     """Get all practitioners with optional filtering"""
-    try:
-        if specialty or location:
-            practitioners = PractitionerDatabase.search_practitioners(specialty=specialty, location=location)
-        else:
-            practitioners = PractitionerDatabase.get_all_practitioners()
-        
-        # Apply limit
-        limited_practitioners = practitioners[:limit] if limit else practitioners
-        
+    async def build_by_ids():
+        practitioners = await AsyncPractitionerDatabase.get_practitioners_by_ids(parse_ids(ids))
+        return PractitionerResponse(practitioners=practitioners, total=len(practitioners))
+
+    async def stream():
+        batches = PractitionerDatabase.stream_practitioners(
+            specialty=specialty, location=location, sort=sort, limit=limit, offset=offset, after=after
+        )
+        total = await AsyncPractitionerDatabase.count_practitioners(specialty=specialty, location=location) if include_total else None
+        return ndjson_response(batches, total)
+
+    async def build():
+        page = await AsyncPractitionerDatabase.search_practitioners(
+            specialty=specialty, location=location, sort=sort, limit=limit or 10, offset=offset, after=after
+        )
+        total = await AsyncPractitionerDatabase.count_practitioners(specialty=specialty, location=location) if include_total else None
+
         return PractitionerResponse(
-            practitioners=limited_practitioners,
-            total=len(practitioners)
+            practitioners=page.items,
+            total=total,
+            nextCursor=page.next_cursor
         )
+
+    try:
+        if ids is not None:
+            return await conditional_response(request, PRACTITIONER_TABLES, build_by_ids, extra=(availability_epoch(),))
+        if wants_ndjson(request, format):
+            return await stream()
+        return await conditional_response(request, PRACTITIONER_TABLES, build, extra=(availability_epoch(),))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching practitioners: {str(e)}")
 
+@app.get("/api/practitioners/search", response_model=PractitionerResponse)
+async def search_practitioners(
+    request: Request,
+    q: str = Query(..., description="Search query"),
+    sort: Optional[str] = Query(None, description="Sort order: relevance, id, rating or name"),
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE, description="Limit number of results"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's nextCursor"),
+    include_total: bool = Query(True, description="Count all matching results"),
+    fuzzy: Optional[bool] = Query(None, description=FUZZY_DESCRIPTION)
+):
+    """Search practitioners by name or specialty"""
+    async def build():
+        use_fuzzy = fuzzy
+        if use_fuzzy is None:
+            # Same arguments as the total below, so that count is a cache hit
+            use_fuzzy = config.FUZZY_SEARCH_ENABLED and not await AsyncPractitionerDatabase.count_practitioners(
+                query=q, fuzzy=False, expansion=None
+            )
+        # Expanded once, so the page, the total and the correction agree
+        expansion = await AsyncPractitionerDatabase.expand_query(q) if use_fuzzy else None
+        page = await AsyncPractitionerDatabase.search_practitioners(
+            query=q, sort=sort, limit=limit, offset=offset, after=after, fuzzy=use_fuzzy, expansion=expansion
+        )
+        total = await AsyncPractitionerDatabase.count_practitioners(
+            query=q, fuzzy=use_fuzzy, expansion=expansion
+        ) if include_total else None
+
+        return PractitionerResponse(
+            practitioners=page.items,
+            total=total,
+            nextCursor=page.next_cursor,
+            correctedQuery=expansion.corrected if expansion else None
+        )
+
+    try:
+        return await conditional_response(request, PRACTITIONER_TABLES, build, extra=(availability_epoch(),))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching practitioners: {str(e)}")
+
+@app.get("/api/practitioners/nearby", response_model=NearbyPractitionerResponse)
+async def nearby_practitioners(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the search center"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude of the search center"),
+    radius: float = Query(25, gt=0, le=500, description="Search radius in kilometres"),
+    specialty: Optional[str] = Query(None, description="Only practitioners whose specialty contains this"),
+    sort: Optional[str] = Query(None, description="Sort order: distance or rating"),
+    limit: int = Query(20, ge=1, le=100, description="Limit number of results")
+):
+    """Find the closest practitioners to a point"""
+    async def build():
+        practitioners, total = await AsyncPractitionerDatabase.find_nearby(
+            lat, lng, radius_km=radius, specialty=specialty, sort=sort, limit=limit
+        )
+        return NearbyPractitionerResponse(practitioners=practitioners, total=total)
+
+    try:
+        return await conditional_response(request, PRACTITIONER_TABLES, build, extra=(availability_epoch(),))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding nearby practitioners: {str(e)}")
+
 @app.get("/api/practitioners/{practitioner_id}", response_model=Practitioner)
-async def get_practitioner(practitioner_id: int):
+async def get_practitioner(request: Request, practitioner_id: int):
     """Get a specific practitioner by ID"""
-    try:
-        practitioner = PractitionerDatabase.get_practitioner_by_id(practitioner_id)
+    async def build():
+        practitioner = await AsyncPractitionerDatabase.get_practitioner_by_id(practitioner_id)
         if not practitioner:
             raise HTTPException(status_code=404, detail="Practitioner not found")
         return practitioner
+
+    try:
+        return await conditional_response(request, PRACTITIONER_TABLES, build, extra=(availability_epoch(),))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching practitioner: {str(e)}")
 
-@app.get("/api/practitioners/search", response_model=PractitionerResponse)
-async def search_practitioners(
-    q: str = Query(..., description="Search query"),
-    limit: Optional[int] = Query(10, description="Limit number of results")
+@app.get("/api/practitioners/{practitioner_id}/similar", response_model=SimilarPractitionerResponse)
+async def similar_practitioners(
+    request: Request,
+    practitioner_id: int,
+    limit: int = Query(config.RECOMMENDATIONS_PER_ITEM, ge=1, le=100, description="Limit number of results")
 ):
-    """Search practitioners by name or specialty"""
+    """Practitioners with the most similar specialty and location, from the precomputed lists"""
+    async def build():
+        practitioners = await AsyncPractitionerDatabase.get_similar_practitioners(practitioner_id, limit=limit)
+        if practitioners is None:
+            raise HTTPException(status_code=404, detail="Practitioner not found")
+        return SimilarPractitionerResponse(practitioners=practitioners, total=len(practitioners))
+
     try:
-        all_practitioners = PractitionerDatabase.get_all_practitioners()
-        
-        # Simple search implementation
-        search_results = [
-            p for p in all_practitioners 
-            if q.lower() in p.name.lower() or q.lower() in p.specialty.lower()
-        ]
-        
-        # Apply limit
-        limited_results = search_results[:limit] if limit else search_results
-        
-        return PractitionerResponse(
-            practitioners=limited_results,
-            total=len(search_results)
+        return await conditional_response(
+            request, PRACTITIONER_TABLES + ("practitioner_neighbours",), build, extra=(availability_epoch(),)
         )
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error searching practitioners: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching similar practitioners: {str(e)}")
 
 # Product endpoints
 @app.get("/api/products", response_model=ProductResponse)
 async def get_products(
-    category: Optional[str] = Query(None, description="Filter by category"),
+    request: Request,
+    category: Optional[str] = Query(None, description="Only products whose category contains this"),
     query: Optional[str] = Query(None, description="Search query"),
     in_stock_only: Optional[bool] = Query(False, description="Show only in-stock products"),
-    limit: Optional[int] = Query(20, description="Limit number of results")
+    sort: Optional[str] = Query(None, description="Sort order: id, rating, price, price_desc, reviews or relevance"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Limit number of results (default 20; NDJSON streams every match unless set)"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's nextCursor"),
+    include_total: bool = Query(True, description="Count all matching results"),
+    format: Optional[str] = Query(None, description="json or ndjson (also chosen by Accept: application/x-ndjson)"),
+    ids: Optional[str] = Query(None, description="Comma-separated IDs to fetch in one query; other filters are ignored"),
+    facets: Optional[str] = Query(None, description="Comma-separated facets to count alongside the page: category, price, in_stock")
 ):
     """Get all products with optional filtering"""
-    try:
-        if category or query or in_stock_only:
-            products = ProductDatabase.search_products(category=category, query=query, in_stock_only=in_stock_only)
+    async def build_by_ids():
+        products = await AsyncProductDatabase.get_products_by_ids(parse_ids(ids))
+        return ProductResponse(products=products, total=len(products))
+
+    async def stream():
+        batches = ProductDatabase.stream_products(
+            category=category, query=query, in_stock_only=in_stock_only,
+            sort=sort, limit=limit, offset=offset, after=after
+        )
+        total = await AsyncProductDatabase.count_products(
+            category=category, query=query, in_stock_only=in_stock_only
+        ) if include_total else None
+        return ndjson_response(batches, total)
+
+    async def build():
+        page = await AsyncProductDatabase.search_products(
+            category=category, query=query, in_stock_only=in_stock_only,
+            sort=sort, limit=limit or 20, offset=offset, after=after
+        )
+        facet_counts = None
+        if facets:
+            # The facet pass counts the matches too, so no separate COUNT
+            facet_counts, total = await AsyncProductDatabase.get_facets(
+                parse_facets(facets), category=category, query=query, in_stock_only=in_stock_only
+            )
         else:
-            products = ProductDatabase.get_all_products()
-        
-        # Apply limit
-        limited_products = products[:limit] if limit else products
-        
+            total = await AsyncProductDatabase.count_products(
+                category=category, query=query, in_stock_only=in_stock_only
+            ) if include_total else None
+
         return ProductResponse(
-            products=limited_products,
-            total=len(products)
+            products=page.items,
+            total=total,
+            nextCursor=page.next_cursor,
+            facets=facet_counts
         )
+
+    try:
+        if ids is not None:
+            return await conditional_response(request, ("products",), build_by_ids)
+        if wants_ndjson(request, format):
+            return await stream()
+        return await conditional_response(request, ("products",), build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching products: {str(e)}")
 
+@app.get("/api/products/search", response_model=ProductResponse)
+async def search_products(
+    request: Request,
+    q: str = Query(..., description="Search query"),
+    category: Optional[str] = Query(None, description="Only products whose category contains this"),
+    in_stock_only: Optional[bool] = Query(False, description="Show only in-stock products"),
+    sort: Optional[str] = Query(None, description="Sort order: relevance, id, rating, price, price_desc or reviews"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Limit number of results"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's nextCursor"),
+    include_total: bool = Query(True, description="Count all matching results"),
+    facets: Optional[str] = Query(None, description="Comma-separated facets to count alongside the page: category, price, in_stock"),
+    fuzzy: Optional[bool] = Query(None, description=FUZZY_DESCRIPTION)
+):
+    """Search products by name or description"""
+    async def build():
+        use_fuzzy = fuzzy
+        if use_fuzzy is None:
+            # Same arguments as the total below, so that count is a cache hit
+            use_fuzzy = config.FUZZY_SEARCH_ENABLED and not await AsyncProductDatabase.count_products(
+                category=category, query=q, in_stock_only=in_stock_only, fuzzy=False, expansion=None
+            )
+        # Expanded once, so the page, the total, the facets and the correction agree
+        expansion = await AsyncProductDatabase.expand_query(q) if use_fuzzy else None
+        page = await AsyncProductDatabase.search_products(
+            category=category, query=q, in_stock_only=in_stock_only,
+            sort=sort, limit=limit, offset=offset, after=after, fuzzy=use_fuzzy, expansion=expansion
+        )
+        facet_counts = None
+        if facets:
+            # The facet pass counts the matches too, so no separate COUNT
+            facet_counts, total = await AsyncProductDatabase.get_facets(
+                parse_facets(facets), category=category, query=q, in_stock_only=in_stock_only,
+                fuzzy=use_fuzzy, expansion=expansion
+            )
+        else:
+            total = await AsyncProductDatabase.count_products(
+                category=category, query=q, in_stock_only=in_stock_only, fuzzy=use_fuzzy, expansion=expansion
+            ) if include_total else None
+
+        return ProductResponse(
+            products=page.items,
+            total=total,
+            nextCursor=page.next_cursor,
+            facets=facet_counts,
+            correctedQuery=expansion.corrected if expansion else None
+        )
+
+    try:
+        return await conditional_response(request, ("products",), build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching products: {str(e)}")
+
 @app.get("/api/products/{product_id}", response_model=Product)
-async def get_product(product_id: int):
+async def get_product(request: Request, product_id: int):
     """Get a specific product by ID"""
-    try:
-        product = ProductDatabase.get_product_by_id(product_id)
+    async def build():
+        product = await AsyncProductDatabase.get_product_by_id(product_id)
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         return product
+
+    try:
+        return await conditional_response(request, ("products",), build)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching product: {str(e)}")
 
-@app.get("/api/products/search", response_model=ProductResponse)
-async def search_products(
-    q: str = Query(..., description="Search query"),
-    category: Optional[str] = Query(None, description="Filter by category"),
-    in_stock_only: Optional[bool] = Query(False, description="Show only in-stock products"),
-    limit: Optional[int] = Query(20, description="Limit number of results")
+@app.get("/api/products/{product_id}/related", response_model=RelatedProductResponse)
+async def related_products(
+    request: Request,
+    product_id: int,
+    limit: int = Query(config.RECOMMENDATIONS_PER_ITEM, ge=1, le=100, description="Limit number of results")
 ):
-    """Search products by name or description"""
+    """Products with the most similar name, description and category, from the precomputed lists"""
+    async def build():
+        products = await AsyncProductDatabase.get_related_products(product_id, limit=limit)
+        if products is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return RelatedProductResponse(products=products, total=len(products))
+
     try:
-        products = ProductDatabase.search_products(category=category, query=q, in_stock_only=in_stock_only)
-        
-        # Apply limit
-        limited_results = products[:limit] if limit else products
-        
-        return ProductResponse(
-            products=limited_results,
-            total=len(products)
-        )
+        return await conditional_response(request, ("products", "product_neighbours"), build)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error searching products: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching related products: {str(e)}")
 
 @app.get("/api/categories", response_model=List[ProductCategory])
-async def get_categories():
+async def get_categories(request: Request):
     """Get all product categories with counts"""
     try:
-        categories = ProductDatabase.get_categories()
-        return categories
+        return await conditional_response(request, ("products",), AsyncProductDatabase.get_categories)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching categories: {str(e)}")
 
+# Availability and booking endpoints
+@app.get("/api/availability", response_model=AvailabilityResponse)
+async def get_availability(
+    request: Request,
+    specialty: Optional[str] = Query(None, description="Only practitioners whose specialty contains this"),
+    practitioner_id: Optional[int] = Query(None, description="Only this practitioner's slots"),
+    days: int = Query(7, ge=1, le=60, description="How many days ahead to look"),
+    limit: int = Query(10, ge=1, le=200, description="Maximum number of slots")
+):
+    """Earliest open appointment slots"""
+    async def build():
+        slots = await AsyncBookingDatabase.find_open_slots(
+            specialty=specialty, practitioner_id=practitioner_id, days=days, limit=limit
+        )
+        return AvailabilityResponse(slots=slots)
+
+    try:
+        return await conditional_response(request, PRACTITIONER_TABLES, build, extra=(availability_epoch(),))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching availability: {str(e)}")
+
+@app.post("/api/bookings", response_model=Booking, status_code=201)
+async def create_booking(booking: BookingRequest):
+    """Book an open slot; 409 if someone else got it first"""
+    try:
+        created = await AsyncBookingDatabase.book_slot(booking.slotId, booking.patientName)
+    except SlotUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating booking: {str(e)}")
+    if created is None:
+        raise HTTPException(status_code=404, detail="Slot not found")
+    return created
+
+@app.delete("/api/bookings/{booking_id}", status_code=204)
+async def cancel_booking(booking_id: int):
+    """Cancel a booking and reopen its slot"""
+    try:
+        cancelled = await AsyncBookingDatabase.cancel_booking(booking_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error cancelling booking: {str(e)}")
+    if not cancelled:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    return Response(status_code=204)
+
+# Analytics endpoints, served from the rollup tables. Rollup periods are UTC
+# days, so the current day is part of the ETag.
+def utc_today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+@app.get("/api/analytics/bookings", response_model=BookingAnalytics)
+async def booking_analytics(
+    request: Request,
+    grain: str = Query("day", description="day or week"),
+    periods: int = Query(14, ge=1, le=366, description="Number of periods, ending with the current one"),
+    by: str = Query("all", description="all, specialty or practitioner"),
+    specialty: Optional[str] = Query(None, description="Only this specialty (by=specialty)"),
+    practitioner_id: Optional[int] = Query(None, description="The practitioner to chart (required for by=practitioner)")
+):
+    """Bookings made and cancelled per day or week"""
+    key = str(practitioner_id) if by == "practitioner" and practitioner_id is not None else specialty
+
+    async def build():
+        return await AsyncAnalyticsDatabase.get_booking_series(grain=grain, periods=periods, by=by, key=key)
+
+    try:
+        return await conditional_response(request, ("slots",), build, extra=(utc_today(),))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching booking analytics: {str(e)}")
+
+@app.get("/api/analytics/practitioners/top", response_model=TopPractitioners)
+async def top_practitioners(
+    request: Request,
+    grain: str = Query("week", description="day or week"),
+    period: Optional[str] = Query(None, description="Any date in the period (YYYY-MM-DD); defaults to the current one"),
+    limit: int = Query(10, ge=1, le=100, description="Limit number of results")
+):
+    """Most booked practitioners in a day or week"""
+    async def build():
+        return await AsyncAnalyticsDatabase.get_top_practitioners(grain=grain, period=period, limit=limit)
+
+    try:
+        return await conditional_response(request, PRACTITIONER_TABLES, build, extra=(utc_today(),))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching top practitioners: {str(e)}")
+
+@app.get("/api/analytics/categories", response_model=CategoryAnalytics)
+async def category_analytics(
+    request: Request,
+    grain: str = Query("day", description="day or week"),
+    periods: int = Query(14, ge=1, le=366, description="Number of periods, ending with the current one"),
+    category: Optional[str] = Query(None, description="Only this category")
+):
+    """Product count, stock, average price and rating and reviews per category over time"""
+    async def build():
+        return await AsyncAnalyticsDatabase.get_category_series(grain=grain, periods=periods, category=category)
+
+    try:
+        return await conditional_response(request, ("products",), build, extra=(utc_today(),))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching category analytics: {str(e)}")
+
+@app.post("/api/batch", response_model=BatchResponse)
+async def batch(request: Request, body: BatchRequest):
+    """Run several GET requests concurrently in one round trip"""
+    try:
+        return Response(await run_batch(request, body.requests), media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Admin endpoints
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def require_admin(token: Optional[str]):
+    """Reject the request unless ADMIN_TOKEN is set and matches"""
+    if not config.ADMIN_TOKEN or not hmac.compare_digest(token or "", config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin access denied")
+
+@app.post("/api/admin/import/{table}", response_model=ImportReport)
+async def import_table(
+    request: Request,
+    table: str,
+    format: str = Query("ndjson", description="Body format: csv or ndjson"),
+    batch_size: int = Query(config.IMPORT_BATCH_SIZE, ge=1, le=100_000, description="Rows per transaction"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Bulk upsert catalog rows from a CSV or NDJSON request body"""
+    require_admin(x_admin_token)
+    try:
+        get_spec(table)
+        check_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Spool the upload so large bodies go to disk rather than memory
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        try:
+            return await run_db(import_catalog, table, body, format, batch_size)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error importing {table}: {str(e)}")
+
+@app.post("/api/admin/schedule", response_model=ScheduleReport)
+async def publish_schedule(
+    days: int = Query(config.SCHEDULE_DAYS, ge=1, le=366, description="Days ahead to publish slots for"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Publish bookable slots for every practitioner now, as the background refresh does"""
+    require_admin(x_admin_token)
+    return await asyncio.to_thread(BookingDatabase.publish_schedule, days)
+
+@app.get("/api/admin/export/{table}")
+async def export_table(
+    table: str,
+    format: str = Query("ndjson", description="Export format: csv or ndjson"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Stream every row of a catalog table as CSV or NDJSON"""
+    require_admin(x_admin_token)
+    try:
+        get_spec(table)
+        check_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        export_catalog(table, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
@@ -0,0 +1,257 @@
+"""
+Prometheus metrics for HTTP routes and database calls
+
+Counters and histograms live in process memory and are rendered in the
+Prometheus text format at /metrics. Recording one observation is a bisect
+and a short lock, so the middleware and the database tracing stay on in
+production. Each uvicorn worker keeps its own registry; a scrape reports the
+worker that answered it.
+
+Slow database calls (over SLOW_QUERY_MS) are also logged to the
+``tangerine.slow_queries`` logger with their arguments.
+"""
+import bisect
+import functools
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import config
+
+slow_query_log = logging.getLogger("tangerine.slow_queries")
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (128, 1024, 8192, 65536, 524288, 4194304, 33554432)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic total per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down, such as requests in flight"""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    """Bucketed observations with a running sum and count per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: non-cumulative bucket counts (the last one is +Inf) and the sum
+        self._values: Dict[Labels, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted((labels, (list(state[0]), state[1])) for labels, state in self._values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket = 'le="' + le + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, bucket)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Any] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, extra: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """Text exposition of every metric; ``extra`` maps a name prefix to a dict of gauge values"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for prefix, values in (extra or {}).items():
+            for key, value in values.items():
+                if isinstance(value, (int, float)):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from request start to the last body byte", ("method", "route")))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size", ("method", "route"), SIZE_BUCKETS))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests being handled right now"))
+
+db_call_latency = registry.register(Histogram(
+    "db_call_duration_seconds", "Wall time of a database method call, cache misses only", ("call",)))
+db_model_time = registry.register(Histogram(
+    "db_model_build_seconds", "Part of a database call spent validating rows into models", ("call",)))
+db_rows = registry.register(Histogram(
+    "db_rows_returned", "Rows turned into models by a database call", ("call",), ROW_BUCKETS))
+db_errors = registry.register(Counter(
+    "db_call_errors_total", "Database calls that raised", ("call", "error")))
+db_slow_calls = registry.register(Counter(
+    "db_slow_calls_total", "Database calls slower than SLOW_QUERY_MS", ("call",)))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed bodies are counted without being buffered.
+
+    Requests are labelled with their route template (``/api/products/{product_id}``)
+    rather than the raw path, which keeps label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            # The router adds the matched route to the scope it was given
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests.inc(method, template, str(status))
+            http_latency.observe(time.perf_counter() - start, method, template)
+            http_response_size.observe(size, method, template)
+
+
+_trace = threading.local()
+
+
+def build_models(adapter, records: list):
+    """``adapter.validate_python(records)``, timed and counted against the current database call"""
+    start = time.perf_counter()
+    models = adapter.validate_python(records)
+    current = getattr(_trace, "current", None)
+    if current is not None:
+        current[0] += time.perf_counter() - start
+        current[1] += len(records)
+    return models
+
+
+class TracedDatabase:
+    """Wrap a database class so every public method call is timed.
+
+    Calls record their wall time, the part of it spent building models and
+    how many rows they returned; calls over SLOW_QUERY_MS are logged with
+    their arguments. Nested calls are traced on their own. Iterators returned
+    by the stream_* methods are consumed later and are not covered.
+    """
+
+    def __init__(self, target, namespace: str):
+        self._target = target
+        self._namespace = namespace
+
+    def __getattr__(self, name):
+        method = getattr(self._target, name)
+        if name.startswith("_") or not callable(method):
+            return method
+        label = f"{self._namespace}.{name}"
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            if not config.METRICS_ENABLED:
+                return method(*args, **kwargs)
+            outer = getattr(_trace, "current", None)
+            current = _trace.current = [0.0, 0]
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                db_errors.inc(label, type(e).__name__)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                _trace.current = outer
+                db_call_latency.observe(elapsed, label)
+                db_model_time.observe(current[0], label)
+                db_rows.observe(current[1], label)
+                if elapsed * 1000 >= config.SLOW_QUERY_MS:
+                    db_slow_calls.inc(label)
+                    slow_query_log.warning(
+                        "slow database call %s took %.1f ms (%.1f ms building %d models) args=%r kwargs=%r",
+                        label, elapsed * 1000, current[0] * 1000, current[1], args, kwargs,
+                    )
+
+        setattr(self, name, call)
+        return call
@@ -0,0 +1,529 @@
+"""
+Versioned schema migrations for the Tangerine database
+
+Each migration runs once and is recorded in ``schema_migrations``. Pending
+migrations are applied inside a single ``BEGIN IMMEDIATE`` transaction, so
+when several uvicorn workers start at once the first one takes the write
+lock and applies them while the others wait, re-read the applied versions
+and find nothing left to do.
+"""
+import sqlite3
+from typing import Callable, List, NamedTuple
+
+
+# Upper bounds of the product price histogram buckets; the last bucket is
+# open-ended. The bucket of each product is stored in product_facets, so
+# changing these needs a migration that rebuilds that table.
+PRICE_BUCKET_EDGES = (10, 25, 50, 100)
+
+
+def price_bucket_sql(column: str) -> str:
+    """SQL expression for the histogram bucket (0-based) of the price in ``column``"""
+    return " + ".join(f"({column} >= {edge})" for edge in PRICE_BUCKET_EDGES)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Cursor], None]
+
+
+def _create_fts_index(cursor: sqlite3.Cursor, table: str, columns: List[str]):
+    """Create an external-content FTS5 index over ``table`` kept in sync by triggers"""
+    fts_table = f"{table}_fts"
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+    ).fetchone()
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+            {column_list},
+            content='{table}',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+    ''')
+
+    if not exists:
+        # Index rows that were written before the FTS table existed
+        cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+
+def _create_change_counter(cursor: sqlite3.Cursor, table: str):
+    """Count every write to ``table`` in table_versions, for ETags and cache keys"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+            END
+        ''')
+
+
+def _create_catalog_tables(cursor: sqlite3.Cursor):
+    # IF NOT EXISTS keeps this safe on databases created before migrations existed
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS practitioners (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            specialty TEXT NOT NULL,
+            rating REAL NOT NULL,
+            experience TEXT NOT NULL,
+            location TEXT NOT NULL,
+            next_available TEXT NOT NULL,
+            image TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            price REAL NOT NULL,
+            original_price REAL,
+            rating REAL NOT NULL,
+            reviews INTEGER NOT NULL,
+            image TEXT NOT NULL,
+            category TEXT NOT NULL,
+            in_stock BOOLEAN NOT NULL DEFAULT 1
+        )
+    ''')
+
+
+def _create_search_indexes(cursor: sqlite3.Cursor):
+    _create_fts_index(cursor, "practitioners", ["name", "specialty"])
+    _create_fts_index(cursor, "products", ["name", "description", "category"])
+
+
+def _create_change_counters(cursor: sqlite3.Cursor):
+    _create_change_counter(cursor, "practitioners")
+    _create_change_counter(cursor, "products")
+
+
+def _create_filter_indexes(cursor: sqlite3.Cursor):
+    # Category browsing, optionally sorted by rating; the partial index serves
+    # the in-stock-only view without touching out-of-stock rows
+    cursor.execute("CREATE INDEX idx_products_category ON products (category COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX idx_products_category_rating ON products (category COLLATE NOCASE, rating DESC, id)")
+    cursor.execute('''
+        CREATE INDEX idx_products_in_stock_category_rating ON products (category COLLATE NOCASE, rating DESC, id)
+        WHERE in_stock = 1
+    ''')
+    cursor.execute("CREATE INDEX idx_products_in_stock_rating ON products (rating DESC, id) WHERE in_stock = 1")
+    cursor.execute("CREATE INDEX idx_products_category_price ON products (category COLLATE NOCASE, price, id)")
+
+    # Unfiltered sorts
+    cursor.execute("CREATE INDEX idx_products_rating ON products (rating DESC, id)")
+    cursor.execute("CREATE INDEX idx_products_price ON products (price, id)")
+    cursor.execute("CREATE INDEX idx_products_reviews ON products (reviews DESC, id)")
+
+    # Practitioners by specialty or location, compared without case
+    cursor.execute("CREATE INDEX idx_practitioners_specialty ON practitioners (specialty COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX idx_practitioners_location ON practitioners (location COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX idx_practitioners_rating ON practitioners (rating DESC, id)")
+
+
+def _create_availability(cursor: sqlite3.Cursor):
+    # Times are clinic-local ISO strings ('YYYY-MM-DDTHH:MM'), so they sort
+    # and compare as text
+    cursor.execute('''
+        CREATE TABLE slots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            practitioner_id INTEGER NOT NULL REFERENCES practitioners (id) ON DELETE CASCADE,
+            starts_at TEXT NOT NULL,
+            ends_at TEXT NOT NULL,
+            booked INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (practitioner_id, starts_at)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            slot_id INTEGER NOT NULL UNIQUE REFERENCES slots (id),
+            practitioner_id INTEGER NOT NULL,
+            patient_name TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Only open slots are indexed: "next free slots in a window" is a range
+    # scan in start order, and a practitioner's next slot is one seek
+    cursor.execute("CREATE INDEX idx_slots_open ON slots (starts_at, practitioner_id) WHERE booked = 0")
+    cursor.execute("CREATE INDEX idx_slots_practitioner_open ON slots (practitioner_id, starts_at) WHERE booked = 0")
+    _create_change_counter(cursor, "slots")
+
+    # nextAvailable is now derived from open slots
+    cursor.execute("ALTER TABLE practitioners DROP COLUMN next_available")
+
+
+def _create_geo_index(cursor: sqlite3.Cursor):
+    cursor.execute("ALTER TABLE practitioners ADD COLUMN latitude REAL")
+    cursor.execute("ALTER TABLE practitioners ADD COLUMN longitude REAL")
+
+    # Points are stored as zero-size boxes. Reading auxiliary columns costs a
+    # lookup per row, as much as joining practitioners, so the index holds
+    # only the boxes. Practitioners without coordinates are left out.
+    cursor.execute("CREATE VIRTUAL TABLE practitioners_geo USING rtree(id, min_lat, max_lat, min_lng, max_lng)")
+    columns = "new.id, new.latitude, new.latitude, new.longitude, new.longitude"
+    cursor.execute(f'''
+        CREATE TRIGGER practitioners_geo_insert AFTER INSERT ON practitioners
+        WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+            INSERT INTO practitioners_geo VALUES ({columns});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER practitioners_geo_update AFTER UPDATE OF latitude, longitude ON practitioners BEGIN
+            DELETE FROM practitioners_geo WHERE id = old.id;
+            INSERT INTO practitioners_geo
+            SELECT {columns}
+            WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER practitioners_geo_delete AFTER DELETE ON practitioners BEGIN
+            DELETE FROM practitioners_geo WHERE id = old.id;
+        END
+    ''')
+
+
+def _create_product_facets(cursor: sqlite3.Cursor):
+    # Product counts per category, stock state and price bucket, kept current
+    # by triggers, so unfiltered facet counts and the category list read a
+    # few dozen rows instead of grouping the whole catalog
+    cursor.execute('''
+        CREATE TABLE product_facets (
+            category TEXT NOT NULL COLLATE NOCASE,
+            in_stock INTEGER NOT NULL,
+            price_bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (category, in_stock, price_bucket)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(f'''
+        INSERT INTO product_facets (category, in_stock, price_bucket, count)
+        SELECT category, in_stock, {price_bucket_sql("price")}, COUNT(*)
+        FROM products
+        GROUP BY category COLLATE NOCASE, in_stock, 3
+    ''')
+
+    add = f'''
+        INSERT INTO product_facets (category, in_stock, price_bucket, count)
+        VALUES (new.category, new.in_stock, {price_bucket_sql("new.price")}, 1)
+        ON CONFLICT DO UPDATE SET count = count + 1;
+    '''
+    remove = f'''
+        UPDATE product_facets SET count = count - 1
+        WHERE category = old.category AND in_stock = old.in_stock AND price_bucket = {price_bucket_sql("old.price")};
+    '''
+    cursor.execute(f"CREATE TRIGGER products_facets_insert AFTER INSERT ON products BEGIN {add} END")
+    cursor.execute(f"CREATE TRIGGER products_facets_delete AFTER DELETE ON products BEGIN {remove} END")
+    cursor.execute(f'''
+        CREATE TRIGGER products_facets_update AFTER UPDATE OF category, in_stock, price ON products BEGIN
+            {remove}
+            {add}
+        END
+    ''')
+
+
+ROLLUP_GRAINS = ("day", "week")
+
+
+def rollup_period_sql(grain: str, timestamp: str) -> str:
+    """SQL for the first day ('YYYY-MM-DD', UTC) of the period containing ``timestamp``; weeks start on Monday"""
+    if grain == "week":
+        return f"date({timestamp}, 'weekday 0', '-6 days')"
+    return f"date({timestamp})"
+
+
+def _booking_rollup_upsert(timestamp: str, practitioner_id: str, column: str) -> str:
+    # One row per grain and dimension: 'all', the practitioner's specialty and the practitioner
+    grains = " UNION ALL ".join(
+        f"SELECT '{grain}' AS grain, {rollup_period_sql(grain, timestamp)} AS period" for grain in ROLLUP_GRAINS
+    )
+    return f'''
+        INSERT INTO booking_rollups (grain, period, dimension, key, {column})
+        SELECT g.grain, g.period, d.dimension, d.key, 1
+        FROM ({grains}) g, (
+            SELECT 'all' AS dimension, '' AS key
+            UNION ALL SELECT 'specialty', COALESCE((SELECT specialty FROM practitioners WHERE id = {practitioner_id}), '')
+            UNION ALL SELECT 'practitioner', CAST({practitioner_id} AS TEXT)
+        ) d
+        WHERE true
+        ON CONFLICT DO UPDATE SET {column} = {column} + 1;
+    '''
+
+
+def _create_analytics_rollups(cursor: sqlite3.Cursor):
+    # Bookings and cancellations counted per day and week as they happen, so
+    # dashboards read a handful of rows however long the history gets.
+    # Bookings are bucketed by when they were made, cancellations by when
+    # they were cancelled, both in UTC days.
+    cursor.execute('''
+        CREATE TABLE booking_rollups (
+            grain TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            period TEXT NOT NULL,
+            key TEXT NOT NULL COLLATE NOCASE,
+            booked INTEGER NOT NULL DEFAULT 0,
+            cancelled INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (grain, dimension, period, key)
+        ) WITHOUT ROWID
+    ''')
+    for grain in ROLLUP_GRAINS:
+        cursor.execute(f'''
+            INSERT INTO booking_rollups (grain, dimension, period, key, booked)
+            SELECT '{grain}', 'all', {rollup_period_sql(grain, "b.created_at")}, '', COUNT(*)
+            FROM bookings b GROUP BY 3
+            UNION ALL
+            SELECT '{grain}', 'specialty', {rollup_period_sql(grain, "b.created_at")}, COALESCE(p.specialty, ''), COUNT(*)
+            FROM bookings b LEFT JOIN practitioners p ON p.id = b.practitioner_id GROUP BY 3, 4 COLLATE NOCASE
+            UNION ALL
+            SELECT '{grain}', 'practitioner', {rollup_period_sql(grain, "b.created_at")}, CAST(b.practitioner_id AS TEXT), COUNT(*)
+            FROM bookings b GROUP BY 3, 4
+        ''')
+    cursor.execute(f'''
+        CREATE TRIGGER bookings_rollup_insert AFTER INSERT ON bookings BEGIN
+            {_booking_rollup_upsert("new.created_at", "new.practitioner_id", "booked")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER bookings_rollup_delete AFTER DELETE ON bookings BEGIN
+            {_booking_rollup_upsert("'now'", "old.practitioner_id", "cancelled")}
+        END
+    ''')
+
+    # Catalog figures per category, kept current by triggers. They describe
+    # state rather than events, so the analytics snapshot task copies them
+    # into category_rollups once per period to build the history.
+    cursor.execute('''
+        CREATE TABLE category_stats (
+            category TEXT PRIMARY KEY COLLATE NOCASE,
+            products INTEGER NOT NULL,
+            in_stock INTEGER NOT NULL,
+            price_sum REAL NOT NULL,
+            rating_sum REAL NOT NULL,
+            reviews INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT INTO category_stats (category, products, in_stock, price_sum, rating_sum, reviews)
+        SELECT category, COUNT(*), SUM(in_stock), SUM(price), SUM(rating), SUM(reviews)
+        FROM products
+        GROUP BY category COLLATE NOCASE
+    ''')
+    add = '''
+        INSERT INTO category_stats (category, products, in_stock, price_sum, rating_sum, reviews)
+        VALUES (new.category, 1, new.in_stock, new.price, new.rating, new.reviews)
+        ON CONFLICT DO UPDATE SET
+            products = products + 1, in_stock = in_stock + excluded.in_stock, price_sum = price_sum + excluded.price_sum,
+            rating_sum = rating_sum + excluded.rating_sum, reviews = reviews + excluded.reviews;
+    '''
+    remove = '''
+        UPDATE category_stats SET
+            products = products - 1, in_stock = in_stock - old.in_stock, price_sum = price_sum - old.price,
+            rating_sum = rating_sum - old.rating, reviews = reviews - old.reviews
+        WHERE category = old.category;
+    '''
+    cursor.execute(f"CREATE TRIGGER products_category_stats_insert AFTER INSERT ON products BEGIN {add} END")
+    cursor.execute(f"CREATE TRIGGER products_category_stats_delete AFTER DELETE ON products BEGIN {remove} END")
+    cursor.execute(f'''
+        CREATE TRIGGER products_category_stats_update
+        AFTER UPDATE OF category, in_stock, price, rating, reviews ON products BEGIN
+            {remove}
+            {add}
+        END
+    ''')
+    cursor.execute('''
+        CREATE TABLE category_rollups (
+            grain TEXT NOT NULL,
+            period TEXT NOT NULL,
+            category TEXT NOT NULL COLLATE NOCASE,
+            products INTEGER NOT NULL,
+            in_stock INTEGER NOT NULL,
+            price_sum REAL NOT NULL,
+            rating_sum REAL NOT NULL,
+            reviews INTEGER NOT NULL,
+            PRIMARY KEY (grain, period, category)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _create_search_vocabularies(cursor: sqlite3.Cursor):
+    # Read-only views of the terms in each full-text index, with the number
+    # of rows containing them; fuzzy search builds its trigram index from these
+    for table in ("practitioners", "products"):
+        cursor.execute(f"CREATE VIRTUAL TABLE {table}_fts_vocab USING fts5vocab({table}_fts, 'row')")
+
+
+# Text columns each recommendation corpus is built from; changing one of them
+# queues the row for recomputation
+RECOMMENDATION_COLUMNS = {
+    "products": ("name", "description", "category"),
+    "practitioners": ("specialty", "location"),
+}
+
+
+def _create_recommendations(cursor: sqlite3.Cursor):
+    # Each item's most similar items, best first, written by recommendations.py;
+    # the neighbour_id index finds the lists an item appears in
+    for table, neighbours in (("products", "product_neighbours"), ("practitioners", "practitioner_neighbours")):
+        cursor.execute(f'''
+            CREATE TABLE {neighbours} (
+                item_id INTEGER NOT NULL,
+                rank INTEGER NOT NULL,
+                neighbour_id INTEGER NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (item_id, rank)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(f"CREATE INDEX idx_{neighbours}_neighbour ON {neighbours} (neighbour_id)")
+        # A refresh rewrites many rows at once, so it bumps this counter itself
+        # instead of a trigger bumping it per row
+        cursor.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (neighbours,))
+
+    # Items whose lists are out of date, keyed by their table's name. The
+    # triggers use ON CONFLICT DO NOTHING rather than INSERT OR IGNORE, which
+    # an outer upsert (such as a catalog import) would override.
+    cursor.execute('''
+        CREATE TABLE recommendation_queue (
+            kind TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            PRIMARY KEY (kind, item_id)
+        ) WITHOUT ROWID
+    ''')
+    for table, columns in RECOMMENDATION_COLUMNS.items():
+        for event, when, row in (
+            ("insert", "INSERT", "new"),
+            ("update", f"UPDATE OF {', '.join(columns)}", "new"),
+            ("delete", "DELETE", "old"),
+        ):
+            cursor.execute(f'''
+                CREATE TRIGGER {table}_recommendations_{event} AFTER {when} ON {table} BEGIN
+                    INSERT INTO recommendation_queue (kind, item_id) VALUES ('{table}', {row}.id) ON CONFLICT DO NOTHING;
+                END
+            ''')
+        # Everything starts out queued, so the first refresh is a full build
+        cursor.execute(f"INSERT INTO recommendation_queue (kind, item_id) SELECT '{table}', id FROM {table}")
+
+
+# Practitioner columns the list endpoints filter by substring
+PRACTITIONER_FILTER_FIELDS = ("specialty", "location")
+
+
+def _create_practitioner_filter_values(cursor: sqlite3.Cursor):
+    # Practitioner counts per distinct specialty and location, kept current by
+    # triggers. A substring filter (LIKE '%x%') cannot use a b-tree index, but
+    # there are only a few dozen distinct values: the filter matches them here
+    # and looks the practitioners up through the NOCASE indexes, as the
+    # category filter does with product_facets.
+    cursor.execute('''
+        CREATE TABLE practitioner_filter_values (
+            field TEXT NOT NULL,
+            value TEXT NOT NULL COLLATE NOCASE,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (field, value)
+        ) WITHOUT ROWID
+    ''')
+    for field in PRACTITIONER_FILTER_FIELDS:
+        cursor.execute(f'''
+            INSERT INTO practitioner_filter_values (field, value, count)
+            SELECT '{field}', {field}, COUNT(*) FROM practitioners GROUP BY {field} COLLATE NOCASE
+        ''')
+
+    for field in PRACTITIONER_FILTER_FIELDS:
+        add = f'''
+            INSERT INTO practitioner_filter_values (field, value, count) VALUES ('{field}', new.{field}, 1)
+            ON CONFLICT DO UPDATE SET count = count + 1;
+        '''
+        remove = f'''
+            UPDATE practitioner_filter_values SET count = count - 1 WHERE field = '{field}' AND value = old.{field};
+        '''
+        cursor.execute(f"CREATE TRIGGER practitioners_{field}_values_insert AFTER INSERT ON practitioners BEGIN {add} END")
+        cursor.execute(f"CREATE TRIGGER practitioners_{field}_values_delete AFTER DELETE ON practitioners BEGIN {remove} END")
+        cursor.execute(f'''
+            CREATE TRIGGER practitioners_{field}_values_update AFTER UPDATE OF {field} ON practitioners BEGIN
+                {remove}
+                {add}
+            END
+        ''')
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create catalog tables", _create_catalog_tables),
+    Migration(2, "full-text search indexes", _create_search_indexes),
+    Migration(3, "table change counters", _create_change_counters),
+    Migration(4, "filter and sort indexes", _create_filter_indexes),
+    Migration(5, "availability slots and bookings", _create_availability),
+    Migration(6, "practitioner coordinates and R*Tree index", _create_geo_index),
+    Migration(7, "product facet counts", _create_product_facets),
+    Migration(8, "analytics rollups", _create_analytics_rollups),
+    Migration(9, "full-text vocabulary tables", _create_search_vocabularies),
+    Migration(10, "recommendation neighbour lists", _create_recommendations),
+    Migration(11, "practitioner filter values", _create_practitioner_filter_values),
+]
+
+
+def applied_versions(conn: sqlite3.Connection) -> List[int]:
+    """Versions recorded in schema_migrations"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return [row[0] for row in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+
+
+def migrate(conn: sqlite3.Connection, migrations: List[Migration] = MIGRATIONS) -> List[int]:
+    """Apply pending migrations and refresh planner statistics; returns the versions applied"""
+    if {m.version for m in migrations} <= set(applied_versions(conn)):
+        return []
+
+    conn.commit()  # end any transaction the caller left open
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another worker may have migrated while we waited for the lock
+        done = set(applied_versions(conn))
+        cursor = conn.cursor()
+        applied = []
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version in done:
+                continue
+            migration.apply(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                (migration.version, migration.name),
+            )
+            applied.append(migration.version)
+        if applied:
+            cursor.execute("ANALYZE")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return applied
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, List, Optional
 
 class Practitioner(BaseModel):
     id: int
@@ -13,7 +13,25 @@ class Practitioner(BaseModel):
 
 class PractitionerResponse(BaseModel):
     practitioners: List[Practitioner]
-    total: int
+    total: Optional[int] = None
+    nextCursor: Optional[str] = None
+    correctedQuery: Optional[str] = None  # set when a search fell back to typo-tolerant matching
+
+class SimilarPractitioner(Practitioner):
+    similarity: float
+
+class SimilarPractitionerResponse(BaseModel):
+    practitioners: List[SimilarPractitioner]
+    total: Optional[int] = None
+
+class NearbyPractitioner(Practitioner):
+    latitude: float
+    longitude: float
+    distanceKm: float
+
+class NearbyPractitionerResponse(BaseModel):
+    practitioners: List[NearbyPractitioner]
+    total: Optional[int] = None
 
 class PractitionerDetail(Practitioner):
     description: Optional[str] = None
@@ -32,10 +50,138 @@ class Product(BaseModel):
     category: str
     inStock: bool
 
-class ProductResponse(BaseModel):
-    products: List[Product]
-    total: int
+class RelatedProduct(Product):
+    similarity: float
+
+class RelatedProductResponse(BaseModel):
+    products: List[RelatedProduct]
+    total: Optional[int] = None
 
 class ProductCategory(BaseModel):
     name: str
-    count: int
\ No newline at end of file
+    count: int
+
+class PriceBucket(BaseModel):
+    min: float
+    max: Optional[float] = None  # None for the open-ended top bucket
+    count: int
+
+class StockCounts(BaseModel):
+    inStock: int
+    outOfStock: int
+
+class ProductFacets(BaseModel):
+    category: Optional[List[ProductCategory]] = None
+    price: Optional[List[PriceBucket]] = None
+    inStock: Optional[StockCounts] = None
+
+class ProductResponse(BaseModel):
+    products: List[Product]
+    total: Optional[int] = None
+    nextCursor: Optional[str] = None
+    facets: Optional[ProductFacets] = None
+    correctedQuery: Optional[str] = None  # set when a search fell back to typo-tolerant matching
+
+class PractitionerImport(Practitioner):
+    id: Optional[int] = None
+    nextAvailable: Optional[str] = None  # derived from slots, ignored on import
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+class ProductImport(Product):
+    id: Optional[int] = None
+    inStock: bool = True
+
+class ImportReport(BaseModel):
+    table: str
+    rows: int
+    skipped: int
+    batches: int
+    seconds: float
+    rowsPerSecond: float
+    errors: List[str]
+
+class ScheduleReport(BaseModel):
+    days: int
+    added: int  # slots published
+    removed: int  # open slots dropped because they had started
+
+class BatchRequestItem(BaseModel):
+    id: Optional[str] = None
+    path: str
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem]
+
+class BatchResult(BaseModel):
+    id: Optional[str] = None
+    status: int
+    body: Any = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResult]
+
+class Slot(BaseModel):
+    id: int
+    practitionerId: int
+    startsAt: str
+    endsAt: str
+
+class AvailabilityResponse(BaseModel):
+    slots: List[Slot]
+
+class BookingRequest(BaseModel):
+    slotId: int
+    patientName: str
+
+class Booking(BaseModel):
+    id: int
+    slotId: int
+    practitionerId: int
+    startsAt: str
+    endsAt: str
+    patientName: str
+
+class BookingPoint(BaseModel):
+    period: str  # first day of the period, YYYY-MM-DD
+    booked: int
+    cancelled: int
+
+class BookingSeries(BaseModel):
+    key: str  # specialty or practitioner id; empty for the "all" series
+    points: List[BookingPoint]
+
+class BookingAnalytics(BaseModel):
+    grain: str
+    by: str
+    periods: List[str]
+    series: List[BookingSeries]
+
+class PractitionerRanking(BaseModel):
+    practitionerId: int
+    name: Optional[str] = None  # None once the practitioner is deleted
+    specialty: Optional[str] = None
+    booked: int
+    cancelled: int
+
+class TopPractitioners(BaseModel):
+    grain: str
+    period: str
+    practitioners: List[PractitionerRanking]
+
+class CategoryPoint(BaseModel):
+    period: str
+    products: int
+    inStock: int
+    averagePrice: Optional[float] = None
+    averageRating: Optional[float] = None
+    reviews: int
+
+class CategorySeries(BaseModel):
+    category: str
+    points: List[CategoryPoint]
+
+class CategoryAnalytics(BaseModel):
+    grain: str
+    periods: List[str]
+    series: List[CategorySeries]
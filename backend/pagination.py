@@ -0,0 +1,58 @@
+"""
+Sorting and keyset-cursor helpers shared by the database classes
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+class SortOption(NamedTuple):
+    expression: str
+    descending: bool
+
+
+def resolve_sort(sort: Optional[str], options: Dict[str, SortOption], default: str) -> Tuple[str, SortOption]:
+    """Look up a sort by name, raising ValueError for unknown names"""
+    name = sort or default
+    if name not in options:
+        raise ValueError(f"Unknown sort '{name}'. Valid options: {', '.join(sorted(options))}")
+    return name, options[name]
+
+
+def order_by_clause(option: SortOption, id_column: str) -> str:
+    """ORDER BY for a sort, with the id as a unique tie-breaker"""
+    direction = "DESC" if option.descending else "ASC"
+    return f" ORDER BY {option.expression} {direction}, {id_column} ASC"
+
+
+def keyset_condition(option: SortOption, value: Any, last_id: int, id_column: str) -> Tuple[str, List[Any]]:
+    """WHERE condition selecting rows strictly after (value, last_id) in sort order"""
+    comparison = "<" if option.descending else ">"
+    return (
+        f"({option.expression} {comparison} ? OR ({option.expression} = ? AND {id_column} > ?))",
+        [value, value, last_id],
+    )
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    """Opaque cursor pointing just past the given row"""
+    payload = json.dumps([sort, value, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """Decode a cursor produced by encode_cursor for the same sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or not isinstance(last_id, int):
+        raise ValueError("Cursor does not match the requested sort")
+    return value, last_id
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Related products and similar practitioners
+
+Every item is a TF-IDF vector over the words of its text columns (see
+WEIGHTED_COLUMNS), and its RECOMMENDATIONS_PER_ITEM nearest items by
+cosine similarity, ties going to the better rated, are precomputed into
+product_neighbours and practitioner_neighbours (migration 10). The API reads
+a list with one primary-key range scan.
+
+Triggers queue every item that is inserted, deleted or reworded. refresh()
+claims the queue and recomputes the lists of those items, of the items whose
+lists held them and of the items whose lists they now belong in. A queue
+covering more than FULL_REBUILD_FRACTION of the catalog (such as the whole
+catalog, right after the migration) rebuilds every list instead. Word weights
+are recomputed on every run, so lists that were not rewritten drift slightly
+from a fresh build until the next full one.
+
+    python recommendations.py refresh
+    python recommendations.py build [products|practitioners]
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from collections import Counter
+from typing import Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+import config
+from database import migrate_database, pool
+
+WORD = re.compile(r"[^\W\d_]{2,}")
+
+# Columns repeated here weigh more: a product's name says more than its description
+WEIGHTED_COLUMNS = {
+    "products": ("name", "name", "description", "category"),
+    "practitioners": ("specialty", "specialty", "location"),
+}
+NEIGHBOUR_TABLES = {"products": "product_neighbours", "practitioners": "practitioner_neighbours"}
+
+MAX_DOCUMENT_FRACTION = 0.5  # words in more items than this are ignored
+MIN_SCORE = 1e-4
+FULL_REBUILD_FRACTION = 0.2
+# Below this many matrix cells the vectors are multiplied as dense arrays,
+# which is far faster when a small vocabulary makes most scores non-zero
+DENSE_CELLS = 32_000_000
+BLOCK_CELLS = 32_000_000  # similarity scores computed at once
+THRESHOLD_SAMPLE = 4096
+
+
+class Vectors(NamedTuple):
+    ids: np.ndarray  # item ids, ascending
+    ratings: np.ndarray
+    matrix: sp.csr_matrix  # one L2-normalized TF-IDF row per item
+
+
+def tfidf(texts: List[str]) -> sp.csr_matrix:
+    """L2-normalized TF-IDF rows for ``texts``, with sublinear term counts and smoothed IDF"""
+    vocabulary: dict = {}
+    indptr, indices, counts = [0], [], []
+    for text in texts:
+        for term, count in Counter(WORD.findall(text.lower())).items():
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+        indptr.append(len(indices))
+    matrix = sp.csr_matrix(
+        (np.array(counts, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(len(texts), len(vocabulary)),
+    )
+
+    documents = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + len(texts)) / (1 + documents)) + 1
+    idf[documents > MAX_DOCUMENT_FRACTION * len(texts)] = 0
+    matrix.data = ((1 + np.log(matrix.data)) * idf[matrix.indices]).astype(np.float32)
+    matrix.eliminate_zeros()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.csr_matrix(sp.diags((1 / norms).astype(np.float32)) @ matrix)
+
+
+def load_vectors(kind: str) -> Vectors:
+    """Vectors for every current row of ``kind``"""
+    text = " || ' ' || ".join(WEIGHTED_COLUMNS[kind])
+    # Straight from the file: a read snapshot can predate the queued changes
+    with pool.dedicated() as conn:
+        rows = conn.execute(f"SELECT id, rating, {text} FROM {kind} ORDER BY id").fetchall()
+    return Vectors(
+        ids=np.array([row[0] for row in rows], dtype=np.int64),
+        ratings=np.array([row[1] for row in rows], dtype=np.float64),
+        matrix=tfidf([row[2] for row in rows]),
+    )
+
+
+class Neighbours:
+    """Top-k most similar items for any rows of a set of vectors"""
+
+    def __init__(self, vectors: Vectors, k: int):
+        self.vectors = vectors
+        self.k = k
+        self.dense = vectors.matrix.shape[0] * vectors.matrix.shape[1] <= DENSE_CELLS
+        self.matrix = vectors.matrix.toarray() if self.dense else vectors.matrix
+        self.transposed = self.matrix.T if self.dense else vectors.matrix.T.tocsr()
+        self.sample = np.random.default_rng(0).choice(len(vectors.ids), size=min(THRESHOLD_SAMPLE, len(vectors.ids)), replace=False)
+
+    def scores(self, positions: np.ndarray):
+        """Similarity of the items at ``positions`` to every item; dense scores have their own zeroed"""
+        scores = self.matrix[positions] @ self.transposed
+        if not self.dense:
+            return sp.csr_matrix(scores)
+        scores[np.arange(len(positions)), positions] = 0
+        return scores
+
+    def blocks(self, positions: np.ndarray) -> Iterator[Tuple[np.ndarray, object]]:
+        """``positions`` in blocks small enough to score at once, with their scores"""
+        size = max(1, BLOCK_CELLS // max(1, len(self.vectors.ids)))
+        for start in range(0, len(positions), size):
+            block = positions[start:start + size]
+            yield block, self.scores(block)
+
+    def candidates(self, scores) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Per row of ``scores``: the positions and scores that can be among its top k"""
+        if not self.dense:
+            for row in range(scores.shape[0]):
+                start, end = scores.indptr[row], scores.indptr[row + 1]
+                yield scores.indices[start:end], scores.data[start:end]
+            return
+        # The k-th best score in a sample is a lower bound for the row's k-th
+        # best, so only the scores above it need ranking
+        k = min(self.k, len(self.sample))
+        floors = np.maximum(np.partition(scores[:, self.sample], -k, axis=1)[:, -k], MIN_SCORE)
+        for row, floor in enumerate(floors):
+            positions = np.flatnonzero(scores[row] >= floor)
+            yield positions, scores[row, positions]
+
+    def rank(self, position: int, positions: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """The best k candidates for the item at ``position``, by score, then rating, then id"""
+        keep = (scores >= MIN_SCORE) & (positions != position)
+        positions, scores = positions[keep], np.round(scores[keep], 6)
+        if len(positions) > 8 * self.k:
+            # Cut down to the scores at least as high as the k-th, ties included
+            floor = np.partition(scores, -self.k)[-self.k]
+            keep = scores >= floor
+            positions, scores = positions[keep], scores[keep]
+        order = np.lexsort((positions, -self.vectors.ratings[positions], -scores))[:self.k]
+        return positions[order], scores[order]
+
+    def top(self, positions: np.ndarray) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """(position, neighbour positions, scores) for each of ``positions``, best neighbour first"""
+        for block, scores in self.blocks(positions):
+            for position, (candidates, candidate_scores) in zip(block, self.candidates(scores)):
+                yield position, *self.rank(position, candidates, candidate_scores)
+
+
+def _positions(ids: np.ndarray, wanted: Set[int]) -> np.ndarray:
+    """Positions in the sorted ``ids`` of those ``wanted`` ids that are present"""
+    wanted_ids = np.array(sorted(wanted), dtype=np.int64)
+    positions = np.minimum(np.searchsorted(ids, wanted_ids), max(0, len(ids) - 1))
+    return positions[ids[positions] == wanted_ids] if len(ids) else positions[:0]
+
+
+def _claim_queue(kind: str) -> Set[int]:
+    with pool.write() as conn:
+        return {row[0] for row in conn.execute(
+            "DELETE FROM recommendation_queue WHERE kind = ? RETURNING item_id", (kind,)
+        ).fetchall()}
+
+
+def _requeue(kind: str, ids: Set[int]):
+    with pool.write() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO recommendation_queue (kind, item_id) VALUES (?, ?)", [(kind, i) for i in ids]
+        )
+
+
+def _stale_lists(kind: str, neighbours: Neighbours, changed: Set[int]) -> Set[int]:
+    """Ids of the items whose lists the ``changed`` items were in or should now be in"""
+    table = NEIGHBOUR_TABLES[kind]
+    with pool.dedicated() as conn:
+        holders = {row[0] for row in conn.execute(
+            f"SELECT DISTINCT item_id FROM {table} WHERE neighbour_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(sorted(changed)),),
+        )}
+        # The score an item must reach to enter each full list
+        full_lists = dict(conn.execute(
+            f"SELECT item_id, MIN(score) FROM {table} GROUP BY item_id HAVING COUNT(*) >= ?", (neighbours.k,)
+        ).fetchall())
+
+    ids = neighbours.vectors.ids
+    floors = np.full(len(ids), MIN_SCORE)
+    listed = _positions(ids, set(full_lists))
+    floors[listed] = [full_lists[item_id] for item_id in ids[listed].tolist()]
+
+    entering: Set[int] = set()
+    for _, scores in neighbours.blocks(_positions(ids, changed)):
+        if neighbours.dense:
+            entering.update(ids[np.flatnonzero((scores >= floors).any(axis=0))].tolist())
+        else:
+            entering.update(ids[np.unique(scores.indices[scores.data >= floors[scores.indices]])].tolist())
+    return holders | entering
+
+
+def refresh(kind: str, full: bool = False) -> int:
+    """Bring ``kind``'s neighbour lists up to date with the catalog; returns the number of lists rewritten"""
+    if kind not in NEIGHBOUR_TABLES:
+        raise ValueError(f"Unknown kind '{kind}'. Valid kinds: {', '.join(NEIGHBOUR_TABLES)}")
+    queued = _claim_queue(kind)
+    if not queued and not full:
+        return 0
+    try:
+        return _rewrite(kind, queued, full)
+    except BaseException:
+        # Put the claimed items back for the next run
+        _requeue(kind, queued)
+        raise
+
+
+def _rewrite(kind: str, queued: Set[int], full: bool) -> int:
+    vectors = load_vectors(kind)
+    neighbours = Neighbours(vectors, config.RECOMMENDATIONS_PER_ITEM)
+    full = full or len(queued) > FULL_REBUILD_FRACTION * len(vectors.ids)
+    if full:
+        targets = np.arange(len(vectors.ids))
+    else:
+        targets = _positions(vectors.ids, queued | _stale_lists(kind, neighbours, queued))
+
+    rows: List[Tuple[int, int, int, float]] = []
+    if len(vectors.ids) > 1:
+        for position, found, scores in neighbours.top(targets):
+            item_id = int(vectors.ids[position])
+            rows.extend(
+                (item_id, rank, int(neighbour), float(score))
+                for rank, (neighbour, score) in enumerate(zip(vectors.ids[found], scores), start=1)
+            )
+
+    table = NEIGHBOUR_TABLES[kind]
+    with pool.write() as conn:
+        if full:
+            conn.execute(f"DELETE FROM {table}")
+        else:
+            # Deleted items are dropped along with the rewritten lists
+            conn.execute(
+                f"DELETE FROM {table} WHERE item_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted(queued | set(vectors.ids[targets].tolist()))),),
+            )
+        conn.executemany(f"INSERT INTO {table} (item_id, rank, neighbour_id, score) VALUES (?, ?, ?, ?)", rows)
+        conn.execute("UPDATE table_versions SET version = version + 1 WHERE name = ?", (table,))
+    return len(targets)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Rebuild or refresh the related products and similar practitioners")
+    parser.add_argument("action", choices=["build", "refresh"], help="build rewrites every list; refresh only the stale ones")
+    parser.add_argument("kinds", nargs="*", choices=sorted(NEIGHBOUR_TABLES), default=sorted(NEIGHBOUR_TABLES))
+    args = parser.parse_args(argv)
+
+    migrate_database()
+    for kind in args.kinds:
+        start = time.perf_counter()
+        rewritten = refresh(kind, full=args.action == "build")
+        print(f"🍊 {kind}: {rewritten:,} lists rewritten in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
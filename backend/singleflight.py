@@ -0,0 +1,75 @@
+"""
+Single-flight coalescing of identical concurrent work
+
+The first caller for a key starts the work as a task of its own; callers that
+arrive with the same key while it runs wait on that task instead of starting
+another, and every one of them gets its result or its exception. Waiters are
+shielded from the task, so a request that is cancelled does not cancel the
+work for the others. A waiter that has waited ``timeout`` seconds gives up on
+the shared task and does the work itself. Flights are per process and per
+event loop; nothing is remembered once a task finishes.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlightStats:
+    """Counters for coalesced calls"""
+
+    def __init__(self):
+        self.leaders = 0
+        self.collapsed = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+        }
+
+
+class SingleFlight:
+    """Runs at most one ``compute()`` per key at a time and shares its outcome"""
+
+    def __init__(self, timeout: float, enabled: bool = True):
+        self.timeout = timeout
+        self.enabled = enabled
+        self._stats = SingleFlightStats()
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """``await compute()``, or the result of the identical call already in flight for ``key``"""
+        if not self.enabled:
+            return await compute()
+
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._land(key, done))
+            self._stats.leaders += 1
+            return await asyncio.shield(task)
+
+        self._stats.collapsed += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            if task.done():
+                # Finished just as the wait ran out, or timed out itself
+                return task.result()
+            self._stats.timeouts += 1
+            return await compute()
+
+    def _land(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Retrieving the exception also keeps asyncio from logging it when
+        # every waiter has gone away
+        if not task.cancelled() and task.exception() is not None:
+            self._stats.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "in_flight": len(self._flights), **self._stats.as_dict()}
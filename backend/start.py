@@ -1,26 +1,89 @@
 #!/usr/bin/env python3
 """
 Startup script for the Tangerine Practitioners API
+
+ENVIRONMENT=development (the default) runs one auto-reloading uvicorn
+process. ENVIRONMENT=production runs gunicorn as a pre-fork supervisor over
+WEB_CONCURRENCY uvicorn workers on uvloop and httptools:
+
+- the schema is migrated once, in the supervisor, before any worker forks
+- each worker is recycled after MAX_REQUESTS requests, plus up to
+  MAX_REQUESTS_JITTER so they do not all restart together, and the
+  supervisor replaces it
+- SIGTERM stops accepting connections and lets in-flight requests finish
+  for up to GRACEFUL_TIMEOUT seconds
 """
-import uvicorn
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+import config  # noqa: E402  (reads the environment loaded above)
+
+
+def prepare_database():
+    """Apply migrations and sample data before the workers start"""
+    from cache import catalog_cache
+    from database import PractitionerDatabase, ProductDatabase, pool
+
+    PractitionerDatabase.initialize_database()
+    ProductDatabase.initialize_database()
+    # Workers are forked from this process and must not share its connections,
+    # including the file cache's (CACHE_BACKEND=file)
+    pool.close_all()
+    catalog_cache.close()
+    config.DB_MIGRATE_ON_STARTUP = False
+    os.environ["DB_MIGRATE_ON_STARTUP"] = "false"
+
+
+def run_production(host: str, port: int):
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": config.WEB_CONCURRENCY,
+        "worker_class": "worker.ProductionWorker",
+        "max_requests": config.MAX_REQUESTS,
+        "max_requests_jitter": config.MAX_REQUESTS_JITTER,
+        "graceful_timeout": config.GRACEFUL_TIMEOUT,
+        "backlog": config.BACKLOG,
+        "keepalive": config.KEEPALIVE_SECONDS,
+        "loglevel": "info",
+    }
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+
+            return app
+
+    prepare_database()
+    Server().run()
+
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
-    
+
     print(f"🍊 Starting Tangerine Practitioners API on {host}:{port}")
     print(f"📱 Make sure to update your React Native app's API URL to: http://YOUR_IP_ADDRESS:{port}")
-    print(f"🔧 Environment: {os.getenv('ENVIRONMENT', 'development')}")
-    
-    uvicorn.run(
-        "main:app",
-        host=host,
-        port=port,
-        reload=True,  # Enable auto-reload for development
-        log_level="info"
-    )
\ No newline at end of file
+    print(f"🔧 Environment: {config.ENVIRONMENT}")
+
+    if config.ENVIRONMENT == "production":
+        print(f"⚙️  {config.WEB_CONCURRENCY} workers, recycled every {config.MAX_REQUESTS} requests")
+        run_production(host, port)
+    else:
+        import uvicorn
+
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            reload=True,  # Enable auto-reload for development
+            log_level="info"
+        )
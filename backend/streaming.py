@@ -0,0 +1,36 @@
+"""
+Newline-delimited JSON responses for large list endpoints
+
+A streamed list is serialized one fetchmany batch at a time, so peak memory
+depends on the batch size rather than on how many rows match, and the first
+bytes leave before the last row has been read.
+"""
+from typing import Iterable, Iterator, List, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+LIST_FORMATS = ("json", "ndjson")
+
+
+def wants_ndjson(request: Request, format: Optional[str]) -> bool:
+    """Whether the client asked for NDJSON through ``format`` or the Accept header"""
+    if format:
+        if format not in LIST_FORMATS:
+            raise ValueError(f"Unknown format '{format}'. Valid formats: {', '.join(LIST_FORMATS)}")
+        return format == "ndjson"
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_lines(batches: Iterable[List[BaseModel]]) -> Iterator[bytes]:
+    """One encoded chunk per batch, one JSON object per line"""
+    for batch in batches:
+        yield b"".join(model.model_dump_json().encode() + b"\n" for model in batch)
+
+
+def ndjson_response(batches: Iterable[List[BaseModel]], total: Optional[int] = None) -> StreamingResponse:
+    """Stream ``batches`` as NDJSON; the match count, when known, goes in X-Total-Count"""
+    headers = {"X-Total-Count": str(total)} if total is not None else None
+    return StreamingResponse(ndjson_lines(batches), media_type=NDJSON_MEDIA_TYPE, headers=headers)
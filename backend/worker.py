@@ -0,0 +1,16 @@
+"""
+Gunicorn worker class for production mode (see start.py)
+"""
+from uvicorn.workers import UvicornWorker
+
+import config
+
+
+class ProductionWorker(UvicornWorker):
+    """uvicorn worker pinned to uvloop and httptools that drains for GRACEFUL_TIMEOUT on shutdown"""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "timeout_graceful_shutdown": config.GRACEFUL_TIMEOUT,
+    }
@@ -6,7 +6,7 @@ interface UsePractitionersState {
   practitioners: Practitioner[];
   loading: boolean;
   error: string | null;
-  total: number;
+  total: number | null; // null when the API skipped the count
 }
 
 export const usePractitioners = (params?: {
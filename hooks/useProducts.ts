@@ -6,7 +6,7 @@ interface UseProductsState {
   products: Product[];
   loading: boolean;
   error: string | null;
-  total: number;
+  total: number | null; // null when the API skipped the count
 }
 
 export const useProducts = (params?: {
@@ -0,0 +1,44 @@
+import { api } from './api';
+import { BookingAnalytics, CategoryAnalytics, RollupGrain, TopPractitioners } from '../types/analytics';
+
+export const analyticsApi = {
+  // Bookings and cancellations per day or week, overall or per specialty or practitioner
+  getBookingAnalytics: async (params?: {
+    grain?: RollupGrain;
+    periods?: number;
+    by?: 'all' | 'specialty' | 'practitioner';
+    specialty?: string;
+    practitionerId?: number;
+  }): Promise<BookingAnalytics> => {
+    const response = await api.get('/api/analytics/bookings', {
+      params: {
+        grain: params?.grain,
+        periods: params?.periods,
+        by: params?.by,
+        specialty: params?.specialty,
+        practitioner_id: params?.practitionerId
+      }
+    });
+    return response.data;
+  },
+
+  // Most booked practitioners in the current (or given) day or week
+  getTopPractitioners: async (params?: {
+    grain?: RollupGrain;
+    period?: string;
+    limit?: number;
+  }): Promise<TopPractitioners> => {
+    const response = await api.get('/api/analytics/practitioners/top', { params });
+    return response.data;
+  },
+
+  // Catalog figures per category over time
+  getCategoryAnalytics: async (params?: {
+    grain?: RollupGrain;
+    periods?: number;
+    category?: string;
+  }): Promise<CategoryAnalytics> => {
+    const response = await api.get('/api/analytics/categories', { params });
+    return response.data;
+  }
+};
@@ -54,7 +54,7 @@ api.interceptors.response.use(
 );
 
 // Product API functions
-import { Product, ProductResponse, ProductCategory } from '../types/product';
+import { Product, ProductResponse, ProductCategory, ProductFacetName, RelatedProductResponse } from '../types/product';
 
 export const productsApi = {
   // Get all products
@@ -63,13 +63,16 @@ export const productsApi = {
     query?: string;
     inStockOnly?: boolean;
     limit?: number;
+    // Filter-aware counts returned alongside the page, e.g. ['category', 'price']
+    facets?: ProductFacetName[];
   }): Promise<ProductResponse> => {
     const response = await api.get('/api/products', { 
       params: {
         category: params?.category,
         query: params?.query,
         in_stock_only: params?.inStockOnly,
-        limit: params?.limit
+        limit: params?.limit,
+        facets: params?.facets?.join(',')
       }
     });
     return response.data;
@@ -81,6 +84,20 @@ export const productsApi = {
     return response.data;
   },
 
+  // Get several products in one request
+  getProductsByIds: async (ids: number[]): Promise<ProductResponse> => {
+    const response = await api.get('/api/products', {
+      params: { ids: ids.join(',') }
+    });
+    return response.data;
+  },
+
+  // Products most similar to this one, most similar first
+  getRelatedProducts: async (id: number, limit?: number): Promise<RelatedProductResponse> => {
+    const response = await api.get(`/api/products/${id}/related`, { params: { limit } });
+    return response.data;
+  },
+
   // Search products
   searchProducts: async (
     query: string, 
@@ -106,4 +123,15 @@ export const productsApi = {
   }
 };
 
+// Batch API: several GET requests in one round trip
+import { BatchRequestItem, BatchResult } from '../types/batch';
+
+export const batchApi = {
+  // Run sub-requests concurrently on the server; results come back in request order
+  batch: async (requests: BatchRequestItem[]): Promise<BatchResult[]> => {
+    const response = await api.post('/api/batch', { requests });
+    return response.data.responses;
+  }
+};
+
 export default api;
\ No newline at end of file
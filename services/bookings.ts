@@ -0,0 +1,33 @@
+import { api } from './api';
+import { AvailabilityResponse, Booking } from '../types/booking';
+
+export const bookingsApi = {
+  // Earliest open slots, optionally for one practitioner or specialty
+  getAvailability: async (params?: {
+    specialty?: string;
+    practitionerId?: number;
+    days?: number;
+    limit?: number;
+  }): Promise<AvailabilityResponse> => {
+    const response = await api.get('/api/availability', {
+      params: {
+        specialty: params?.specialty,
+        practitioner_id: params?.practitionerId,
+        days: params?.days,
+        limit: params?.limit
+      }
+    });
+    return response.data;
+  },
+
+  // Book a slot; the server answers 409 if it was taken first
+  bookSlot: async (slotId: number, patientName: string): Promise<Booking> => {
+    const response = await api.post('/api/bookings', { slotId, patientName });
+    return response.data;
+  },
+
+  // Cancel a booking and reopen its slot
+  cancelBooking: async (bookingId: number): Promise<void> => {
+    await api.delete(`/api/bookings/${bookingId}`);
+  }
+};
\ No newline at end of file
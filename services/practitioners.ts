@@ -1,5 +1,10 @@
 import { api } from './api';
-import { Practitioner, PractitionerResponse } from '../types/practitioner';
+import {
+  NearbyPractitionerResponse,
+  Practitioner,
+  PractitionerResponse,
+  SimilarPractitionerResponse,
+} from '../types/practitioner';
 
 export const practitionersApi = {
   // Get all practitioners
@@ -18,6 +23,33 @@ export const practitionersApi = {
     return response.data;
   },
 
+  // Get several practitioners in one request
+  getPractitionersByIds: async (ids: number[]): Promise<PractitionerResponse> => {
+    const response = await api.get('/api/practitioners', {
+      params: { ids: ids.join(',') }
+    });
+    return response.data;
+  },
+
+  // Practitioners with the most similar specialty and location, most similar first
+  getSimilarPractitioners: async (id: number, limit?: number): Promise<SimilarPractitionerResponse> => {
+    const response = await api.get(`/api/practitioners/${id}/similar`, { params: { limit } });
+    return response.data;
+  },
+
+  // Practitioners within a radius (km) of a point, nearest first by default
+  getNearbyPractitioners: async (params: {
+    lat: number;
+    lng: number;
+    radius?: number;
+    specialty?: string;
+    sort?: 'distance' | 'rating';
+    limit?: number;
+  }): Promise<NearbyPractitionerResponse> => {
+    const response = await api.get('/api/practitioners/nearby', { params });
+    return response.data;
+  },
+
   // Search practitioners
   searchPractitioners: async (query: string, limit?: number): Promise<PractitionerResponse> => {
     const response = await api.get('/api/practitioners/search', {
@@ -0,0 +1,53 @@
+export type RollupGrain = 'day' | 'week';
+
+export interface BookingPoint {
+  period: string; // first day of the period, YYYY-MM-DD (UTC)
+  booked: number;
+  cancelled: number;
+}
+
+export interface BookingSeries {
+  key: string; // specialty or practitioner id; empty for the overall series
+  points: BookingPoint[];
+}
+
+export interface BookingAnalytics {
+  grain: RollupGrain;
+  by: 'all' | 'specialty' | 'practitioner';
+  periods: string[];
+  series: BookingSeries[];
+}
+
+export interface PractitionerRanking {
+  practitionerId: number;
+  name: string | null;
+  specialty: string | null;
+  booked: number;
+  cancelled: number;
+}
+
+export interface TopPractitioners {
+  grain: RollupGrain;
+  period: string;
+  practitioners: PractitionerRanking[];
+}
+
+export interface CategoryPoint {
+  period: string;
+  products: number;
+  inStock: number;
+  averagePrice: number | null;
+  averageRating: number | null;
+  reviews: number;
+}
+
+export interface CategorySeries {
+  category: string;
+  points: CategoryPoint[];
+}
+
+export interface CategoryAnalytics {
+  grain: RollupGrain;
+  periods: string[];
+  series: CategorySeries[];
+}
@@ -0,0 +1,10 @@
+export interface BatchRequestItem {
+  id?: string;
+  path: string;
+}
+
+export interface BatchResult<T = any> {
+  id?: string | null;
+  status: number;
+  body: T;
+}
\ No newline at end of file
@@ -0,0 +1,19 @@
+export interface Slot {
+  id: number;
+  practitionerId: number;
+  startsAt: string;
+  endsAt: string;
+}
+
+export interface AvailabilityResponse {
+  slots: Slot[];
+}
+
+export interface Booking {
+  id: number;
+  slotId: number;
+  practitionerId: number;
+  startsAt: string;
+  endsAt: string;
+  patientName: string;
+}
\ No newline at end of file
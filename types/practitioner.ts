@@ -11,6 +11,28 @@ export interface Practitioner {
 
 export interface PractitionerResponse {
   practitioners: Practitioner[];
+  total: number | null; // null when requested with include_total=false
+  nextCursor?: string | null;
+  correctedQuery?: string | null; // set when the search fell back to typo-tolerant matching
+}
+
+export interface SimilarPractitioner extends Practitioner {
+  similarity: number;
+}
+
+export interface SimilarPractitionerResponse {
+  practitioners: SimilarPractitioner[];
+  total: number;
+}
+
+export interface NearbyPractitioner extends Practitioner {
+  latitude: number;
+  longitude: number;
+  distanceKm: number;
+}
+
+export interface NearbyPractitionerResponse {
+  practitioners: NearbyPractitioner[];
   total: number;
 }
 
@@ -13,6 +13,18 @@ export interface Product {
 
 export interface ProductResponse {
   products: Product[];
+  total: number | null; // null when requested with include_total=false
+  nextCursor?: string | null;
+  correctedQuery?: string | null; // set when the search fell back to typo-tolerant matching
+  facets?: ProductFacets | null;
+}
+
+export interface RelatedProduct extends Product {
+  similarity: number;
+}
+
+export interface RelatedProductResponse {
+  products: RelatedProduct[];
   total: number;
 }
 
@@ -21,6 +33,21 @@ export interface ProductCategory {
   count: number;
 }
 
+export type ProductFacetName = 'category' | 'price' | 'in_stock';
+
+export interface PriceBucket {
+  min: number;
+  max: number | null;
+  count: number;
+}
+
+// Each facet applies every active filter except its own
+export interface ProductFacets {
+  category?: ProductCategory[] | null;
+  price?: PriceBucket[] | null;
+  inStock?: { inStock: number; outOfStock: number } | null;
+}
+
 export interface ApiError {
   message: string;
   status: number;